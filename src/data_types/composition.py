@@ -1,7 +1,7 @@
 from typing import List
 from collections import defaultdict
 
-from utils import percent, top_key, plural, precise, val_sum
+from utils import percent, top_key, plural, precise, val_sum, merge_counts
 
 
 class Composition:
@@ -22,6 +22,22 @@ class Composition:
         self.link_msg = 0
         self.spoilers = 0
 
+    def merge(self, other: "Composition"):
+        for key, value in other.__dict__.items():
+            if key == "emojis":
+                merge_counts(self.emojis, value)
+            else:
+                setattr(self, key, getattr(self, key) + value)
+
+    def __getstate__(self) -> dict:
+        state = dict(self.__dict__)
+        state["emojis"] = dict(self.emojis)
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self.emojis = defaultdict(int, state["emojis"])
+
     def to_string(self, msg_count: int) -> List[str]:
         total_emojis = val_sum(self.emojis)
         top_emoji = top_key(self.emojis)
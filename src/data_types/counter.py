@@ -4,32 +4,80 @@ from collections import defaultdict
 
 # Custom libs
 
-from utils import plural, from_now, percent, val_sum, top_key, utc_today
+from utils import (
+    plural,
+    from_now,
+    percent,
+    top_key,
+    utc_today,
+    merge_counts,
+)
 
 
 class Counter:
     def __init__(self):
         self.usages = defaultdict(int)
         self.last_used = None
+        # running total and most used item (same as top_key while top_known)
+        self.usage_sum = 0
+        self.top_item = None
+        self.top_known = True
 
     def update_use(self, count: int, date: datetime, item: int = 0):
-        self.usages[item] += count
+        new = item not in self.usages
+        usage = self.usages[item] + count
+        self.usages[item] = usage
+        self.usage_sum += count
+        if self.top_known and item != self.top_item:
+            top_usage = -1 if self.top_item is None else self.usages[self.top_item]
+            if usage > top_usage or (usage == top_usage and new):
+                self.top_item = item
+            elif usage == top_usage:
+                # ties go to the last inserted key, the order is not tracked
+                self.top_known = False
         if count > 0 and (self.last_used is None or date > self.last_used):
             self.last_used = date
 
-    def score(self) -> float:
+    def merge(self, other: "Counter"):
+        merge_counts(self.usages, other.usages)
+        self.usage_sum += other.usage_sum
+        self.top_known = False
+        if other.last_used is not None and (
+            self.last_used is None or other.last_used > self.last_used
+        ):
+            self.last_used = other.last_used
+
+    def __getstate__(self) -> tuple:
+        return dict(self.usages), self.last_used
+
+    def __setstate__(self, state: tuple):
+        usages, self.last_used = state
+        self.usages = defaultdict(int, usages)
+        self.usage_sum = sum(usages.values())
+        self.top_item = None
+        self.top_known = False
+
+    def top(self) -> Optional[int]:
+        if not self.top_known:
+            self.top_item = top_key(self.usages)
+            self.top_known = True
+        return self.top_item
+
+    def score(self, *, today: Optional[datetime] = None) -> float:
         # Score is compose of usages + reactions
         # When 2 emojis have the same score,
         # the days since last use is stored in the digits
         # (more recent first)
         if self.last_used is None:
             return 0
+        if today is None:
+            today = utc_today()
         return self.all_usages() + 1 / (
-            100000 * (abs((utc_today() - self.last_used).days) + 1)
+            100000 * (abs((today - self.last_used).days) + 1)
         )
 
     def all_usages(self) -> int:
-        return val_sum(self.usages)
+        return self.usage_sum
 
     def to_string(
         self,
@@ -55,12 +103,12 @@ class Counter:
                 output += f"**#{i + 1}** "
         else:
             output += f"- "
-        sum = val_sum(self.usages)
+        sum = self.usage_sum
         if sum > 0:
             output += f"{name} - {plural(sum, counted)} ({percent(sum/total_usage)}, last {from_now(self.last_used)})"
         else:
             output += f"{name} - unused"
-        top_item = top_key(self.usages)
+        top_item = self.top()
         if sum > 0 and top and top_item != 0 and transform is not None:
             if self.usages[top_item] == sum:
                 output += f" (all{transform(top_item)})"
@@ -70,4 +118,4 @@ class Counter:
 
     @staticmethod
     def total(d: dict) -> int:
-        return sum([val_sum(counter.usages) for counter in d.values()])
+        return sum(counter.usage_sum for counter in d.values())
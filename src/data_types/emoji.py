@@ -5,7 +5,15 @@ import discord
 
 # Custom libs
 
-from utils import mention, plural, from_now, top_key, percent, utc_today
+from utils import (
+    mention,
+    plural,
+    from_now,
+    top_key,
+    percent,
+    utc_today,
+    merge_counts,
+)
 
 
 class Emoji:
@@ -29,10 +37,38 @@ class Emoji:
         for member_id in members_id:
             self.members[member_id] += 1
 
+    def merge(self, other: "Emoji"):
+        if self.emoji is None:
+            self.emoji = other.emoji
+        self.usages += other.usages
+        self.reactions += other.reactions
+        if other.last_used is not None and (
+            self.last_used is None or other.last_used > self.last_used
+        ):
+            self.last_used = other.last_used
+        merge_counts(self.members, other.members)
+
+    def __getstate__(self) -> dict:
+        # the discord emoji stays in the main process
+        state = dict(self.__dict__)
+        state["emoji"] = None
+        state["members"] = dict(self.members)
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self.members = defaultdict(int, state["members"])
+
     def used(self) -> bool:
         return self.usages > 0 or self.reactions > 0
 
-    def score(self, *, usage_weight: int = 1, react_weight: int = 1) -> float:
+    def score(
+        self,
+        *,
+        usage_weight: int = 1,
+        react_weight: int = 1,
+        today: Optional[datetime] = None,
+    ) -> float:
         # Score is compose of usages + reactions
         # When 2 emojis have the same score,
         # the days since last use is stored in the digits
@@ -40,18 +76,21 @@ class Emoji:
         return (
             self.usages * usage_weight
             + self.reactions * react_weight
-            + 1 / (100000 * (self.use_days() + 1))
+            + 1 / (100000 * (abs(self.use_days(today)) + 1))
         )
 
-    def life_days(self) -> int:
-        return (utc_today() - self.emoji.created_at).days
+    def life_days(self, today: Optional[datetime] = None) -> int:
+        if self.emoji is None:
+            # not a guild emoji (anymore)
+            return 0
+        return ((today or utc_today()) - self.emoji.created_at).days
 
-    def use_days(self) -> int:
+    def use_days(self, today: Optional[datetime] = None) -> int:
         # If never used, use creation date instead
         if self.last_used is None:
-            return self.life_days()
+            return self.life_days(today)
         else:
-            return (utc_today() - self.last_used).days
+            return ((today or utc_today()) - self.last_used).days
 
     def get_top_member(self) -> int:
         return top_key(self.members)
@@ -1,13 +1,14 @@
-from typing import List
-from datetime import timedelta
+from typing import Dict, List, Tuple
+from datetime import datetime, timedelta
 import calendar
-import matplotlib.pyplot as plt
 from io import BytesIO
+import numpy as np
 import discord
 import time
 
 from utils import (
     from_now,
+    from_timestamp,
     plural,
     percent,
     precise,
@@ -15,36 +16,95 @@ from utils import (
     mention,
 )
 
+DAY = 24 * 3600 * 1000
+HOUR = 3600 * 1000
+
 
 class Frequency:
     def __init__(self):
-        self.dates = []
+        # scanned messages (id, epoch ms, author, channel, counted or not),
+        # column arrays of whole channels and rows of single messages
+        self.chunks = []
+        self.rows = []
+        # computed from the scanned messages
+        self.dates = np.empty(0, np.int64)
+        self.hours = np.zeros((7, 24), np.int64)
         self.longest_break = timedelta(seconds=0)
         self.longest_break_start = None
-        self.hours = {i: {j: 0 for j in range(24)} for i in range(7)}
         self.busiest_day = None
         self.busiest_day_count = 0
         self.busiest_hour = None
         self.busiest_hour_count = 0
-        self.streaks = []
-        self.last_author = None
-        self.last_streak_start = None
-        self.last_streak_author = None
+        self.streaks = np.empty(0, np.int64)
         self.longest_streak = None
         self.longest_streak_start = None
         self.longest_streak_author = None
 
+    def add(self, id: int, timestamp: int, author: int, channel: int, counted: bool):
+        self.rows += [(id, timestamp, author, channel, counted)]
+
+    def extend(
+        self,
+        ids: np.ndarray,
+        timestamps: np.ndarray,
+        authors: np.ndarray,
+        channels: np.ndarray,
+        counted: np.ndarray,
+    ):
+        self.chunks += [(ids, timestamps, authors, channels, counted)]
+
+    def merge(self, other: "Frequency"):
+        # results are computed on messages sorted by channel and id
+        self.chunks += other.chunks
+        self.rows += other.rows
+
+    def columns(self) -> Tuple[np.ndarray, ...]:
+        # (ids, timestamps, authors, channels, counted) of all scanned messages
+        rows = np.array(self.rows, np.int64).reshape(-1, 5).T
+        columns = tuple(
+            np.concatenate([chunk[i] for chunk in self.chunks] + [rows[i]]).astype(
+                np.int64
+            )
+            for i in range(4)
+        )
+        counted = np.concatenate(
+            [chunk[4] for chunk in self.chunks] + [rows[4].astype(bool)]
+        )
+        return (*columns, counted)
+
+    def __getstate__(self) -> dict:
+        state = dict(self.__dict__)
+        state["chunks"] = [self.columns()]
+        state["rows"] = []
+        return state
+
+    def first_date(self) -> datetime:
+        return from_timestamp(int(self.dates[0]))
+
+    def last_date(self) -> datetime:
+        return from_timestamp(int(self.dates[-1]))
+
+    def week(self) -> Dict[int, int]:
+        return dict(enumerate(self.hours.sum(axis=1).tolist()))
+
+    def day(self) -> Dict[int, int]:
+        return dict(enumerate(self.hours.sum(axis=0).tolist()))
+
     def to_graph(self) -> List[str]:
-        self.dates.sort()
-        delta = self.dates[-1] - self.dates[0]
+        first_date = self.first_date()
+        last_date = self.last_date()
+        delta = last_date - first_date
         if delta.days == 0:
             delta = timedelta(days=1)
-        day = {j: sum(self.hours[i][j] for i in range(7)) for j in range(24)}
+        day = self.day()
         busiest_hour = top_key(day)
         n_hours = delta.days
-        if self.dates[0].hour <= busiest_hour and self.dates[-1].hour >= busiest_hour:
+        if first_date.hour <= busiest_hour and last_date.hour >= busiest_hour:
             n_hours += 1
 
+        # matplotlib is slow to import, it is only needed for plots
+        import matplotlib.pyplot as plt
+
         plt.style.use("dark_background")
 
         fig, ax = plt.subplots()
@@ -54,9 +114,9 @@ class Frequency:
         ax.set_xticklabels([f"{t:0>2}h" if t % 2 == 0 else "" for t in times])
 
         for i in range(7):
-            hours = [self.hours[i][hour] * 7 / n_hours for hour in range(24)] + [
-                self.hours[i][0] * 7 / n_hours
-            ]
+            hours = (
+                np.append(self.hours[i], self.hours[i][0]) * 7 / n_hours
+            ).tolist()
             ax.plot(
                 times, hours, label=calendar.day_name[i], linestyle="--", linewidth=0.8
             )
@@ -89,14 +149,15 @@ class Frequency:
         *,
         member_specific: bool,
     ) -> List[str]:
-        self.dates.sort()
-        delta = self.dates[-1] - self.dates[0]
+        first_date = self.first_date()
+        last_date = self.last_date()
+        delta = last_date - first_date
         if delta.days == 0:
             delta = timedelta(days=1)
         total_msg = len(self.dates)
 
-        week = {i: sum(self.hours[i].values()) for i in range(7)}
-        day = {j: sum(self.hours[i][j] for i in range(7)) for j in range(24)}
+        week = self.week()
+        day = self.day()
 
         busiest_weekday = top_key(week)
         busiest_hour = top_key(day)
@@ -104,16 +165,16 @@ class Frequency:
         quietest_hour = top_key(day, reverse=True)
         n_weekdays = delta.days // 7
         if (
-            self.dates[0].weekday() <= busiest_weekday
-            and self.dates[-1].weekday() >= busiest_weekday
+            first_date.weekday() <= busiest_weekday
+            and last_date.weekday() >= busiest_weekday
         ) or n_weekdays == 0:
             n_weekdays += 1
         n_hours = delta.days
-        if self.dates[0].hour <= busiest_hour and self.dates[-1].hour >= busiest_hour:
+        if first_date.hour <= busiest_hour and last_date.hour >= busiest_hour:
             n_hours += 1
         ret = [
-            f"- **earliest message**: {from_now(self.dates[0])}",
-            f"- **latest message**: {from_now(self.dates[-1])}",
+            f"- **earliest message**: {from_now(first_date)}",
+            f"- **latest message**: {from_now(last_date)}",
             f"- **messages/day**: {precise(total_msg/delta.days, precision=3)}",
             f"- **busiest day of week**: {calendar.day_name[busiest_weekday]} (~{precise(week[busiest_weekday]/n_weekdays, precision=3)} msg, {percent(week[busiest_weekday]/total_msg)})",
             f"- **quietest day of week**: {calendar.day_name[quietest_weekday]} (~{precise(week[quietest_weekday]/n_weekdays, precision=3)} msg, {percent(week[quietest_weekday]/total_msg)})"
@@ -129,7 +190,7 @@ class Frequency:
             else "",
             f"- **busiest hour ever**: {from_now(self.busiest_hour)} ({self.busiest_hour_count} msg)",
             f"- **longest break**: {plural(round(self.longest_break.total_seconds()/3600), 'hour')} ({plural(self.longest_break.days,'day')}), started {from_now(self.longest_break_start)}",
-            f"- **avg. streak**: {precise(sum(self.streaks)/len(self.streaks), precision=3)} msg",
+            f"- **avg. streak**: {precise(self.streaks.mean(), precision=3)} msg",
             f"- **longest streak**: {self.longest_streak:,} msg, started {from_now(self.longest_streak_start)}"
             if member_specific
             else f"- **longest streak**: {mention(self.longest_streak_author)} ({self.longest_streak:,} msg, started {from_now(self.longest_streak_start)})",
@@ -20,6 +20,10 @@ class History:
     def __init__(self):
         self.messages = []
 
+    def merge(self, other: "History"):
+        # kept sorted by id so that ties on dates do not depend on merge order
+        self.messages = sorted(self.messages + other.messages, key=lambda m: m.id)
+
     async def to_string_image(
         self, *, type: str, spoiler: FilterLevel, gif_only: bool
     ) -> List[str]:
@@ -2,7 +2,15 @@ from typing import List, Optional
 from collections import defaultdict
 
 
-from utils import mention, channel_mention, plural, percent, top_key, val_sum
+from utils import (
+    mention,
+    channel_mention,
+    plural,
+    percent,
+    top_key,
+    val_sum,
+    merge_counts,
+)
 
 
 class Presence:
@@ -16,6 +24,17 @@ class Presence:
         self.mention_others = defaultdict(int)
         self.mention_count = defaultdict(int)
 
+    def merge(self, other: "Presence"):
+        for key, counts in other.__dict__.items():
+            merge_counts(getattr(self, key), counts)
+
+    def __getstate__(self) -> dict:
+        return {key: dict(counts) for key, counts in self.__dict__.items()}
+
+    def __setstate__(self, state: dict):
+        for key, counts in state.items():
+            setattr(self, key, defaultdict(int, counts))
+
     def to_string(
         self,
         msg_count: int,
@@ -31,7 +50,9 @@ class Presence:
             type = "channel's"
         else:
             type = "channels'"
+        # each top and total is computed once, in one pass over its dict
         top_member = top_key(self.messages)
+        message_sum = val_sum(self.messages)
         top_channel = top_key(self.channel_usage)
         channel_sum = val_sum(self.channel_usage)
         found_in = top_key(
@@ -43,14 +64,16 @@ class Presence:
         top_mention_others = top_key(self.mention_others)
         mention_others_sum = val_sum(self.mention_others)
         top_member_mentioned = top_key(self.mention_count)
+        mention_count_sum = val_sum(self.mention_count)
         total_reaction_used = val_sum(self.reactions)
         top_reaction = top_key(self.reactions)
         top_reaction_member = top_key(self.used_reaction)
+        used_reaction_sum = val_sum(self.used_reaction)
 
         ret = [
             f"- **messages**: {msg_count:,} ({percent(msg_count/total_msg)} of {type})"
             if member_specific
-            else f"- **top messages**:  {mention(top_member)} ({self.messages[top_member]:,} msg, {percent(self.messages[top_member]/val_sum(self.messages))})",
+            else f"- **top messages**:  {mention(top_member)} ({self.messages[top_member]:,} msg, {percent(self.messages[top_member]/message_sum)})",
             f"- **most visited channel**: {channel_mention(top_channel)} ({self.channel_usage[top_channel]:,} msg, {percent(self.channel_usage[top_channel]/channel_sum)})"
             if show_top_channel
             else "",
@@ -69,10 +92,10 @@ class Presence:
             f"- **mostly mentioned**: {mention(top_mention_others)} ({plural(self.mention_others[top_mention_others], 'time')}, {percent(self.mention_others[top_mention_others]/mention_others_sum)})"
             if len(self.mention_others) > 0 and member_specific
             else "",
-            f"- **mentioned**: {plural(mention_others_sum, 'time')} ({mention(top_member_mentioned)}, {percent(self.mention_count[top_member_mentioned]/val_sum(self.mention_count))})"
+            f"- **mentioned**: {plural(mention_others_sum, 'time')} ({mention(top_member_mentioned)}, {percent(self.mention_count[top_member_mentioned]/mention_count_sum)})"
             if len(self.mention_others) > 0 and not member_specific
             else "",
-            f"- **top mentions**: {mention(top_member_mentioned)} ({plural(self.mention_count[top_member_mentioned], 'time')}, {percent(self.mention_count[top_member_mentioned]/val_sum(self.mention_count))})"
+            f"- **top mentions**: {mention(top_member_mentioned)} ({plural(self.mention_count[top_member_mentioned], 'time')}, {percent(self.mention_count[top_member_mentioned]/mention_count_sum)})"
             if len(self.mention_others) > 0 and not member_specific
             else "",
             f"- **most mentioned**: {mention(top_mention_others)} ({plural(self.mention_others[top_mention_others], 'time')}, {percent(self.mention_others[top_mention_others]/mention_others_sum)})"
@@ -84,7 +107,7 @@ class Presence:
             f"- **reactions**: {plural(total_reaction_used, 'time')}"
             if len(self.reactions) > 0 and member_specific
             else "",
-            f"- **top reactions**: {mention(top_reaction_member)} ({plural(self.used_reaction[top_reaction_member], 'time')}, {percent(self.used_reaction[top_reaction_member]/val_sum(self.used_reaction))})"
+            f"- **top reactions**: {mention(top_reaction_member)} ({plural(self.used_reaction[top_reaction_member], 'time')}, {percent(self.used_reaction[top_reaction_member]/used_reaction_sum)})"
             if len(self.reactions) > 0 and not member_specific
             else "",
             f"- **most used reaction**: {top_reaction} ({plural(self.reactions[top_reaction], 'time')}, {percent(self.reactions[top_reaction]/total_reaction_used)})"
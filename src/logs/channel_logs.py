@@ -1,26 +1,46 @@
 import logging
-from typing import Union, Tuple, Any
+import os
+import numpy as np
+from typing import Union, Tuple, Any, AsyncIterator, Dict, List, Optional, Iterator
 import discord
 from datetime import datetime
 
 from . import MessageLog
-from utils import serialize, FakeMessage
+from .message_log import MessageRecord
+from .message_store import MessageStore
+from . import message_codec
+from .fetch_scheduler import FetchScheduler, FetchSlot, NORMAL, scheduler
+from .reaction_fetcher import ReactionFetcher
+from .text_index import TextIndex, TEXT_INDEX
+from utils import serialize, FakeMessage, from_timestamp, date_snowflake
+from dotenv import load_dotenv
+
+load_dotenv()
 
 CHUNK_SIZE = 2000
-FORMAT = 3
+FORMAT = 4
+# JSON messages, rewritten as binary blocks (message_codec.SCHEMA) on save
+MIGRATED_FORMATS = [3]
+
+# reaction users are only fetched when a scanner needs them
+LAZY_REACTIONS = bool(int(os.getenv("LAZY_REACTIONS", 1)))
+
+# stored reactions hydrated per fetch slot
+HYDRATE_CHUNK = 100
 
 
 class ChannelLogs:
     def __init__(self, channel: Union[discord.TextChannel, dict], guild: Any):
         self.guild = guild
+        self.store = MessageStore(self)
         if isinstance(channel, discord.TextChannel):
             self.id = channel.id
             self.name = channel.name
             self.last_message_id = None
             self.first_message_id = None
             self.format = FORMAT
-            self.messages = set()
             self.start_date = None
+            self.saved = False
         elif isinstance(channel, dict):
             self.format = channel["format"] if "format" in channel else None
             if not self.is_format():
@@ -38,35 +58,220 @@ class ChannelLogs:
                 and channel["first_message_id"] is not None
                 else None
             )
-            self.messages = {
-                MessageLog(message, self) for message in channel["messages"]
-            }
-            self.start_date = (
-                self.sorted_messages[0].created_at if len(self.messages) > 0 else None
-            )
+            for message in channel.get("messages", []):
+                self.store.append(MessageLog.record(message))
+            self.store.flush()
+            for block in message_codec.decode(channel.get("blocks", b"")):
+                self.store.extend(block)
+            self.start_date = self.first_date()
+            self.saved = True
+        self.new_ids = set()
+        # hydrated reactions changed saved messages (or older format)
+        self.rewrite = self.format != FORMAT
+        self.format = FORMAT
+        self.index = None
+        self.saved_ids = (self.first_message_id, self.last_message_id)
+
+    def __getstate__(self) -> dict:
+        # only the messages are needed to scan in another process
+        state = dict(self.__dict__)
+        state.pop("guild", None)
+        state.pop("channel", None)
+        return state
+
+    def scan_copy(self, *, reactions: bool, tokens: bool, index: bool) -> "ChannelLogs":
+        """
+        Shallow copy sent to a scan worker with only what the scanner reads
+        """
+        channel_logs = ChannelLogs.__new__(ChannelLogs)
+        channel_logs.__dict__.update(self.__dict__)
+        channel_logs.store = self.store.scan_copy(reactions=reactions, tokens=tokens)
+        channel_logs.store.channel = channel_logs
+        if not index:
+            channel_logs.index = None
+        return channel_logs
 
     def is_format(self):
-        return self.format == FORMAT
+        return self.format == FORMAT or self.format in MIGRATED_FORMATS
 
     def preload(self, channel: discord.TextChannel):
         self.name = channel.name
         self.channel = channel
 
     @property
-    def sorted_messages(self):
-        return sorted(self.messages)
+    def messages(self) -> MessageStore:
+        return self.store
+
+    @property
+    def nbytes(self) -> int:
+        return self.store.nbytes + (self.index.nbytes if self.index is not None else 0)
+
+    def first_date(self) -> Optional[datetime]:
+        timestamp = self.store.first_timestamp()
+        return from_timestamp(timestamp) if timestamp is not None else None
+
+    def last_date(self) -> Optional[datetime]:
+        timestamp = self.store.last_timestamp()
+        return from_timestamp(timestamp) if timestamp is not None else None
+
+    def range(
+        self,
+        start: Optional[datetime] = None,
+        stop: Optional[datetime] = None,
+        *,
+        after: Optional[int] = None,
+    ) -> Iterator[MessageLog]:
+        """
+        Messages created between start and stop (included), oldest first,
+        only the ones with an id greater than after if set
+        """
+        return self.store.range(*self.rows(start, stop, after=after))
+
+    def rows(
+        self,
+        start: Optional[datetime] = None,
+        stop: Optional[datetime] = None,
+        *,
+        after: Optional[int] = None,
+    ) -> Tuple[int, int]:
+        first, last = self.store.bounds(
+            date_snowflake(start) if start is not None else None,
+            date_snowflake(stop, high=True) if stop is not None else None,
+        )
+        if after is not None:
+            first = max(first, self.store.after(after))
+        return first, last
+
+    def update_index(self):
+        if not TEXT_INDEX:
+            return
+        if self.index is None:
+            self.index = TextIndex()
+        self.store.flush()
+        self.index.update(self.store.ids, self.store.contents, self.store.strings)
+
+    def search(self, query: str, *, regex: bool = False) -> Optional[np.ndarray]:
+        """
+        Sorted rows that may match the query (lowercased substring or regex),
+        None if all of them may
+        """
+        if not TEXT_INDEX:
+            return None
+        self.update_index()
+        return self.index.search_regex(query) if regex else self.index.search(query)
+
+    def tokenize(self):
+        self.store.tokenize(self.guild.vocabulary)
+
+    def add(self, record: MessageRecord):
+        if record.id not in self.store:
+            self.store.append(record)
+            if self.saved:
+                self.new_ids.add(record.id)
+
+    def known_reactions(self, id: int) -> Optional[Dict[str, List[int]]]:
+        row = self.store.row(id)
+        return self.store.reactions(row) if row is not None else None
+
+    async def add_page(
+        self, page: List[discord.Message], reactions: ReactionFetcher, slot: FetchSlot
+    ):
+        if LAZY_REACTIONS:
+            users = {}
+        else:
+            requests = reactions.requests
+            users = await reactions.fetch(page, self.known_reactions)
+            slot.add_requests(reactions.requests - requests, reactions.max_fetches)
+        slot.add(len(page))
+        for message in page:
+            self.add(MessageLog.record(message, users.get(message.id)))
+
+    def is_hydrated(
+        self, start: Optional[datetime] = None, stop: Optional[datetime] = None
+    ) -> bool:
+        return len(self.store.unhydrated(*self.rows(start, stop))) == 0
+
+    async def hydrate(
+        self,
+        start_date: Optional[datetime],
+        stop_date: Optional[datetime],
+        *,
+        fetcher: FetchScheduler = scheduler,
+        priority: int = NORMAL,
+        reactions: Optional[ReactionFetcher] = None,
+    ) -> AsyncIterator[int]:
+        """
+        Fetches the users of the stored reactions that only have a count,
+        yields the number of hydrated reactions
+        """
+        if reactions is None:
+            reactions = ReactionFetcher()
+        entries = self.store.unhydrated(*self.rows(start_date, stop_date))
+        # stored once at the end, each replacement copies the users column
+        users = {}
+        try:
+            for i in range(0, len(entries), HYDRATE_CHUNK):
+                chunk = entries[i : i + HYDRATE_CHUNK]
+                try:
+                    async with fetcher.slot(self.guild.id, priority) as slot:
+                        requests = reactions.requests
+                        await reactions.hydrate(self.channel, chunk, users)
+                        slot.add_requests(
+                            reactions.requests - requests, reactions.max_fetches
+                        )
+                finally:
+                    # new messages are saved with their reactions anyway
+                    self.rewrite = self.rewrite or any(
+                        id not in self.new_ids
+                        for id, entry, _, _ in chunk
+                        if entry in users
+                    )
+                yield len(users)
+        except discord.errors.HTTPException:
+            return  # keep the counts of the others (rate limited, server errors)
+        finally:
+            # with the users fetched before an error
+            self.store.hydrate(users)
+
+    def is_modified(self) -> bool:
+        return len(self.new_ids) > 0 or self.saved_ids != (
+            self.first_message_id,
+            self.last_message_id,
+        )
+
+    def mark_saved(self):
+        self.saved = True
+        self.rewrite = False
+        self.new_ids = set()
+        self.saved_ids = (self.first_message_id, self.last_message_id)
+
+    @property
+    def sorted_messages(self) -> List[MessageLog]:
+        return list(self.store)
 
     @property
     def nsfw(self):
         self.channel.nsfw
 
     async def load(
-        self, channel: discord.TextChannel, start_date: datetime, stop_date: datetime
+        self,
+        channel: discord.TextChannel,
+        start_date: datetime,
+        stop_date: datetime,
+        *,
+        fetcher: FetchScheduler = scheduler,
+        priority: int = NORMAL,
+        reactions: Optional[ReactionFetcher] = None,
     ) -> Tuple[int, int]:
+        if reactions is None:
+            reactions = ReactionFetcher()
         is_empty = self.last_message_id is None
         try:
             if is_empty:
-                sanity_check = len([message async for message in channel.history(limit=1)])
+                async with fetcher.slot(self.guild.id, priority):
+                    sanity_check = len(
+                        [message async for message in channel.history(limit=1)]
+                    )
                 if sanity_check < 1:
                     yield len(self.messages), True
                     return
@@ -90,25 +295,26 @@ class ChannelLogs:
                 ) and tmp_message_id != self.first_message_id:
                     tmp_message_id = self.first_message_id
                     done = 0
-                    async for message in channel.history(
-                        limit=CHUNK_SIZE,
-                        before=FakeMessage(self.first_message_id)
-                        if self.first_message_id is not None
-                        else None,
-                        oldest_first=False,
-                    ):
-                        done += 1
-                        self.first_message_id = message.id
-                        first_message_date = message.created_at
-                        m = MessageLog(message, self)
-                        await m.load(message)
-                        self.messages.add(m)
+                    async with fetcher.slot(self.guild.id, priority) as slot:
+                        page = []
+                        async for message in channel.history(
+                            limit=CHUNK_SIZE,
+                            before=FakeMessage(self.first_message_id)
+                            if self.first_message_id is not None
+                            else None,
+                            oldest_first=False,
+                        ):
+                            done += 1
+                            self.first_message_id = message.id
+                            first_message_date = message.created_at
+                            page += [message]
+                        await self.add_page(page, reactions, slot)
                     yield len(self.messages), False
                 if done < CHUNK_SIZE:  # reached bottom
                     self.first_message_id = None
                 self.last_message_id = channel.last_message_id
             # load forward
-            last_message_date = self.sorted_messages[-1].created_at
+            last_message_date = self.last_date()
             if not is_empty and (stop_date is None or last_message_date < stop_date):
                 tmp_message_id = None
                 while (
@@ -116,26 +322,45 @@ class ChannelLogs:
                     and (stop_date is None or last_message_date < stop_date)
                 ) and self.last_message_id != tmp_message_id:
                     tmp_message_id = self.last_message_id
-                    async for message in channel.history(
-                        limit=CHUNK_SIZE,
-                        after=FakeMessage(self.first_message_id),
-                        oldest_first=True,
-                    ):
-                        last_message_date = message.created_at
-                        self.last_message_id = message.id
-                        m = MessageLog(message, self)
-                        await m.load(message)
-                        self.messages.add(m)
+                    async with fetcher.slot(self.guild.id, priority) as slot:
+                        page = []
+                        async for message in channel.history(
+                            limit=CHUNK_SIZE,
+                            after=FakeMessage(self.first_message_id),
+                            oldest_first=True,
+                        ):
+                            last_message_date = message.created_at
+                            self.last_message_id = message.id
+                            page += [message]
+                        await self.add_page(page, reactions, slot)
                     yield len(self.messages), False
         except discord.errors.HTTPException as e:
             yield -1, True
             return  # When an exception occurs (like Forbidden)
-        self.start_date = (
-            self.sorted_messages[0].created_at if len(self.messages) > 0 else None
-        )
+        self.store.flush()
+        self.start_date = self.first_date()
         yield len(self.messages), True
 
-    def dict(self) -> dict:
-        channel = serialize(self, not_serialized=["channel", "guild", "start_date"])
-        channel["messages"] = [message.dict() for message in self.messages]
+    def dict(self, *, only_new: bool = False) -> dict:
+        channel = serialize(
+            self,
+            not_serialized=[
+                "channel",
+                "guild",
+                "start_date",
+                "store",
+                "saved",
+                "rewrite",
+                "index",
+                "new_ids",
+                "saved_ids",
+            ],
+        )
+        self.store.flush()
+        rows = (
+            np.flatnonzero(np.isin(self.store.ids, list(self.new_ids)))
+            if only_new
+            else np.arange(len(self.store.ids))
+        )
+        channel["blocks"] = message_codec.encode(self.store, rows)
         return channel
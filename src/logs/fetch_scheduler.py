@@ -0,0 +1,183 @@
+from typing import Dict, List, Optional, Tuple
+import os
+import math
+import heapq
+import time
+import logging
+import asyncio
+import discord
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# history requests running at the same time (all guilds)
+MAX_FETCHES = int(os.getenv("MAX_FETCHES", 8))
+
+# seconds per history page (100 messages) above which fetches are slowed down
+FETCH_LATENCY = float(os.getenv("FETCH_LATENCY", 2.0))
+
+# seconds to wait after a rate limit without a retry delay
+RATE_LIMIT_DELAY = float(os.getenv("RATE_LIMIT_DELAY", 5.0))
+
+PAGE_SIZE = 100
+
+# warning logged by discord.py before sleeping on a 429 response and retrying
+RETRY_LOG = (
+    "We are being rate limited. %s %s responded with 429. Retrying in %.2f seconds."
+)
+
+# fetch priorities, lowest first
+HIGH = 0
+NORMAL = 1
+
+
+class FetchSlot:
+    """
+    Holds one of the scheduler's slots while fetching a chunk of history
+    """
+
+    def __init__(self, scheduler: "FetchScheduler", guild_id: int, priority: int):
+        self.scheduler = scheduler
+        self.guild_id = guild_id
+        self.priority = priority
+        self.count = 0
+        self.requests = 0.0
+        self.t0 = 0
+
+    def add(self, count: int = 1):
+        self.count += count
+
+    def add_requests(self, requests: int, parallel: int = 1):
+        # other API calls made while holding the slot
+        self.requests += requests / parallel
+
+    async def __aenter__(self) -> "FetchSlot":
+        await self.scheduler.acquire(self.guild_id, self.priority)
+        self.t0 = time.monotonic()
+        return self
+
+    async def __aexit__(self, type, value, tb):
+        elapsed = time.monotonic() - self.t0
+        if isinstance(value, discord.RateLimited):
+            self.scheduler.release(rate_limit=value.retry_after)
+        elif isinstance(value, discord.HTTPException) and value.status == 429:
+            self.scheduler.release(rate_limit=RATE_LIMIT_DELAY)
+        elif value is None:
+            pages = math.ceil(self.count / PAGE_SIZE) + self.requests
+            self.scheduler.release(latency=elapsed / max(1, pages))
+        else:
+            self.scheduler.release()
+
+
+class FetchScheduler:
+    """
+    Limits concurrent history fetches, serves waiting channels by priority
+    then round-robin across guilds, and adapts the limit to rate limits
+    and latency (additive increase, multiplicative decrease)
+    """
+
+    def __init__(
+        self,
+        max_fetches: int = MAX_FETCHES,
+        *,
+        target_latency: float = FETCH_LATENCY,
+    ):
+        self.max_fetches = max(1, max_fetches)
+        self.target_latency = target_latency
+        self.limit = float(self.max_fetches)
+        self.active = 0
+        self.resume_at = 0.0
+        self.resume_handle = None
+        # guild id -> heap of (priority, seq, future)
+        self.waiting: Dict[int, List[Tuple[int, int, asyncio.Future]]] = {}
+        # guild id -> tick of its last grant
+        self.served: Dict[int, int] = {}
+        self.ticks = 0
+        self.rate_limits = 0
+
+    def slot(self, guild_id: int, priority: int = NORMAL) -> FetchSlot:
+        return FetchSlot(self, guild_id, priority)
+
+    async def acquire(self, guild_id: int, priority: int = NORMAL):
+        future = asyncio.get_event_loop().create_future()
+        if guild_id not in self.waiting:
+            self.waiting[guild_id] = []
+        heapq.heappush(self.waiting[guild_id], (priority, self.ticks, future))
+        self.ticks += 1
+        self.dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # granted while being cancelled
+                self.release()
+            raise
+
+    def release(
+        self, *, latency: Optional[float] = None, rate_limit: Optional[float] = None
+    ):
+        self.active -= 1
+        if rate_limit is not None:
+            self.rate_limited(rate_limit)
+        elif latency is not None:
+            if latency > self.target_latency:
+                self.limit = max(1.0, self.limit * 0.75)
+            else:
+                self.limit = min(float(self.max_fetches), self.limit + 1 / self.limit)
+        self.dispatch()
+
+    def rate_limited(self, delay: float):
+        self.rate_limits += 1
+        if time.monotonic() >= self.resume_at:
+            # the other fetches of the same burst do not decrease it again
+            self.limit = max(1.0, self.limit / 2)
+        self.resume_at = max(self.resume_at, time.monotonic() + delay)
+        logging.warning(
+            f"fetch > rate limited, limit {self.limit:.1f}, pause {delay:.1f}s"
+        )
+
+    def dispatch(self):
+        wait = self.resume_at - time.monotonic()
+        if wait > 0:
+            if self.resume_handle is None and len(self.waiting) > 0:
+                self.resume_handle = asyncio.get_event_loop().call_later(
+                    wait, self.resume
+                )
+            return
+        while self.active < int(self.limit) and len(self.waiting) > 0:
+            guild_id = min(
+                self.waiting,
+                key=lambda id: (self.waiting[id][0][0], self.served.get(id, -1)),
+            )
+            _, _, future = heapq.heappop(self.waiting[guild_id])
+            if len(self.waiting[guild_id]) == 0:
+                del self.waiting[guild_id]
+            if future.done():
+                continue  # cancelled while waiting
+            self.served[guild_id] = self.ticks
+            self.ticks += 1
+            self.active += 1
+            future.set_result(None)
+
+    def resume(self):
+        self.resume_handle = None
+        self.dispatch()
+
+
+class RateLimitHandler(logging.Handler):
+    """
+    discord.py sleeps on 429 responses and retries them itself, its warnings
+    are the only trace of the rate limits hit while fetching (GET requests)
+    """
+
+    def __init__(self, scheduler: FetchScheduler):
+        super().__init__(logging.WARNING)
+        self.scheduler = scheduler
+
+    def emit(self, record: logging.LogRecord):
+        if record.msg == RETRY_LOG and record.args[0] == "GET":
+            self.scheduler.rate_limited(float(record.args[2]))
+
+
+scheduler = FetchScheduler()
+logging.getLogger("discord.http").addHandler(RateLimitHandler(scheduler))
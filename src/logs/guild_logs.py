@@ -1,18 +1,22 @@
-from typing import List, Tuple
+from typing import Any, AsyncIterator, Callable, List, Optional, Tuple
 import os
 import discord
 import json
-import gzip
 from datetime import datetime
 import time
 import logging
 import asyncio
 import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
-from cryptography.fernet import Fernet
 
-from . import ChannelLogs
-from utils import code_message, delta, deltas
+from . import ChannelLogs, log_cache
+from .log_file import LogReader, LogWriter, get_fernet, encode_frame, decode_frame, APPEND
+from .fetch_scheduler import HIGH, NORMAL
+from .reaction_fetcher import ReactionFetcher
+from .text_index import TextIndex, TEXT_INDEX
+from utils import code_message, delta, deltas, tokenizer
 
 current_analysis = []
 current_analysis_lock = threading.Lock()
@@ -25,14 +29,60 @@ load_dotenv()
 
 LOG_DIR = os.getenv("LOG_DIR", "logs")
 LOG_EXT = os.getenv("LOG_EXT", ".logz")
+INDEX_EXT = ".idx"
 CRYPT_KEY = os.getenv("CRYPT_KEY", "")
 
+fernet = get_fernet(CRYPT_KEY)
+
 # 5 minutes, assume 'fast' arg
 MIN_MODIFICATION_TIME = int(os.getenv("MAX_MODIFICATION_TIME", 5 * 60))
 
 # 90 days, remove log file
 MAX_MODIFICATION_TIME = int(os.getenv("MAX_MODIFICATION_TIME", 90 * 24 * 60 * 60))
 
+# compact appended messages into base frames past this size ratio
+COMPACTION_RATIO = float(os.getenv("COMPACTION_RATIO", 0.5))
+
+# threads reading (decrypt, decompress, decode) and saving logs, shared by
+# all guilds so that big files do not block the event loop
+IO_WORKERS = int(os.getenv("IO_WORKERS", 2))
+
+io_executor = None
+
+# one writer at a time per log file (saves and background compactions)
+file_locks = {}
+file_locks_lock = threading.Lock()
+
+
+def get_io_executor() -> ThreadPoolExecutor:
+    global io_executor
+    if io_executor is None:
+        io_executor = ThreadPoolExecutor(IO_WORKERS, thread_name_prefix="logs")
+    return io_executor
+
+
+async def run_io(function: Callable, *args: Any) -> Any:
+    return await asyncio.get_event_loop().run_in_executor(
+        get_io_executor(), function, *args
+    )
+
+
+def file_lock(path: str) -> threading.Lock:
+    with file_locks_lock:
+        if path not in file_locks:
+            file_locks[path] = threading.Lock()
+        return file_locks[path]
+
+
+@asynccontextmanager
+async def open_log(path: str) -> AsyncIterator[LogReader]:
+    reader = await run_io(LogReader(path, fernet).__enter__)
+    try:
+        yield reader
+    finally:
+        reader.__exit__(None, None, None)
+
+
 class Worker:
     def __init__(
         self,
@@ -40,6 +90,8 @@ class Worker:
         channel: discord.TextChannel,
         start_date: datetime,
         stop_date: datetime,
+        priority: int = NORMAL,
+        hydrate: bool = False,
     ):
         self.channel_log = channel_log
         self.channel = channel
@@ -51,20 +103,40 @@ class Worker:
         self.loop = asyncio.get_event_loop()
         self.start_date = start_date
         self.stop_date = stop_date
+        self.priority = priority
+        self.hydrate = hydrate
+        self.hydrated = 0
+        self.reactions = ReactionFetcher()
 
     def start(self):
         asyncio.run_coroutine_threadsafe(self.process(), self.loop)
 
     async def process(self):
         async for count, done in self.channel_log.load(
-            self.channel, self.start_date, self.stop_date
+            self.channel,
+            self.start_date,
+            self.stop_date,
+            priority=self.priority,
+            reactions=self.reactions,
         ):
             if count > 0:
                 self.queried_msg = count - self.start_msg
                 self.total_msg = count
-            self.done = done
             if self.cancelled:
                 return
+            if done:
+                break
+        if self.hydrate:
+            async for count in self.channel_log.hydrate(
+                self.start_date,
+                self.stop_date,
+                priority=self.priority,
+                reactions=self.reactions,
+            ):
+                self.hydrated = count
+                if self.cancelled:
+                    return
+        self.done = True
 
 
 class GuildLogs:
@@ -72,13 +144,25 @@ class GuildLogs:
         self.id = guild.id
         self.guild = guild
         self.log_file = os.path.join(LOG_DIR, f"{guild.id}{LOG_EXT}")
+        self.index_file = os.path.join(LOG_DIR, f"{guild.id}{INDEX_EXT}")
         self.channels = {}
+        self.vocabulary = tokenizer.Vocabulary()
+        self.full_write = True
+        self.log_end = 0
+        self.base_size = 0
+        self.delta_size = 0
         self.locked = False
+        # log file version and channels the loaded state matches, for the cache
+        self.version = None
+        self.file_ids = []
+        self.cacheable = False
 
     def __enter__(self):
         return self
 
     def __exit__(self, type, value, tb):
+        if self.cacheable and type is None:
+            log_cache.checkin(self.id, self.cached())
         del self.channels
         del self.guild
         if self.locked:
@@ -87,6 +171,31 @@ class GuildLogs:
     def dict(self) -> dict:
         return {id: self.channels[id].dict() for id in self.channels}
 
+    def cached(self) -> log_cache.CachedLogs:
+        return log_cache.CachedLogs(
+            self.version,
+            self.channels,
+            self.file_ids,
+            self.vocabulary,
+            self.full_write,
+            self.log_end,
+            self.base_size,
+            self.delta_size,
+            sum(channel.nbytes for channel in self.channels.values()),
+        )
+
+    def restore(self, cached: log_cache.CachedLogs):
+        self.version = cached.version
+        self.channels = cached.channels
+        self.file_ids = cached.file_ids
+        self.vocabulary = cached.vocabulary
+        self.full_write = cached.full_write
+        self.log_end = cached.log_end
+        self.base_size = cached.base_size
+        self.delta_size = cached.delta_size
+        for channel in self.channels.values():
+            channel.guild = self
+
     def check_cancelled(self) -> bool:
         return self.locked and self.log_file not in current_analysis
 
@@ -117,6 +226,7 @@ class GuildLogs:
         *,
         fast: bool,
         fresh: bool,
+        hydrate: bool = False,
     ) -> Tuple[int, int]:
         self.locked = False
         if not fast and not self.lock():
@@ -128,59 +238,107 @@ class GuildLogs:
         last_time = None
         if not os.path.exists(self.log_file):
             return NO_FILE, 0
-        channels = {}
+        # channels named by the command are fetched before whole guild loads
+        priority = (
+            HIGH
+            if 0 < len(target_channels) < len(self.guild.text_channels)
+            else NORMAL
+        )
+        if len(target_channels) == 0:
+            target_ids = None if fast else [channel.id for channel in self.guild.text_channels]
+        else:
+            target_ids = [channel.id for channel in target_channels]
         try:
             last_time = os.path.getmtime(self.log_file)
-            encrypted_data = None
-            await code_message(progress, "Reading saved history (1/5)...")
-            t0 = datetime.now()
-            with open(self.log_file, mode="rb") as f:
-                encrypted_data = f.read()
-            logging.info(f"log {self.guild.id} > read in {delta(t0):,}ms")
-            if self.check_cancelled():
-                return CANCELLED, 0
-            await code_message(progress, "Reading saved history (2/5)...")
-            if CRYPT_KEY == "" or CRYPT_KEY is None:
-                gziped_data = encrypted_data
-            try:
-                t0 = datetime.now()
-                fernet = Fernet(CRYPT_KEY)
-                gziped_data = fernet.decrypt(encrypted_data)
-                logging.info(f"log {self.guild.id} > decrypted in {delta(t0):,}ms")
-            except:
-                gziped_data = encrypted_data
-            if self.check_cancelled():
-                return CANCELLED, 0                
-            await code_message(progress, "Reading saved history (3/5)...")
-            t0 = datetime.now()
-            json_data = gzip.decompress(gziped_data)
-            del gziped_data
-            logging.info(f"log {self.guild.id} > gzip decompress in {delta(t0):,}ms")
-            if self.check_cancelled():
-                return CANCELLED, 0
-            await code_message(progress, "Reading saved history (4/5)...")
+            await code_message(progress, "Reading saved history (1/2)...")
             t0 = datetime.now()
-            channels = json.loads(json_data)
-            del json_data
-            logging.info(f"log {self.guild.id} > json parse in {delta(t0):,}ms")
-            if self.check_cancelled():
-                return CANCELLED, 0
-            await code_message(progress, "Reading saved history (5/5)...")
-            t0 = datetime.now()
-            self.channels = {
-                int(id): ChannelLogs(channels[id], self) for id in channels
-            }
-            # remove invalid format
-            self.channels = {
-                id: self.channels[id]
-                for id in self.channels
-                if self.channels[id].is_format()
-            }
-            logging.info(f"log {self.guild.id} > loaded in {delta(t0):,}ms")
+            cached = log_cache.checkout(self.id, self.log_file)
+            if cached is not None:
+                self.restore(cached)
+                logging.info(
+                    f"log {self.guild.id} > cached ({len(self.channels):,} channels)"
+                )
+            else:
+                self.version = log_cache.file_version(self.log_file)
+            # saved channels needed by the command and not cached
+            missing = [
+                id
+                for id in self.file_ids
+                if id not in self.channels and (target_ids is None or id in target_ids)
+            ]
+            if cached is None or len(missing) > 0:
+                async with open_log(self.log_file) as reader:
+                    # monolithic files are converted on save
+                    self.full_write = reader.legacy
+                    if reader.legacy:
+                        channels = await run_io(reader.read_legacy)
+                        logging.info(f"log {self.guild.id} > legacy read in {delta(t0):,}ms")
+                        channels = {int(id): channels[id] for id in channels}
+                        self.file_ids = list(channels)
+                    else:
+                        self.log_end = reader.end()
+                        self.base_size = reader.base_size
+                        self.delta_size = reader.delta_size
+                        channels = None
+                        self.file_ids = reader.channels()
+                        logging.info(
+                            f"log {self.guild.id} > index read in {delta(t0):,}ms ({len(reader.channels()):,} channels)"
+                        )
+                    if self.check_cancelled():
+                        return CANCELLED, 0
+                    await code_message(progress, "Reading saved history (2/2)...")
+                    t0 = datetime.now()
+                    # monolithic files are read whole anyway
+                    ids = [
+                        id
+                        for id in self.file_ids
+                        if id not in self.channels
+                        and (
+                            channels is not None or target_ids is None or id in target_ids
+                        )
+                    ]
+                    for id in ids:
+                        channel_logs = await run_io(
+                            self.read_channel,
+                            reader,
+                            id,
+                            channels[id] if channels is not None else None,
+                        )
+                        # remove invalid format
+                        if channel_logs.is_format():
+                            self.channels[id] = channel_logs
+                        else:
+                            self.file_ids.remove(id)
+                        if self.check_cancelled():
+                            return CANCELLED, 0
+                    del channels
+                logging.info(
+                    f"log {self.guild.id} > loaded {len(self.channels):,} channels in {delta(t0):,}ms"
+                )
+                await run_io(self.read_index)
         except json.decoder.JSONDecodeError:
             logging.error(f"log {self.guild.id} > invalid JSON")
+            self.version = None
         except IOError:
             logging.error(f"log {self.guild.id} > cannot read")
+            self.version = None
+
+        # reactions are only hydrated by a normal load
+        if (
+            fast
+            and hydrate
+            and any(
+                not self.channels[id].is_hydrated(start_date, stop_date)
+                for id in (
+                    [channel.id for channel in target_channels]
+                    if len(target_channels) > 0
+                    else self.channels
+                )
+                if id in self.channels
+            )
+        ):
+            logging.info(f"log {self.guild.id} > reactions not hydrated, not fast")
+            fast = False
 
         if len(target_channels) == 0:
             target_channels = (
@@ -210,6 +368,7 @@ class GuildLogs:
                 for channel in target_channels
                 if channel.id not in self.channels
                 or self.channels[channel.id].first_message_id is not None
+                or (hydrate and not self.channels[channel.id].is_hydrated())
             ]
             if len(invalid_target_channels) == 0:
                 logging.info(f"log {self.guild.id} > assumed fast")
@@ -219,6 +378,7 @@ class GuildLogs:
 
         total_msg = 0
         total_chan = 0
+        compact = False
         if fast:
             target_channels_id = [channel.id for channel in target_channels]
             total_msg = sum(
@@ -249,7 +409,14 @@ class GuildLogs:
                     self.channels[channel.id] = ChannelLogs(channel, self)
                 self.channels[channel.id].preload(channel)
                 workers += [
-                    Worker(self.channels[channel.id], channel, start_date, stop_date)
+                    Worker(
+                        self.channels[channel.id],
+                        channel,
+                        start_date,
+                        stop_date,
+                        priority,
+                        hydrate,
+                    )
                 ]
             warning_msg = "(this might take a while)"
             if len(target_channels) > 5 and loading_new > 5:
@@ -277,14 +444,18 @@ class GuildLogs:
                 total_chan = max_chan - len(remaining)
                 queried_msg = sum([worker.queried_msg for worker in workers])
                 total_msg = sum([worker.total_msg for worker in workers])
+                hydrated = sum([worker.hydrated for worker in workers])
 
                 if total_chan == max_chan:
                     done = True
 
                 remaining_msg = ""
 
+                if hydrated > 0:
+                    remaining_msg += f"\n{hydrated:,} reactions"
+
                 if len(remaining) <= 5:
-                    remaining_msg = "\nRemaining: " + ", ".join(remaining)
+                    remaining_msg += "\nRemaining: " + ", ".join(remaining)
 
                 await code_message(
                     progress,
@@ -293,6 +464,13 @@ class GuildLogs:
             logging.info(
                 f"log {self.guild.id} > queried {queried_msg} in {delta(t0):,}ms -> {queried_msg / deltas(t0):,.3f} m/s"
             )
+            fetched = sum(worker.reactions.fetched for worker in workers)
+            reused = sum(worker.reactions.reused for worker in workers)
+            elapsed = sum(worker.reactions.elapsed for worker in workers)
+            if fetched > 0:
+                logging.info(
+                    f"log {self.guild.id} > fetched {fetched:,} reactions ({reused:,} unchanged) -> {fetched / elapsed:,.3f} r/s"
+                )
             # write logs
             real_total_msg = sum(
                 [len(channel.messages) for channel in self.channels.values()]
@@ -302,54 +480,39 @@ class GuildLogs:
                 return CANCELLED, 0
             await code_message(
                 progress,
-                f"Saving history (1/4)...\n{real_total_msg:,} messages in {real_total_chan:,} channels",
+                f"Saving history (1/2)...\n{real_total_msg:,} messages in {real_total_chan:,} channels",
             )
             t0 = datetime.now()
-            json_data = bytes(json.dumps(self.dict()), "utf-8")
-            logging.info(
-                f"log {self.guild.id} > json dump in {delta(t0):,}ms -> {real_total_msg / deltas(t0):,.3f} m/s"
-            )
-            if self.check_cancelled():
-                return CANCELLED, 0
-            await code_message(
-                progress,
-                f"Saving history (2/4)...\n{real_total_msg:,} messages in {real_total_chan:,} channels",
-            )
-            t0 = datetime.now()
-            gziped_data = gzip.compress(json_data)
-            del json_data
+            writer = LogWriter(self.log_file, fernet)
+            new_msg = 0
+            for id, channel in self.channels.items():
+                if self.full_write or not channel.saved or channel.rewrite:
+                    await run_io(self.write_channel, writer, channel, False)
+                    new_msg += len(channel.messages)
+                elif channel.is_modified():
+                    await run_io(self.write_channel, writer, channel, True)
+                    new_msg += len(channel.new_ids)
+                if self.check_cancelled():
+                    return CANCELLED, 0
             logging.info(
-                f"log {self.guild.id} > gzip in {delta(t0):,}ms -> {real_total_msg / deltas(t0):,.3f} m/s"
+                f"log {self.guild.id} > encoded {new_msg:,} messages in {delta(t0):,}ms -> {new_msg / deltas(t0):,.3f} m/s"
             )
             if self.check_cancelled():
                 return CANCELLED, 0
             await code_message(
                 progress,
-                f"Saving history (3/4)...\n{real_total_msg:,} messages in {real_total_chan:,} channels",
-            )
-            if CRYPT_KEY == "" or CRYPT_KEY is None:
-                encrypted_data = gziped_data
-            try:
-                t0 = datetime.now()
-                fernet = Fernet(CRYPT_KEY)
-                encrypted_data = fernet.encrypt(gziped_data)
-                logging.info(f"log {self.guild.id} > encrypted in {delta(t0):,}ms ->  {len(gziped_data) / deltas(t0):,.3f} b/s")
-            except:
-                encrypted_data = gziped_data
-            if self.check_cancelled():
-                return CANCELLED, 0
-            await code_message(
-                progress,
-                f"Saving history (4/4)...\n{real_total_msg:,} messages in {real_total_chan:,} channels",
+                f"Saving history (2/2)...\n{real_total_msg:,} messages in {real_total_chan:,} channels",
             )
             t0 = datetime.now()
-            with open(self.log_file, mode="wb") as f:
-                f.write(encrypted_data)
-            del gziped_data
-            del encrypted_data
+            await run_io(self.write_log, writer)
+            compact = self.delta_size > self.base_size * COMPACTION_RATIO
+            for channel in self.channels.values():
+                channel.mark_saved()
             logging.info(
-                f"log {self.guild.id} > saved in {delta(t0):,}ms -> {real_total_msg / deltas(t0):,.3f} m/s"
+                f"log {self.guild.id} > saved in {delta(t0):,}ms -> {writer.size() / deltas(t0):,.3f} b/s"
             )
+            del writer
+            await run_io(self.write_index)
         if self.check_cancelled():
             return CANCELLED, 0
         await code_message(
@@ -357,12 +520,130 @@ class GuildLogs:
             f"Analysing...\n{total_msg:,} messages in {total_chan:,} channels",
         )
         logging.info(f"log {self.guild.id} > TOTAL TIME: {delta(t00):,}ms")
-        if self.locked:
-            current_analysis_lock.acquire()
-            current_analysis.remove(self.log_file)
-            current_analysis_lock.release()
+        self.unlock()
+        self.cacheable = self.version is not None
+        if compact:
+            threading.Thread(
+                target=GuildLogs.compact, args=(self.log_file, self.id)
+            ).start()
         return total_msg, total_chan
 
+    def read_channel(
+        self, reader: LogReader, id: int, channel: Optional[dict]
+    ) -> ChannelLogs:
+        # runs in the io executor
+        return ChannelLogs(channel if channel is not None else reader.read(id), self)
+
+    def write_channel(self, writer: LogWriter, channel: ChannelLogs, only_new: bool):
+        # runs in the io executor
+        if only_new:
+            writer.add(channel.id, channel.dict(only_new=True), APPEND)
+        else:
+            writer.add(channel.id, channel.dict())
+
+    def write_log(self, writer: LogWriter):
+        # runs in the io executor
+        with file_lock(self.log_file):
+            if self.full_write:
+                writer.write()
+                self.base_size = writer.size()
+                self.delta_size = 0
+            else:
+                if log_cache.file_version(self.log_file) != self.version:
+                    # compacted or appended to since it was read, the deltas go
+                    # after its current end and the loaded state is not cached
+                    logging.info(f"log {self.id} > changed since read")
+                    with LogReader(self.log_file, fernet) as reader:
+                        self.log_end = reader.end()
+                        self.base_size = reader.base_size
+                        self.delta_size = reader.delta_size
+                        self.file_ids = list(
+                            set(self.file_ids) | set(reader.channels())
+                        )
+                    self.version = None
+                writer.append(self.log_end)
+                self.delta_size += os.path.getsize(self.log_file) - self.log_end
+            # the saved state is kept for the next commands
+            self.full_write = False
+            self.log_end = os.path.getsize(self.log_file)
+            self.file_ids = list(set(self.file_ids) | set(self.channels))
+            if self.version is not None:
+                self.version = log_cache.file_version(self.log_file)
+
+    def read_index(self):
+        # index segments are only a cache, they are rebuilt when missing or stale
+        if not TEXT_INDEX or not os.path.exists(self.index_file):
+            return
+        t0 = datetime.now()
+        try:
+            with LogReader(self.index_file, fernet) as reader:
+                for id in reader.channels():
+                    # cached channels keep their (newer) index
+                    if id in self.channels and self.channels[id].index is None:
+                        self.channels[id].index = TextIndex.load(
+                            decode_frame(reader.read_raw(id), fernet)
+                        )
+            logging.info(f"log {self.guild.id} > index read in {delta(t0):,}ms")
+        except Exception:
+            logging.warning(f"log {self.guild.id} > invalid index")
+            for channel in self.channels.values():
+                channel.index = None
+
+    def write_index(self):
+        if not TEXT_INDEX or not any(
+            channel.index is not None and channel.index.modified
+            for channel in self.channels.values()
+        ):
+            return
+        t0 = datetime.now()
+        writer = LogWriter(self.index_file, fernet)
+        try:
+            # keep the segments of the channels that were not loaded
+            if os.path.exists(self.index_file):
+                with LogReader(self.index_file, fernet) as reader:
+                    for id in reader.channels():
+                        if id not in self.channels or self.channels[id].index is None:
+                            writer.add_raw(id, reader.read_raw(id))
+        except Exception:
+            logging.warning(f"log {self.guild.id} > invalid index")
+        for id, channel in self.channels.items():
+            if channel.index is not None:
+                writer.add_raw(id, encode_frame(channel.index.dump(), fernet))
+                channel.index.modified = False
+        try:
+            writer.write()
+            logging.info(
+                f"log {self.guild.id} > index saved in {delta(t0):,}ms -> {writer.size():,} b"
+            )
+        except IOError:
+            logging.error(f"log {self.guild.id} > cannot save index")
+
+    @staticmethod
+    def compact(log_file: str, guild_id: int):
+        # commands keep running meanwhile, only their saves wait for it
+        lock = file_lock(log_file)
+        if not lock.acquire(blocking=False):
+            return
+        try:
+            t0 = datetime.now()
+            writer = LogWriter(log_file, fernet)
+            with LogReader(log_file, fernet) as reader:
+                if reader.legacy:
+                    return
+                for id in reader.channels():
+                    if id in reader.deltas:
+                        writer.add(id, reader.read(id))
+                    else:
+                        writer.add_raw(id, reader.read_raw(id))
+            writer.write()
+            logging.info(
+                f"log {guild_id} > compacted in {delta(t0):,}ms -> {writer.size():,} b"
+            )
+        except IOError:
+            logging.error(f"log {guild_id} > cannot compact")
+        finally:
+            lock.release()
+
     @staticmethod
     async def cancel(client: discord.client, message: discord.Message, *args: str):
         logs = GuildLogs(message.guild)
@@ -383,8 +664,7 @@ class GuildLogs:
             os.mkdir(LOG_DIR)
         filename = os.path.join(LOG_DIR, f"{guild.id}{LOG_EXT}")
         if not os.path.exists(filename):
-            with open(filename, mode="wb") as f:
-                f.write(gzip.compress(bytes("{}", "utf-8")))
+            LogWriter(filename, fernet).write()
             logging.info(f"log {guild.id} > created")
         else:
             logging.info(f"log {guild.id} > already exists")
@@ -394,14 +674,26 @@ class GuildLogs:
         if not os.path.exists(LOG_DIR):
             os.mkdir(LOG_DIR)
         filename = os.path.join(LOG_DIR, f"{guild.id}{LOG_EXT}")
-        if os.path.exists(filename):
-            os.unlink(filename)
-            logging.info(f"log {guild.id} > removed")
-        else:
-            logging.info(f"log {guild.id} > does not exists")
+        index_file = os.path.join(LOG_DIR, f"{guild.id}{INDEX_EXT}")
+        # imported here, command_cache needs the scanners which need the logs
+        from utils import command_cache
+
+        log_cache.forget(guild.id)
+        command_cache.forget_guild(guild.id)
+        if os.path.exists(index_file):
+            os.unlink(index_file)
+        # a running compaction would write the file back
+        with file_lock(filename):
+            if os.path.exists(filename):
+                os.unlink(filename)
+                logging.info(f"log {guild.id} > removed")
+            else:
+                logging.info(f"log {guild.id} > does not exists")
 
     @staticmethod
     def check_logs(guilds: List[discord.Guild]):
+        from utils import command_cache
+
         logging.info(f"checking logs...")
         if not os.path.exists(LOG_DIR):
             os.mkdir(LOG_DIR)
@@ -419,3 +711,18 @@ class GuildLogs:
                 elif name not in guild_ids:
                     logging.info(f"> removing unused log '{path}'")
                     os.unlink(path)
+                else:
+                    continue
+                if name.isdigit():
+                    log_cache.forget(int(name))
+                    command_cache.forget_guild(int(name))
+        for item in os.listdir(LOG_DIR):
+            path = os.path.join(LOG_DIR, item)
+            name, ext = os.path.splitext(item)
+            if (
+                os.path.isfile(path)
+                and ext == INDEX_EXT
+                and not os.path.exists(os.path.join(LOG_DIR, f"{name}{LOG_EXT}"))
+            ):
+                logging.info(f"> removing unused index '{path}'")
+                os.unlink(path)
@@ -0,0 +1,67 @@
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from collections import OrderedDict
+import os
+import logging
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# memory budget of the decoded logs kept between commands, 0 to disable
+LOG_CACHE_MB = float(os.getenv("LOG_CACHE_MB", 512))
+
+
+class CachedLogs(NamedTuple):
+    version: Tuple[int, int]  # log file (mtime ns, size) the channels match
+    channels: Dict[int, Any]
+    file_ids: List[int]  # channels saved in the log file, loaded or not
+    vocabulary: Any
+    full_write: bool
+    log_end: int
+    base_size: int
+    delta_size: int
+    nbytes: int
+
+
+# guild id -> CachedLogs, least recently used first
+# entries are checked out by one command at a time, a concurrent command
+# on the same guild reads the file instead of sharing the channels
+entries = OrderedDict()
+stats = {"hits": 0, "misses": 0, "stale": 0, "evictions": 0}
+
+
+def file_version(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def checkout(guild_id: int, path: str) -> Optional[CachedLogs]:
+    entry = entries.pop(guild_id, None)
+    if entry is not None and entry.version != file_version(path):
+        # written since (another command, compaction, removal)
+        stats["stale"] += 1
+        entry = None
+    stats["hits" if entry is not None else "misses"] += 1
+    return entry
+
+
+def checkin(guild_id: int, entry: CachedLogs):
+    budget = LOG_CACHE_MB * 1024 * 1024
+    if entry.nbytes > budget:
+        return
+    entries[guild_id] = entry
+    entries.move_to_end(guild_id)
+    total = sum(entry.nbytes for entry in entries.values())
+    while total > budget:
+        _, evicted = entries.popitem(last=False)
+        total -= evicted.nbytes
+        stats["evictions"] += 1
+    logging.info(
+        f"log cache > {len(entries):,} guilds, {total / 1024 / 1024:,.1f}MB ({', '.join(f'{stats[key]:,} {key}' for key in stats)})"
+    )
+
+
+def forget(guild_id: int):
+    entries.pop(guild_id, None)
@@ -0,0 +1,211 @@
+from typing import Iterator, List, Optional, Tuple
+import os
+import json
+import gzip
+import struct
+from cryptography.fernet import Fernet, InvalidToken
+
+# Chunked log file layout:
+# HEADER | index size | index frame | channel frame | channel frame | ...
+# Every frame is gzipped and encrypted on its own, the index maps each
+# channel id to the offset (after the index) and size of its frame.
+# New messages are appended after the base frames as delta records:
+# ... | kind | channel id | frame size | frame | kind | ...
+# until a compaction merges them back into the base frames.
+# A channel frame is either its JSON or, with binary message blocks:
+# BLOCKS_MAGIC | JSON size | JSON (without blocks) | blocks
+
+HEADER = b"DALZ"
+FILE_VERSION = 1
+HEADER_STRUCT = struct.Struct(">4sBQ")
+DELTA_STRUCT = struct.Struct(">BQI")
+BLOCKS_MAGIC = b"DALB"
+BLOCKS_STRUCT = struct.Struct(">4sI")
+
+# delta record kinds
+FULL = 0  # replaces the whole channel
+APPEND = 1  # adds messages and updates the channel metadata
+
+
+def get_fernet(key: Optional[str]) -> Optional[Fernet]:
+    if key == "" or key is None:
+        return None
+    try:
+        return Fernet(key)
+    except ValueError:
+        return None
+
+
+def encode_frame(data: bytes, fernet: Optional[Fernet]) -> bytes:
+    data = gzip.compress(data)
+    if fernet is not None:
+        data = fernet.encrypt(data)
+    return data
+
+
+def decode_frame(data: bytes, fernet: Optional[Fernet]) -> bytes:
+    if fernet is not None:
+        try:
+            data = fernet.decrypt(data)
+        except InvalidToken:
+            pass  # not encrypted
+    return gzip.decompress(data)
+
+
+def dump_channel(channel: dict) -> bytes:
+    if "blocks" not in channel:
+        return bytes(json.dumps(channel), "utf-8")
+    data = bytes(
+        json.dumps({key: channel[key] for key in channel if key != "blocks"}), "utf-8"
+    )
+    return BLOCKS_STRUCT.pack(BLOCKS_MAGIC, len(data)) + data + channel["blocks"]
+
+
+def load_channel(data: bytes) -> dict:
+    if data[:4] != BLOCKS_MAGIC:
+        return json.loads(data)
+    _, size = BLOCKS_STRUCT.unpack_from(data)
+    start = BLOCKS_STRUCT.size
+    channel = json.loads(data[start : start + size])
+    channel["blocks"] = data[start + size :]
+    return channel
+
+
+class LogReader:
+    def __init__(self, path: str, fernet: Optional[Fernet]):
+        self.path = path
+        self.fernet = fernet
+        self.index = {}
+        self.deltas = {}
+        self.legacy = False
+        self.data_start = 0
+        self.base_size = 0
+        self.delta_size = 0
+
+    def __enter__(self) -> "LogReader":
+        self.file = open(self.path, mode="rb")
+        try:
+            self.read_header()
+        except BaseException:
+            # __exit__ is not called when __enter__ fails
+            self.file.close()
+            raise
+        return self
+
+    def read_header(self):
+        header = self.file.read(HEADER_STRUCT.size)
+        if len(header) < HEADER_STRUCT.size or header[:4] != HEADER:
+            # monolithic JSON file (before chunked logs)
+            self.legacy = True
+            self.file.seek(0)
+            return
+        _, version, index_size = HEADER_STRUCT.unpack(header)
+        if version != FILE_VERSION:
+            raise IOError(f"unknown log file version {version}")
+        index = json.loads(decode_frame(self.file.read(index_size), self.fernet))
+        self.index = {int(id): tuple(index[id]) for id in index}
+        self.data_start = HEADER_STRUCT.size + index_size
+        self.base_size = sum(size for _, size in self.index.values())
+        self.read_deltas()
+
+    def read_deltas(self):
+        file_size = os.fstat(self.file.fileno()).st_size
+        offset = self.base_size
+        self.file.seek(self.data_start + offset)
+        while True:
+            header = self.file.read(DELTA_STRUCT.size)
+            if len(header) < DELTA_STRUCT.size:
+                break  # end of file
+            kind, id, size = DELTA_STRUCT.unpack(header)
+            if self.data_start + offset + DELTA_STRUCT.size + size > file_size:
+                break  # interrupted append
+            offset += DELTA_STRUCT.size
+            if id not in self.deltas:
+                self.deltas[id] = []
+            self.deltas[id] += [(kind, offset, size)]
+            offset += size
+            self.file.seek(self.data_start + offset)
+        self.delta_size = offset - self.base_size
+
+    def end(self) -> int:
+        return self.data_start + self.base_size + self.delta_size
+
+    def __exit__(self, type, value, tb):
+        self.file.close()
+
+    def read_legacy(self) -> dict:
+        return json.loads(decode_frame(self.file.read(), self.fernet))
+
+    def channels(self) -> List[int]:
+        return list(self.index) + [id for id in self.deltas if id not in self.index]
+
+    def read_frame(self, offset: int, size: int) -> bytes:
+        self.file.seek(self.data_start + offset)
+        return self.file.read(size)
+
+    def read_raw(self, id: int) -> bytes:
+        return self.read_frame(*self.index[id])
+
+    def read(self, id: int) -> dict:
+        channel = None
+        if id in self.index:
+            channel = load_channel(decode_frame(self.read_raw(id), self.fernet))
+        for kind, offset, size in self.deltas.get(id, []):
+            delta = load_channel(decode_frame(self.read_frame(offset, size), self.fernet))
+            if kind == FULL or channel is None:
+                channel = delta
+            else:
+                # encoded blocks are self-delimited and can be concatenated
+                for key, empty in [("messages", []), ("blocks", b"")]:
+                    if key in channel or key in delta:
+                        delta[key] = channel.get(key, empty) + delta.get(key, empty)
+                channel = delta
+        return channel
+
+    def iter_channels(self, ids: Optional[List[int]] = None) -> Iterator[Tuple[int, dict]]:
+        for id in self.channels():
+            if ids is None or id in ids:
+                yield id, self.read(id)
+
+
+class LogWriter:
+    def __init__(self, path: str, fernet: Optional[Fernet]):
+        self.path = path
+        self.fernet = fernet
+        self.frames = {}
+        self.kinds = {}
+
+    def add(self, id: int, channel: dict, kind: int = FULL):
+        self.add_raw(id, encode_frame(dump_channel(channel), self.fernet), kind)
+
+    def add_raw(self, id: int, frame: bytes, kind: int = FULL):
+        self.frames[id] = frame
+        self.kinds[id] = kind
+
+    def size(self) -> int:
+        return sum(len(frame) for frame in self.frames.values())
+
+    def append(self, end: int):
+        with open(self.path, mode="r+b") as f:
+            # drop any interrupted append past the last valid record
+            f.seek(end)
+            for id, frame in self.frames.items():
+                f.write(DELTA_STRUCT.pack(self.kinds[id], id, len(frame)) + frame)
+            f.truncate()
+
+    def write(self):
+        index = {}
+        offset = 0
+        for id, frame in self.frames.items():
+            if self.kinds[id] != FULL:
+                raise ValueError(f"channel {id} is not a full frame")
+            index[str(id)] = [offset, len(frame)]
+            offset += len(frame)
+        index_frame = encode_frame(bytes(json.dumps(index), "utf-8"), self.fernet)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, mode="wb") as f:
+            f.write(HEADER_STRUCT.pack(HEADER, FILE_VERSION, len(index_frame)))
+            f.write(index_frame)
+            for frame in self.frames.values():
+                f.write(frame)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,183 @@
+from typing import Iterator, List, NamedTuple
+import struct
+import numpy as np
+
+from .message_store import MessageStore, Ragged
+
+# Binary message block layout (one block per saved batch of messages):
+# schema | payload size | column size | column | column size | column | ...
+# Integer columns are LEB128 varints, ids as zigzag deltas from the
+# previous row (they also give the creation dates), flags are the
+# bit-packed message flags (one byte per message) and strings are their
+# lengths (in code points) followed by their concatenated UTF-8 encoding.
+
+SCHEMA = 1
+BLOCK_STRUCT = struct.Struct(">BI")
+COLUMN_STRUCT = struct.Struct(">I")
+
+MAX_VARINT = 10  # bytes of a 64-bit varint
+
+
+class MessageBlock(NamedTuple):
+    ids: np.ndarray
+    edited: np.ndarray
+    authors: np.ndarray
+    references: np.ndarray
+    flags: np.ndarray
+    contents: List[str]
+    mentions: Ragged
+    role_mentions: Ragged
+    channel_mentions: Ragged
+    reaction_emojis: Ragged  # values index emojis
+    emojis: List[str]
+    reaction_counts: np.ndarray
+    reaction_users: Ragged
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+def encode_varints(values: np.ndarray) -> bytes:
+    values = values.astype(np.int64).view(np.uint64)
+    lengths = np.ones(len(values), np.int64)
+    rest = values >> np.uint64(7)
+    while np.any(rest):
+        lengths += rest > 0
+        rest >>= np.uint64(7)
+    starts = np.cumsum(lengths) - lengths
+    output = np.empty(int(lengths.sum()), np.uint8)
+    for k in range(int(lengths.max()) if len(lengths) > 0 else 0):
+        rows = np.flatnonzero(lengths > k)
+        chunk = (values[rows] >> np.uint64(7 * k)) & np.uint64(0x7F)
+        more = (lengths[rows] > k + 1).astype(np.uint8) << np.uint8(7)
+        output[starts[rows] + k] = chunk.astype(np.uint8) | more
+    return output.tobytes()
+
+
+def decode_varints(data: bytes) -> np.ndarray:
+    buffer = np.frombuffer(data, np.uint8)
+    if len(buffer) == 0:
+        return np.empty(0, np.int64)
+    ends = np.flatnonzero(buffer < 0x80)
+    if len(ends) == 0 or ends[-1] != len(buffer) - 1:
+        raise ValueError("truncated varint")
+    starts = np.concatenate([[0], ends[:-1] + 1])
+    lengths = ends - starts + 1
+    if np.any(lengths > MAX_VARINT):
+        raise ValueError("varint too long")
+    shifts = (np.arange(len(buffer)) - np.repeat(starts, lengths)) * 7
+    chunks = (buffer & 0x7F).astype(np.uint64) << shifts.astype(np.uint64)
+    # the shifted chunks do not overlap, their sum is the value
+    return np.add.reduceat(chunks, starts).view(np.int64)
+
+
+def zigzag(values: np.ndarray) -> np.ndarray:
+    return (values << 1) ^ (values >> 63)
+
+
+def unzigzag(values: np.ndarray) -> np.ndarray:
+    return (values.view(np.uint64) >> np.uint64(1)).view(np.int64) ^ -(values & 1)
+
+
+def encode_deltas(values: np.ndarray) -> bytes:
+    return encode_varints(zigzag(np.diff(values, prepend=np.int64(0))))
+
+
+def decode_deltas(data: bytes) -> np.ndarray:
+    return np.cumsum(unzigzag(decode_varints(data)))
+
+
+def encode_strings(strings: List[str]) -> List[bytes]:
+    return [
+        encode_varints(np.fromiter(map(len, strings), np.int64, len(strings))),
+        "".join(strings).encode("utf-8", "surrogatepass"),
+    ]
+
+
+def decode_strings(lengths: bytes, data: bytes) -> List[str]:
+    text = data.decode("utf-8", "surrogatepass")
+    ends = np.cumsum(decode_varints(lengths)).tolist()
+    return [text[start:end] for start, end in zip([0] + ends, ends)]
+
+
+def encode_ragged(ragged: Ragged) -> List[bytes]:
+    return [encode_varints(np.diff(ragged.offsets)), encode_varints(ragged.values)]
+
+
+def decode_ragged(lengths: bytes, values: bytes) -> Ragged:
+    lengths = decode_varints(lengths)
+    offsets = np.zeros(len(lengths) + 1, np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return Ragged(offsets, decode_varints(values))
+
+
+def encode(store: MessageStore, rows: np.ndarray) -> bytes:
+    """
+    Block of the given flushed rows of a store
+    """
+    mentions, _ = store.mentions.take(rows)
+    role_mentions, _ = store.role_mentions.take(rows)
+    channel_mentions, _ = store.channel_mentions.take(rows)
+    reaction_emojis, entries = store.reaction_emojis.take(rows)
+    reaction_users, _ = store.reaction_users.take(entries)
+    # emojis are stored once per block
+    emojis, values = np.unique(reaction_emojis.values, return_inverse=True)
+    columns = [
+        encode_deltas(store.ids[rows]),
+        encode_varints(store.edited[rows]),
+        encode_varints(store.authors[rows]),
+        encode_varints(store.references[rows]),
+        store.flags[rows].astype(np.uint8).tobytes(),
+        *encode_strings([store.strings[i] for i in store.contents[rows].tolist()]),
+        *encode_ragged(mentions),
+        *encode_ragged(role_mentions),
+        *encode_ragged(channel_mentions),
+        *encode_ragged(Ragged(reaction_emojis.offsets, values)),
+        *encode_strings([store.strings[i] for i in emojis.tolist()]),
+        encode_varints(store.reaction_counts[entries]),
+        *encode_ragged(reaction_users),
+    ]
+    payload = b"".join(COLUMN_STRUCT.pack(len(column)) + column for column in columns)
+    return BLOCK_STRUCT.pack(SCHEMA, len(payload)) + payload
+
+
+def read_columns(payload: bytes) -> Iterator[bytes]:
+    offset = 0
+    while offset < len(payload):
+        (size,) = COLUMN_STRUCT.unpack_from(payload, offset)
+        offset += COLUMN_STRUCT.size
+        yield payload[offset : offset + size]
+        offset += size
+
+
+def decode_block(payload: bytes) -> MessageBlock:
+    columns = read_columns(payload)
+    return MessageBlock(
+        decode_deltas(next(columns)),
+        decode_varints(next(columns)),
+        decode_varints(next(columns)),
+        decode_varints(next(columns)),
+        np.frombuffer(next(columns), np.uint8).copy(),
+        decode_strings(next(columns), next(columns)),
+        decode_ragged(next(columns), next(columns)),
+        decode_ragged(next(columns), next(columns)),
+        decode_ragged(next(columns), next(columns)),
+        decode_ragged(next(columns), next(columns)),
+        decode_strings(next(columns), next(columns)),
+        decode_varints(next(columns)),
+        decode_ragged(next(columns), next(columns)),
+    )
+
+
+def decode(data: bytes) -> Iterator[MessageBlock]:
+    """
+    Blocks of concatenated encoded blocks (a channel and its appended deltas)
+    """
+    offset = 0
+    while offset < len(data):
+        schema, size = BLOCK_STRUCT.unpack_from(data, offset)
+        if schema != SCHEMA:
+            raise ValueError(f"unknown message schema {schema}")
+        offset += BLOCK_STRUCT.size
+        yield decode_block(data[offset : offset + size])
+        offset += size
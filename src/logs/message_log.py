@@ -1,83 +1,212 @@
-from typing import Optional, Union, Any
+from typing import Optional, Union, Any, Dict, List, NamedTuple
 import discord
 from datetime import datetime
 
 from utils import (
-    serialize,
     has_image,
+    to_timestamp,
+    from_timestamp,
+    snowflake_timestamp,
+    tokenizer,
+    features,
 )
 
+# message flags
+PINNED = 1
+MENTION_EVERYONE = 2
+TTS = 4
+BOT = 8
+IMAGE = 16
+ATTACHMENT = 32
+EMBED = 64
+
+
+class MessageRecord(NamedTuple):
+    id: int  # also gives the creation date
+    edited_at: int  # epoch ms, 0 if never edited
+    author: int
+    reference: int  # 0 if not an answer
+    flags: int
+    content: str
+    mentions: List[int]
+    role_mentions: List[int]
+    channel_mentions: List[int]
+    reactions: Dict[str, List[int]]  # empty users until hydrated
+    reaction_counts: Dict[str, int]
+
 
 class MessageLog:
-    def __init__(self, message: Union[discord.Message, dict], channel: Any):
+    """
+    View over one message of a channel's MessageStore
+    """
+
+    __slots__ = ["channel", "row", "id", "author", "flags", "content"]
+
+    def __init__(
+        self, channel: Any, row: int, id: int, author: int, flags: int, content: str
+    ):
         self.channel = channel
+        self.row = row
+        self.id = id
+        self.author = author
+        self.flags = flags
+        self.content = content
+
+    @staticmethod
+    def record(
+        message: Union[discord.Message, dict],
+        reactions: Optional[Dict[str, List[int]]] = None,
+    ) -> MessageRecord:
         if isinstance(message, discord.Message):
-            self.id = message.id
-            self.created_at = message.created_at
-            self.edited_at = message.edited_at
-            self.author = message.author.id
-            self.pinned = message.pinned
-            self.mention_everyone = message.mention_everyone
-            self.tts = message.tts
-            self.bot = message.author.bot or message.author.system
-            self.content = message.content
-            self.mentions = message.raw_mentions
+            counts = {str(reaction.emoji): reaction.count for reaction in message.reactions}
+            mentions = list(message.raw_mentions)
+            reference = 0
             if message.reference is not None:
-                self.reference = message.reference.message_id
+                reference = message.reference.message_id or 0
                 if message.reference.resolved is not None:
                     try:
-                        self.mentions += [message.reference.resolved.author.id]
+                        mentions += [message.reference.resolved.author.id]
                     except AttributeError:
                         pass
-            else:
-                self.reference = None
-            self.role_mentions = message.raw_role_mentions
-            self.channel_mentions = message.raw_channel_mentions
-            self.image = False
-            self.attachment = len(message.attachments) > 0
-            self.embed = len(message.embeds) > 0
-            self.image = has_image(message)
-            self.reactions = {}
-        elif isinstance(message, dict):
-            self.id = int(message["id"])
-            self.created_at = datetime.fromisoformat(message["created_at"])
-            self.edited_at = (
-                datetime.fromisoformat(message["edited_at"])
-                if message["edited_at"] is not None
-                else None
+            return MessageRecord(
+                message.id,
+                to_timestamp(message.edited_at) if message.edited_at else 0,
+                message.author.id,
+                reference,
+                (PINNED if message.pinned else 0)
+                | (MENTION_EVERYONE if message.mention_everyone else 0)
+                | (TTS if message.tts else 0)
+                | (BOT if message.author.bot or message.author.system else 0)
+                | (IMAGE if has_image(message) else 0)
+                | (ATTACHMENT if len(message.attachments) > 0 else 0)
+                | (EMBED if len(message.embeds) > 0 else 0),
+                message.content,
+                mentions,
+                message.raw_role_mentions,
+                message.raw_channel_mentions,
+                reactions
+                if reactions is not None
+                else {emoji: [] for emoji in counts},
+                counts,
             )
-            self.author = int(message["author"])
-            self.pinned = message["pinned"]
-            self.mention_everyone = message["mention_everyone"]
-            self.tts = message["tts"]
-            self.reference = (
-                int(message["reference"]) if message["reference"] is not None else None
+        else:
+            return MessageRecord(
+                int(message["id"]),
+                to_timestamp(datetime.fromisoformat(message["edited_at"]))
+                if message["edited_at"] is not None
+                else 0,
+                int(message["author"]),
+                int(message["reference"]) if message["reference"] is not None else 0,
+                (PINNED if message["pinned"] else 0)
+                | (MENTION_EVERYONE if message["mention_everyone"] else 0)
+                | (TTS if message["tts"] else 0)
+                | (BOT if message["bot"] else 0)
+                | (IMAGE if message["image"] else 0)
+                | (ATTACHMENT if message["attachment"] else 0)
+                | (EMBED if message["embed"] else 0),
+                message["content"],
+                [int(m) for m in message["mentions"]],
+                [int(m) for m in message["role_mentions"]],
+                [int(m) for m in message["channel_mentions"]],
+                message["reactions"],
+                message["reaction_counts"]
+                if "reaction_counts" in message
+                else {
+                    emoji: len(users) for emoji, users in message["reactions"].items()
+                },
             )
-            self.bot = message["bot"]
-            self.content = message["content"]
-            self.mentions = [int(m) for m in message["mentions"]]
-            self.role_mentions = [int(m) for m in message["role_mentions"]]
-            self.channel_mentions = [int(m) for m in message["channel_mentions"]]
-            self.image = message["image"]
-            self.embed = message["embed"]
-            self.attachment = message["attachment"]
-            self.reactions = message["reactions"]
+
+    @property
+    def store(self) -> Any:
+        return self.channel.store
+
+    @property
+    def timestamp(self) -> int:
+        return snowflake_timestamp(self.id)
+
+    @property
+    def created_at(self) -> datetime:
+        return from_timestamp(self.timestamp)
+
+    @property
+    def edited_at(self) -> Optional[datetime]:
+        edited = int(self.store.edited[self.row])
+        return from_timestamp(edited) if edited else None
+
+    @property
+    def reference(self) -> Optional[int]:
+        reference = int(self.store.references[self.row])
+        return reference if reference else None
+
+    @property
+    def mentions(self) -> List[int]:
+        return self.store.mentions.get(self.row)
+
+    @property
+    def role_mentions(self) -> List[int]:
+        return self.store.role_mentions.get(self.row)
+
+    @property
+    def channel_mentions(self) -> List[int]:
+        return self.store.channel_mentions.get(self.row)
+
+    @property
+    def reactions(self) -> Dict[str, List[int]]:
+        return self.store.reactions(self.row)
+
+    @property
+    def reaction_counts(self) -> Dict[str, int]:
+        return self.store.counts(self.row)
+
+    @property
+    def words(self) -> List[str]:
+        # cached tokens if the channel was tokenized
+        tokens = self.store.tokens(self.row)
+        if tokens is None:
+            return tokenizer.tokenize(self.content)
+        return [self.store.vocabulary.words[token] for token in tokens]
+
+    @property
+    def features(self) -> features.Features:
+        return self.store.features(self.row)
+
+    @property
+    def pinned(self) -> bool:
+        return bool(self.flags & PINNED)
+
+    @property
+    def mention_everyone(self) -> bool:
+        return bool(self.flags & MENTION_EVERYONE)
+
+    @property
+    def tts(self) -> bool:
+        return bool(self.flags & TTS)
+
+    @property
+    def bot(self) -> bool:
+        return bool(self.flags & BOT)
+
+    @property
+    def image(self) -> bool:
+        return bool(self.flags & IMAGE)
+
+    @property
+    def attachment(self) -> bool:
+        return bool(self.flags & ATTACHMENT)
+
+    @property
+    def embed(self) -> bool:
+        return bool(self.flags & EMBED)
 
     def __eq__(self, other: object) -> bool:
         return isinstance(other, self.__class__) and other.id == self.id
 
     def __gt__(self, other: "MessageLog") -> bool:
-        return self.created_at > other.created_at
+        return self.id > other.id
 
     def __hash__(self) -> int:
         return self.id
 
-    async def load(self, message: discord.Message):
-        for reaction in message.reactions:
-            self.reactions[str(reaction.emoji)] = []
-            async for user in reaction.users():
-                self.reactions[str(reaction.emoji)] += [user.id]
-
     async def fetch(self) -> Optional[discord.Message]:
         try:
             return await self.channel.channel.fetch_message(self.id)
@@ -85,6 +214,24 @@ class MessageLog:
             return None
 
     def dict(self) -> dict:
-        return serialize(
-            self, not_serialized=["channel"], dates=["created_at", "edited_at"]
-        )
+        edited_at = self.edited_at
+        return {
+            "id": self.id,
+            "created_at": self.created_at.isoformat(),
+            "edited_at": edited_at.isoformat() if edited_at is not None else None,
+            "author": self.author,
+            "pinned": self.pinned,
+            "mention_everyone": self.mention_everyone,
+            "tts": self.tts,
+            "bot": self.bot,
+            "content": self.content,
+            "mentions": self.mentions,
+            "reference": self.reference,
+            "role_mentions": self.role_mentions,
+            "channel_mentions": self.channel_mentions,
+            "image": self.image,
+            "attachment": self.attachment,
+            "embed": self.embed,
+            "reactions": self.reactions,
+            "reaction_counts": self.reaction_counts,
+        }
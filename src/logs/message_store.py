@@ -0,0 +1,412 @@
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import itertools
+import sys
+import numpy as np
+
+from .message_log import MessageLog, MessageRecord, BOT
+from utils import tokenizer, features, snowflake_timestamp
+
+
+class Ragged:
+    """
+    Variable length rows stored as offsets over one flat array (CSR)
+    """
+
+    def __init__(
+        self, offsets: Optional[np.ndarray] = None, values: Optional[np.ndarray] = None
+    ):
+        self.offsets = np.zeros(1, np.int64) if offsets is None else offsets
+        self.values = np.empty(0, np.int64) if values is None else values
+
+    @staticmethod
+    def from_lists(lists: List[List[int]]) -> "Ragged":
+        offsets = np.zeros(len(lists) + 1, np.int64)
+        np.cumsum([len(values) for values in lists], out=offsets[1:])
+        values = np.fromiter(
+            itertools.chain.from_iterable(lists), np.int64, int(offsets[-1])
+        )
+        return Ragged(offsets, values)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def get(self, i: int) -> List[int]:
+        return self.values[self.offsets[i] : self.offsets[i + 1]].tolist()
+
+    def concat(self, other: "Ragged") -> "Ragged":
+        return Ragged(
+            np.concatenate([self.offsets, other.offsets[1:] + self.offsets[-1]]),
+            np.concatenate([self.values, other.values]),
+        )
+
+    def take(self, rows: np.ndarray) -> Tuple["Ragged", np.ndarray]:
+        # also returns where the kept values come from to reorder nested rows
+        lengths = np.diff(self.offsets)[rows]
+        offsets = np.zeros(len(rows) + 1, np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        index = np.repeat(self.offsets[:-1][rows] - offsets[:-1], lengths) + np.arange(
+            offsets[-1], dtype=np.int64
+        )
+        return Ragged(offsets, self.values[index]), index
+
+    def replace(self, rows: Dict[int, List[int]]) -> "Ragged":
+        lengths = np.diff(self.offsets)
+        order = sorted(rows)
+        lengths[order] = [len(rows[i]) for i in order]
+        offsets = np.zeros(len(lengths) + 1, np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        pieces = []
+        start = 0
+        for i in order:
+            pieces += [
+                self.values[self.offsets[start] : self.offsets[i]],
+                np.array(rows[i], np.int64),
+            ]
+            start = i + 1
+        pieces += [self.values[self.offsets[start] :]]
+        return Ragged(offsets, np.concatenate(pieces))
+
+    @property
+    def nbytes(self) -> int:
+        return self.offsets.nbytes + self.values.nbytes
+
+
+class MessageStore:
+    """
+    Columnar storage of a channel's messages, sorted by id.
+    New records are buffered until the next flush.
+    """
+
+    def __init__(self, channel: Any):
+        self.channel = channel
+        # ids also give the creation dates (snowflakes)
+        self.ids = np.empty(0, np.int64)
+        self.edited = np.empty(0, np.int64)
+        self.authors = np.empty(0, np.int64)
+        self.references = np.empty(0, np.int64)
+        self.flags = np.empty(0, np.uint8)
+        self.contents = np.empty(0, np.int32)
+        self.mentions = Ragged()
+        self.role_mentions = Ragged()
+        self.channel_mentions = Ragged()
+        self.reaction_emojis = Ragged()
+        self.reaction_users = Ragged()
+        # one count per reaction entry, users are empty until hydrated
+        self.reaction_counts = np.empty(0, np.int64)
+        # interned contents and emojis
+        self.strings = []
+        self.string_index = None
+        self.pending = []
+        self.pending_ids = set()
+        # token ids of each interned string, filled by tokenize
+        self.vocabulary = None
+        self.string_tokens = Ragged()
+        # content features of each interned string, extracted on first use
+        self.string_features = []
+
+    def __getstate__(self) -> dict:
+        # caches rebuilt on first use
+        state = dict(self.__dict__)
+        state["string_index"] = None
+        state["string_features"] = []
+        return state
+
+    def __len__(self) -> int:
+        return len(self.ids) + len(self.pending)
+
+    def __contains__(self, id: int) -> bool:
+        if id in self.pending_ids:
+            return True
+        i = np.searchsorted(self.ids, id)
+        return i < len(self.ids) and self.ids[i] == id
+
+    def __iter__(self) -> Iterator[MessageLog]:
+        self.flush()
+        return self.select(np.arange(len(self.ids)))
+
+    def row(self, id: int) -> Optional[int]:
+        # row of a flushed message
+        i = int(np.searchsorted(self.ids, id))
+        return i if i < len(self.ids) and self.ids[i] == id else None
+
+    def select(self, rows: np.ndarray) -> Iterator[MessageLog]:
+        for row, id, author, flags, content in zip(
+            rows.tolist(),
+            self.ids[rows].tolist(),
+            self.authors[rows].tolist(),
+            self.flags[rows].tolist(),
+            self.contents[rows].tolist(),
+        ):
+            yield MessageLog(self.channel, row, id, author, flags, self.strings[content])
+
+    def bounds(
+        self, start: Optional[int] = None, stop: Optional[int] = None
+    ) -> Tuple[int, int]:
+        # rows between two ids (included), sorted by id hence by creation date
+        self.flush()
+        first = 0 if start is None else np.searchsorted(self.ids, start, "left")
+        last = len(self.ids) if stop is None else np.searchsorted(self.ids, stop, "right")
+        return int(first), int(last)
+
+    def after(self, id: int) -> int:
+        # first row with a greater id
+        self.flush()
+        return int(np.searchsorted(self.ids, id, "right"))
+
+    def range(self, first: int, last: int) -> Iterator[MessageLog]:
+        return self.select(np.arange(first, last))
+
+    def authored(self, raw_members: List[int], *, all_messages: bool) -> np.ndarray:
+        # rows kept by the author filter of the scanners (empty list is all)
+        self.flush()
+        if len(raw_members) > 0:
+            return np.isin(self.authors, raw_members)
+        elif all_messages:
+            return np.ones(len(self.ids), bool)
+        else:
+            return (self.flags & BOT) == 0
+
+    def find(self, ids: List[int]) -> List[MessageLog]:
+        self.flush()
+        return list(self.select(np.flatnonzero(np.isin(self.ids, list(ids)))))
+
+    def first_timestamp(self) -> Optional[int]:
+        ids = list(self.pending_ids)
+        if len(self.ids) > 0:
+            ids += [int(self.ids[0])]
+        return snowflake_timestamp(min(ids)) if len(ids) > 0 else None
+
+    def last_timestamp(self) -> Optional[int]:
+        ids = list(self.pending_ids)
+        if len(self.ids) > 0:
+            ids += [int(self.ids[-1])]
+        return snowflake_timestamp(max(ids)) if len(ids) > 0 else None
+
+    def intern(self, string: str) -> int:
+        if self.string_index is None:
+            self.string_index = {string: i for i, string in enumerate(self.strings)}
+        if string not in self.string_index:
+            self.string_index[string] = len(self.strings)
+            self.strings += [string]
+        return self.string_index[string]
+
+    def append(self, record: MessageRecord):
+        self.pending += [record]
+        self.pending_ids.add(record.id)
+
+    def reactions(self, row: int) -> Dict[str, List[int]]:
+        start = self.reaction_emojis.offsets[row]
+        stop = self.reaction_emojis.offsets[row + 1]
+        return {
+            self.strings[emoji]: self.reaction_users.get(entry)
+            for entry, emoji in zip(
+                range(start, stop), self.reaction_emojis.values[start:stop].tolist()
+            )
+        }
+
+    def counts(self, row: int) -> Dict[str, int]:
+        start = self.reaction_emojis.offsets[row]
+        stop = self.reaction_emojis.offsets[row + 1]
+        return {
+            self.strings[emoji]: count
+            for emoji, count in zip(
+                self.reaction_emojis.values[start:stop].tolist(),
+                self.reaction_counts[start:stop].tolist(),
+            )
+        }
+
+    def unhydrated(self, first: int, last: int) -> List[Tuple[int, int, str, int]]:
+        # (message id, entry, emoji, count) of reactions without their users
+        self.flush()
+        start = self.reaction_emojis.offsets[first]
+        stop = self.reaction_emojis.offsets[last]
+        entries = start + np.flatnonzero(
+            (np.diff(self.reaction_users.offsets[start : stop + 1]) == 0)
+            & (self.reaction_counts[start:stop] > 0)
+        )
+        rows = np.searchsorted(self.reaction_emojis.offsets, entries, "right") - 1
+        return [
+            (id, entry, self.strings[emoji], count)
+            for id, entry, emoji, count in zip(
+                self.ids[rows].tolist(),
+                entries.tolist(),
+                self.reaction_emojis.values[entries].tolist(),
+                self.reaction_counts[entries].tolist(),
+            )
+        ]
+
+    def hydrate(self, users: Dict[int, Optional[List[int]]]):
+        # users by reaction entry, None for the reactions that cannot be fetched
+        gone = [entry for entry in users if users[entry] is None]
+        if len(gone) > 0:
+            # no count left to hydrate
+            self.reaction_counts[gone] = 0
+        users = {entry: users[entry] for entry in users if users[entry] is not None}
+        if len(users) > 0:
+            self.reaction_users = self.reaction_users.replace(users)
+
+    def tokenize(self, vocabulary: tokenizer.Vocabulary):
+        # interned strings keep their index, only the new ones are tokenized
+        self.flush()
+        if vocabulary is not self.vocabulary:
+            self.vocabulary = vocabulary
+            self.string_tokens = Ragged()
+        if len(self.string_tokens) < len(self.strings):
+            self.string_tokens = self.string_tokens.concat(
+                Ragged.from_lists(
+                    [
+                        vocabulary.ids(tokenizer.tokenize(string))
+                        for string in self.strings[len(self.string_tokens) :]
+                    ]
+                )
+            )
+
+    def tokens(self, row: int) -> Optional[List[int]]:
+        content = int(self.contents[row])
+        if content < len(self.string_tokens):
+            return self.string_tokens.get(content)
+        return None
+
+    def features(self, row: int) -> features.Features:
+        content = int(self.contents[row])
+        if content >= len(self.string_features):
+            self.string_features += [None] * (len(self.strings) - len(self.string_features))
+        if self.string_features[content] is None:
+            self.string_features[content] = features.extract(self.strings[content])
+        return self.string_features[content]
+
+    def flush(self):
+        if len(self.pending) == 0:
+            return
+        records = self.pending
+        self.pending = []
+        self.pending_ids = set()
+
+        def column(array: np.ndarray, values: Iterator[int]) -> np.ndarray:
+            return np.concatenate(
+                [array, np.fromiter(values, array.dtype, len(records))]
+            )
+
+        ids = column(self.ids, (r.id for r in records))
+        self.ids = ids
+        self.edited = column(self.edited, (r.edited_at for r in records))
+        self.authors = column(self.authors, (r.author for r in records))
+        self.references = column(self.references, (r.reference for r in records))
+        self.flags = column(self.flags, (r.flags for r in records))
+        self.contents = column(self.contents, (self.intern(r.content) for r in records))
+        self.mentions = self.mentions.concat(
+            Ragged.from_lists([r.mentions for r in records])
+        )
+        self.role_mentions = self.role_mentions.concat(
+            Ragged.from_lists([r.role_mentions for r in records])
+        )
+        self.channel_mentions = self.channel_mentions.concat(
+            Ragged.from_lists([r.channel_mentions for r in records])
+        )
+        self.reaction_emojis = self.reaction_emojis.concat(
+            Ragged.from_lists(
+                [[self.intern(emoji) for emoji in r.reactions] for r in records]
+            )
+        )
+        self.reaction_users = self.reaction_users.concat(
+            Ragged.from_lists([users for r in records for users in r.reactions.values()])
+        )
+        self.reaction_counts = np.concatenate(
+            [
+                self.reaction_counts,
+                np.array(
+                    [
+                        r.reaction_counts.get(emoji, len(users))
+                        for r in records
+                        for emoji, users in r.reactions.items()
+                    ],
+                    np.int64,
+                ),
+            ]
+        )
+        self.sort()
+
+    def extend(self, block: Any):
+        # decoded block of saved messages (see message_codec)
+        self.flush()
+        self.ids = np.concatenate([self.ids, block.ids])
+        self.edited = np.concatenate([self.edited, block.edited])
+        self.authors = np.concatenate([self.authors, block.authors])
+        self.references = np.concatenate([self.references, block.references])
+        self.flags = np.concatenate([self.flags, block.flags])
+        self.contents = np.concatenate(
+            [
+                self.contents,
+                np.fromiter(
+                    map(self.intern, block.contents), np.int32, len(block.contents)
+                ),
+            ]
+        )
+        self.mentions = self.mentions.concat(block.mentions)
+        self.role_mentions = self.role_mentions.concat(block.role_mentions)
+        self.channel_mentions = self.channel_mentions.concat(block.channel_mentions)
+        emojis = np.array([self.intern(emoji) for emoji in block.emojis], np.int64)
+        self.reaction_emojis = self.reaction_emojis.concat(
+            Ragged(block.reaction_emojis.offsets, emojis[block.reaction_emojis.values])
+        )
+        self.reaction_users = self.reaction_users.concat(block.reaction_users)
+        self.reaction_counts = np.concatenate(
+            [self.reaction_counts, block.reaction_counts]
+        )
+        self.sort()
+
+    def sort(self):
+        # strings keep their index, only rows move
+        ids = self.ids
+        if np.any(ids[1:] <= ids[:-1]):
+            # sort by id and drop duplicates (keeping the first stored record)
+            _, rows = np.unique(ids, return_index=True)
+            self.take(rows)
+
+    def take(self, rows: np.ndarray):
+        self.ids = self.ids[rows]
+        self.edited = self.edited[rows]
+        self.authors = self.authors[rows]
+        self.references = self.references[rows]
+        self.flags = self.flags[rows]
+        self.contents = self.contents[rows]
+        self.mentions, _ = self.mentions.take(rows)
+        self.role_mentions, _ = self.role_mentions.take(rows)
+        self.channel_mentions, _ = self.channel_mentions.take(rows)
+        self.reaction_emojis, entries = self.reaction_emojis.take(rows)
+        self.reaction_users, _ = self.reaction_users.take(entries)
+        self.reaction_counts = self.reaction_counts[entries]
+
+    def scan_copy(self, *, reactions: bool, tokens: bool) -> "MessageStore":
+        # shallow copy without the columns a scan does not read
+        self.flush()
+        store = MessageStore.__new__(MessageStore)
+        store.__dict__.update(self.__dict__)
+        if not reactions:
+            store.reaction_emojis = Ragged(np.zeros(len(self.ids) + 1, np.int64))
+            store.reaction_users = Ragged()
+            store.reaction_counts = np.empty(0, np.int64)
+        if not tokens:
+            store.vocabulary = None
+            store.string_tokens = Ragged()
+        return store
+
+    @property
+    def nbytes(self) -> int:
+        return (
+            self.ids.nbytes
+            + self.edited.nbytes
+            + self.authors.nbytes
+            + self.references.nbytes
+            + self.flags.nbytes
+            + self.contents.nbytes
+            + self.mentions.nbytes
+            + self.role_mentions.nbytes
+            + self.channel_mentions.nbytes
+            + self.reaction_emojis.nbytes
+            + self.reaction_users.nbytes
+            + self.reaction_counts.nbytes
+            + self.string_tokens.nbytes
+            + sum(map(sys.getsizeof, self.strings))
+            + (sys.getsizeof(self.string_index) if self.string_index is not None else 0)
+        )
@@ -0,0 +1,103 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import os
+import math
+import time
+import asyncio
+import discord
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# reaction user lists fetched at the same time for one history page
+REACTION_FETCHES = int(os.getenv("REACTION_FETCHES", 4))
+
+USERS_PAGE_SIZE = 100
+
+
+class ReactionFetcher:
+    """
+    Fetches the reaction users of a whole history page concurrently,
+    reusing known users when a reaction count did not change
+    """
+
+    def __init__(self, max_fetches: int = REACTION_FETCHES):
+        self.max_fetches = max(1, max_fetches)
+        self.fetched = 0
+        self.reused = 0
+        self.requests = 0
+        self.elapsed = 0.0
+
+    async def fetch(
+        self,
+        messages: List[discord.Message],
+        known: Callable[[int], Optional[Dict[str, List[int]]]],
+    ) -> Dict[int, Dict[str, List[int]]]:
+        t0 = time.monotonic()
+        reactions = {}
+        todo = []
+        for message in messages:
+            cached = known(message.id) or {}
+            reactions[message.id] = {}
+            for reaction in message.reactions:
+                emoji = str(reaction.emoji)
+                if emoji in cached and len(cached[emoji]) == reaction.count:
+                    reactions[message.id][emoji] = cached[emoji]
+                    self.reused += 1
+                else:
+                    # placeholder keeps the reactions order
+                    reactions[message.id][emoji] = []
+                    todo += [(reactions[message.id], emoji, reaction)]
+        await self.gather(todo)
+        for message_reactions, emoji, _ in todo:
+            if message_reactions[emoji] is None:
+                del message_reactions[emoji]
+        self.elapsed += time.monotonic() - t0
+        return reactions
+
+    async def hydrate(
+        self,
+        channel: discord.TextChannel,
+        entries: List[Tuple[int, int, str, int]],
+        users: Optional[Dict[int, Optional[List[int]]]] = None,
+    ) -> Dict[int, Optional[List[int]]]:
+        # users of stored (message id, entry, emoji, count) reactions by entry,
+        # filled as they come so that an error keeps the ones already fetched
+        t0 = time.monotonic()
+        if users is None:
+            users = {}
+        todo = []
+        for id, entry, emoji, count in entries:
+            partial = discord.PartialEmoji.from_str(emoji)
+            reaction = discord.Reaction(
+                message=channel.get_partial_message(id),
+                data={"count": count, "me": False},
+                emoji=partial if partial.id is not None else emoji,
+            )
+            todo += [(users, entry, reaction)]
+        await self.gather(todo)
+        self.elapsed += time.monotonic() - t0
+        return users
+
+    async def gather(self, todo: List[Tuple[dict, Any, discord.Reaction]]):
+        if len(todo) == 0:
+            return
+        semaphore = asyncio.Semaphore(self.max_fetches)
+
+        async def fetch_users(users: dict, key: Any, reaction: discord.Reaction):
+            async with semaphore:
+                try:
+                    users[key] = [user.id async for user in reaction.users()]
+                except (discord.NotFound, discord.Forbidden):
+                    # deleted message or reaction, or no access: None to drop it
+                    users[key] = None
+
+        tasks = [asyncio.ensure_future(fetch_users(*reaction)) for reaction in todo]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+        self.fetched += len(todo)
+        self.requests += sum(
+            max(1, math.ceil(reaction.count / USERS_PAGE_SIZE)) for _, _, reaction in todo
+        )
@@ -0,0 +1,234 @@
+from typing import Dict, List, Optional, Tuple
+import os
+import io
+import re
+import numpy as np
+from dotenv import load_dotenv
+
+try:
+    import re._parser as sre_parse
+    from re._constants import LITERAL
+except ImportError:  # python < 3.11
+    import sre_parse
+    from sre_constants import LITERAL
+
+load_dotenv()
+
+# keep an inverted index of the messages for text queries
+TEXT_INDEX = bool(int(os.getenv("TEXT_INDEX", 1)))
+
+# words of the lowercased contents
+TOKEN_REGEX = re.compile(r"\w+")
+
+
+def required_literals(pattern: str) -> Optional[List[str]]:
+    """
+    Literal strings every match of the regex contains (top level only),
+    None if the regex is invalid or ignores case
+    """
+    try:
+        parsed = sre_parse.parse(pattern)
+    except (re.error, OverflowError, RecursionError):
+        return None
+    if parsed.state.flags & re.IGNORECASE:
+        return None
+    literals = []
+    literal = ""
+    for op, av in parsed:
+        if op == LITERAL:
+            literal += chr(av)
+        else:
+            literals += [literal]
+            literal = ""
+    literals += [literal]
+    # lowercasing the final sigma depends on its context
+    return [literal for literal in literals if literal != "" and "Σ" not in literal]
+
+
+class TextIndex:
+    """
+    Inverted index of a channel's lowercased words, with positions.
+    Messages are numbered like the rows of the store they were built from.
+    """
+
+    def __init__(self):
+        self.ids = np.empty(0, np.int64)
+        self.words: List[str] = []
+        self.word_index: Dict[str, int] = {}
+        # postings sorted by word, then row and position
+        self.tokens = np.empty(0, np.int32)
+        self.rows = np.empty(0, np.int32)
+        self.positions = np.empty(0, np.int32)
+        self.offsets = np.zeros(1, np.int64)
+        self.trigrams: Dict[str, List[int]] = {}
+        self.trigram_words = 0
+        self.modified = False
+
+    def __getstate__(self) -> dict:
+        state = dict(self.__dict__)
+        state["word_index"] = None
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self.word_index = {word: i for i, word in enumerate(self.words)}
+
+    def dump(self) -> bytes:
+        data = io.BytesIO()
+        np.savez(
+            data,
+            ids=self.ids,
+            words=np.frombuffer("\n".join(self.words).encode("utf-8"), np.uint8),
+            tokens=self.tokens,
+            rows=self.rows,
+            positions=self.positions,
+        )
+        return data.getvalue()
+
+    @staticmethod
+    def load(data: bytes) -> "TextIndex":
+        index = TextIndex()
+        with np.load(io.BytesIO(data)) as arrays:
+            index.ids = arrays["ids"]
+            words = arrays["words"].tobytes().decode("utf-8")
+            index.words = words.split("\n") if len(words) > 0 else []
+            index.tokens = arrays["tokens"]
+            index.rows = arrays["rows"]
+            index.positions = arrays["positions"]
+        index.word_index = {word: i for i, word in enumerate(index.words)}
+        index.update_offsets()
+        return index
+
+    def is_synced(self, ids: np.ndarray) -> bool:
+        return len(ids) == len(self.ids) and np.array_equal(ids, self.ids)
+
+    def update(self, ids: np.ndarray, contents: np.ndarray, strings: List[str]):
+        """
+        Indexes the messages missing from the index, ids and contents are
+        the sorted rows of the channel's store
+        """
+        if self.is_synced(ids):
+            return
+        if not np.all(np.isin(self.ids, ids)):
+            # messages were removed, start over
+            self.__init__()
+        new_rows = np.flatnonzero(~np.isin(ids, self.ids))
+        # previous rows move after the older messages inserted before them
+        self.rows = np.searchsorted(ids, self.ids)[self.rows].astype(np.int32)
+        tokens = []
+        rows = []
+        positions = []
+        for row in new_rows.tolist():
+            content = strings[contents[row]].lower()
+            for position, word in enumerate(TOKEN_REGEX.findall(content)):
+                if word not in self.word_index:
+                    self.word_index[word] = len(self.words)
+                    self.words += [word]
+                tokens += [self.word_index[word]]
+                rows += [row]
+                positions += [position]
+        self.tokens = np.concatenate([self.tokens, np.array(tokens, np.int32)])
+        self.rows = np.concatenate([self.rows, np.array(rows, np.int32)])
+        self.positions = np.concatenate([self.positions, np.array(positions, np.int32)])
+        order = np.lexsort((self.positions, self.rows, self.tokens))
+        self.tokens = self.tokens[order]
+        self.rows = self.rows[order]
+        self.positions = self.positions[order]
+        self.ids = ids.copy()
+        self.update_offsets()
+        self.modified = True
+
+    def update_offsets(self):
+        self.offsets = np.searchsorted(
+            self.tokens, np.arange(len(self.words) + 1), "left"
+        ).astype(np.int64)
+
+    def matching_words(self, fragment: str, start: bool, end: bool) -> List[int]:
+        # words equal to, starting with, ending with or containing the fragment
+        if start and end:
+            return [self.word_index[fragment]] if fragment in self.word_index else []
+        if len(fragment) >= 3:
+            self.update_trigrams()
+            candidates = None
+            for i in range(len(fragment) - 2):
+                words = set(self.trigrams.get(fragment[i : i + 3], []))
+                candidates = words if candidates is None else candidates & words
+                if len(candidates) == 0:
+                    return []
+            candidates = sorted(candidates)
+        else:
+            candidates = range(len(self.words))
+        return [
+            word
+            for word in candidates
+            if (
+                self.words[word].startswith(fragment)
+                if start
+                else self.words[word].endswith(fragment)
+                if end
+                else fragment in self.words[word]
+            )
+        ]
+
+    def update_trigrams(self):
+        for word in range(self.trigram_words, len(self.words)):
+            text = self.words[word]
+            for trigram in set(text[i : i + 3] for i in range(len(text) - 2)):
+                if trigram not in self.trigrams:
+                    self.trigrams[trigram] = []
+                self.trigrams[trigram] += [word]
+        self.trigram_words = len(self.words)
+
+    def postings(self, words: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+        if len(words) == 0:
+            return np.empty(0, np.int32), np.empty(0, np.int32)
+        slices = [slice(self.offsets[word], self.offsets[word + 1]) for word in words]
+        return (
+            np.concatenate([self.rows[s] for s in slices]),
+            np.concatenate([self.positions[s] for s in slices]),
+        )
+
+    def search(self, text: str) -> Optional[np.ndarray]:
+        """
+        Sorted rows whose lowercased content may contain the lowercased text,
+        None if the index cannot narrow it down
+        """
+        text = text.lower()
+        words = [(m.start(), m.end(), m[0]) for m in TOKEN_REGEX.finditer(text)]
+        if len(words) == 0:
+            return None
+        found = None
+        for j, (start, end, word) in enumerate(words):
+            # only the words at the edges of the text can be part of longer ones
+            rows, positions = self.postings(
+                self.matching_words(word, start > 0, end < len(text))
+            )
+            if len(words) == 1:
+                return np.unique(rows)
+            keep = positions >= j
+            keys = (rows[keep].astype(np.int64) << 32) | (positions[keep] - j)
+            found = (
+                np.unique(keys) if found is None else np.intersect1d(found, keys)
+            )
+        return np.unique(found >> 32)
+
+    def search_regex(self, pattern: str) -> Optional[np.ndarray]:
+        literals = required_literals(pattern)
+        if literals is None:
+            return None
+        found = None
+        for literal in literals:
+            rows = self.search(literal)
+            if rows is not None:
+                found = rows if found is None else np.intersect1d(found, rows)
+        return found
+
+    @property
+    def nbytes(self) -> int:
+        return (
+            self.ids.nbytes
+            + self.tokens.nbytes
+            + self.rows.nbytes
+            + self.positions.nbytes
+            + self.offsets.nbytes
+        )
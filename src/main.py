@@ -1,12 +1,18 @@
+from datetime import datetime
+
+t0 = datetime.now()
+
 import sys
 from miniscord import Bot
 import logging
+import asyncio
+import importlib
 
 if sys.version_info < (3, 7):
     print("Please upgrade your Python version to 3.7.0 or higher")
     sys.exit(1)
 
-from utils import emojis, gdpr, command_cache
+from utils import emojis, gdpr, command_cache, delta
 import scanners
 from logs import GuildLogs
 
@@ -14,7 +20,7 @@ logging.basicConfig(
     format="[%(asctime)s][%(levelname)s][%(module)s] %(message)s", level=logging.INFO
 )
 
-emojis.load_emojis()
+import_time = delta(t0)
 
 bot = Bot(
     "Discord Analyst",
@@ -25,7 +31,23 @@ bot = Bot(
 bot.log_calls = True
 
 
+ready = False
+
+
+def warm_up():
+    # loads what the first commands would otherwise wait for
+    t0 = datetime.now()
+    emojis.load_emojis()
+    importlib.import_module("matplotlib.pyplot")
+    logging.info(f"startup > warmed up in {delta(t0):,}ms")
+
+
 async def on_ready():
+    global ready
+    if not ready:
+        ready = True
+        logging.info(f"startup > ready in {delta(t0):,}ms ({import_time:,}ms of imports)")
+        asyncio.get_event_loop().run_in_executor(None, warm_up)
     GuildLogs.check_logs(bot.client.guilds)
     return True
 
@@ -153,4 +175,6 @@ bot.register_command(
     scanners.FullScanner.help(),
 )
 
-bot.start()
+# scan workers import this module again
+if __name__ == "__main__":
+    bot.start()
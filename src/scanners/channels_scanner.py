@@ -8,7 +8,7 @@ import discord
 from logs import ChannelLogs, MessageLog
 from .scanner import Scanner
 from data_types import Counter
-from utils import generate_help, mention, channel_mention
+from utils import generate_help, mention, channel_mention, rank, utc_today
 
 
 class ChannelsScanner(Scanner):
@@ -27,6 +27,8 @@ class ChannelsScanner(Scanner):
             valid_args=["all", "everyone"],
             help=ChannelsScanner.help(),
             intro_context="Channels",
+            filtered=True,
+            mergeable=True,
         )
 
     async def init(self, message: discord.Message, *args: str) -> bool:
@@ -48,22 +50,25 @@ class ChannelsScanner(Scanner):
             all_messages=self.all_messages,
         )
 
+    def merge(self, other: "ChannelsScanner"):
+        for name, counter in other.messages.items():
+            self.messages[name].merge(counter)
+
     def get_results(self, intro: str) -> List[str]:
-        names = [name for name in self.messages]
-        names.sort(key=lambda name: self.messages[name].score(), reverse=True)
-        names = names[: self.top]
+        today = utc_today()
+        names = rank(self.messages, lambda counter: counter.score(today=today), self.top)
         usage_count = Counter.total(self.messages)
         res = [intro]
         res += [
             self.messages[name].to_string(
-                names.index(name),
+                i,
                 channel_mention(name),
                 total_usage=usage_count,
                 counted="message",
                 transform=lambda id: f" by {mention(id)}",
                 top=len(self.members) != 1,
             )
-            for name in names
+            for i, name in enumerate(names)
         ]
         return res
 
@@ -1,5 +1,4 @@
 from typing import List
-import re
 import discord
 
 
@@ -8,7 +7,7 @@ import discord
 from .scanner import Scanner
 from data_types import Composition
 from logs import ChannelLogs, MessageLog
-from utils import emojis, generate_help
+from utils import generate_help
 
 
 class CompositionScanner(Scanner):
@@ -21,6 +20,8 @@ class CompositionScanner(Scanner):
             valid_args=["all", "everyone"],
             help=CompositionScanner.help(),
             intro_context="Composition",
+            filtered=True,
+            mergeable=True,
         )
 
     async def init(self, message: discord.Message, *args: str) -> bool:
@@ -34,6 +35,9 @@ class CompositionScanner(Scanner):
         )
         return ret
 
+    def merge(self, other: "CompositionScanner"):
+        self.compo.merge(other.compo)
+
     def get_results(self, intro: str) -> List[str]:
         res = [intro]
         res += self.compo.to_string(self.msg_count)
@@ -55,25 +59,19 @@ class CompositionScanner(Scanner):
             or message.author in raw_members
         ):
             impacted = True
-            compo.total_characters += len(message.content)
+            features = message.features
+            compo.total_characters += features.length
 
-            emojis_found = emojis.regex.findall(message.content)
-            without_emoji = message.content
+            emojis_found = features.emojis
             for name in emojis_found:
-                if name in emojis.unicode_list or re.match(
-                    r"(<a?:[\w\-\~]+:\d+>|:[\w\\-\~]+:)", name
-                ):
-                    compo.emojis[name] += 1
-                    i = without_emoji.index(name)
-                    without_emoji = without_emoji[:i] + without_emoji[i + len(name) :]
-            if len(message.content.strip()) > 0 and len(without_emoji.strip()) == 0:
+                compo.emojis[name] += 1
+            if features.emoji_only:
                 compo.emoji_only += 1
             if len(emojis_found) > 0:
                 compo.emoji_msg += 1
 
-            links_found = re.findall(r"https?:\/\/", message.content)
-            compo.links += len(links_found)
-            if len(links_found) > 0:
+            compo.links += features.links
+            if features.links > 0:
                 compo.link_msg += 1
 
             mentions = (
@@ -88,8 +86,7 @@ class CompositionScanner(Scanner):
                 compo.mentions += mentions
                 compo.mention_msg += 1
 
-            spoilers_found = re.findall(r"\|\|[^|]+\|\|", message.content)
-            if len(spoilers_found) > 0:
+            if features.spoiler:
                 compo.spoilers += 1
 
             if message.edited_at is not None:
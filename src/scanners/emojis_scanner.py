@@ -7,7 +7,7 @@ import discord
 from logs import ChannelLogs, MessageLog
 from data_types import Emoji, get_emoji_dict
 from .scanner import Scanner
-from utils import emojis, generate_help, plural, precise
+from utils import emojis, generate_help, plural, precise, rank, utc_today
 
 
 class EmojisScanner(Scanner):
@@ -32,6 +32,8 @@ class EmojisScanner(Scanner):
             valid_args=["all", "members", "sort:usage", "sort:reaction", "everyone"],
             help=EmojisScanner.help(),
             intro_context="Emoji usage",
+            mergeable=True,
+            needs_reactions=True,
         )
 
     async def init(self, message: discord.Message, *args: str) -> bool:
@@ -65,16 +67,23 @@ class EmojisScanner(Scanner):
             all_messages=self.all_messages,
         )
 
+    def merge(self, other: "EmojisScanner"):
+        for name, emoji in other.emojis.items():
+            # guild emojis of a cached partial may have been deleted since
+            if name in self.emojis or emoji.used():
+                self.emojis[name].merge(emoji)
+
     def get_results(self, intro: str) -> List[str]:
-        names = [name for name in self.emojis]
-        names.sort(
-            key=lambda name: self.emojis[name].score(
+        today = utc_today()
+        names = rank(
+            self.emojis,
+            lambda emoji: emoji.score(
                 usage_weight=(0 if self.sort == "reaction" else 1),
                 react_weight=(0 if self.sort == "usage" else 1),
+                today=today,
             ),
-            reverse=True,
+            self.top,
         )
-        names = names[: self.top]
         # Get the total of all emojis used
         usage_count = 0
         reaction_count = 0
@@ -87,14 +96,14 @@ class EmojisScanner(Scanner):
             res += [f"(Sorted by {self.sort})"]
         res += [
             self.emojis[name].to_string(
-                names.index(name),
+                i,
                 name,
                 total_usage=usage_count,
                 total_react=reaction_count,
                 show_life=False,
                 show_members=self.show_members or len(self.raw_members) == 0,
             )
-            for name in names
+            for i, name in enumerate(names)
             if allow_unused or self.emojis[name].used()
         ]
         res += [
@@ -123,18 +132,18 @@ class EmojisScanner(Scanner):
             impacted = True
             # Find all emojis un the current message in the form "<:emoji:123456789>"
             # Filter for known emojis
-            found = emojis.regex.findall(message.content)
+            found = message.features.emojis
             # For each emoji, update its usage
             for name in found:
                 if name not in emojis_dict:
-                    if not all_emojis or name not in emojis.unicode_list:
+                    if not all_emojis or name not in emojis.unicode_set:
                         continue
                 emojis_dict[name].usages += 1
                 emojis_dict[name].update_use(message.created_at, [message.author])
         # For each reaction of this message, test if known emoji and update when it's the case
         for name in message.reactions:
             if name not in emojis_dict:
-                if not all_emojis or name not in emojis.unicode_list:
+                if not all_emojis or name not in emojis.unicode_set:
                     continue
             if len(raw_members) == 0:
                 emojis_dict[name].reactions += len(message.reactions[name])
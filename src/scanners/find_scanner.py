@@ -2,6 +2,7 @@ from typing import Dict, List, Optional, Tuple
 from collections import defaultdict
 import discord
 import re
+import numpy as np
 
 # Custom libs
 
@@ -14,9 +15,41 @@ from utils import (
     precise,
     mention,
     escape_text,
+    rank,
+    utc_today,
 )
 
 
+class QueryMatcher:
+    """
+    Counts the matches of every query in a message: plain queries on the
+    lowercased content (once per distinct text), regexes compiled once
+    """
+
+    def __init__(self, queries: List[Tuple[str, Optional[str]]]):
+        self.size = len(queries)
+        self.texts: Dict[str, List[int]] = defaultdict(list)
+        self.regexes: List[Tuple[re.Pattern, int]] = []
+        for i, (query, regex) in enumerate(queries):
+            if regex is None:
+                self.texts[query.lower()] += [i]
+            else:
+                self.regexes += [(re.compile(regex), i)]
+        self.texts = dict(self.texts)
+
+    def counts(self, content: str) -> List[int]:
+        counts = [0] * self.size
+        if len(self.texts) > 0:
+            lowered = content.lower()
+            for text, indices in self.texts.items():
+                count = lowered.count(text)
+                for i in indices:
+                    counts[i] = count
+        for regex, i in self.regexes:
+            counts[i] = len(regex.findall(content))
+        return counts
+
+
 class FindScanner(Scanner):
     @staticmethod
     def help() -> str:
@@ -36,6 +69,9 @@ class FindScanner(Scanner):
             valid_args=["all", "everyone", "top"],
             help=FindScanner.help(),
             intro_context="Matches",
+            filtered=True,
+            mergeable=True,
+            needs_index=True,
         )
 
     async def init(self, message: discord.Message, *args: str) -> bool:
@@ -52,36 +88,81 @@ class FindScanner(Scanner):
             (query, query.strip("`") if re.match(r"^`.*`$", query) else None)
             for query in self.other_args
         ]
+        try:
+            self.matcher = QueryMatcher(self.queries)
+        except re.error as error:
+            await message.channel.send(
+                f"Invalid regex: {error}",
+                reference=message,
+            )
+            return False
         return True
 
+    def prepare(self, channel_logs: ChannelLogs):
+        channel_logs.update_index()
+
+    def compute_channel(
+        self, channel_logs: ChannelLogs, *, after: Optional[int] = None
+    ) -> int:
+        # the index only narrows down the messages, matches are counted as usual
+        candidates = [
+            channel_logs.search(
+                query[0] if query[1] is None else query[1], regex=query[1] is not None
+            )
+            for query in self.queries
+        ]
+        if any(rows is None for rows in candidates):
+            return super().compute_channel(channel_logs, after=after)
+        first, last = channel_logs.rows(self.start_date, self.stop_date, after=after)
+        authored = channel_logs.store.authored(
+            self.raw_members, all_messages=self.all_messages
+        )
+        rows = first + np.flatnonzero(authored[first:last])
+        if not self.top and len(rows) > 0:
+            # messages without matches still count their authors
+            authors, index = np.unique(channel_logs.store.authors[rows], return_index=True)
+            for author in authors[np.argsort(index)].tolist():
+                for query in self.queries:
+                    self.matches[query[0]].update_use(0, None, author)
+        for message_log in channel_logs.store.select(
+            np.intersect1d(rows, np.concatenate(candidates))
+        ):
+            self.compute_message(channel_logs, message_log)
+        return len(rows)
+
     def compute_message(self, channel: ChannelLogs, message: MessageLog):
         return FindScanner.analyse_message(
             message,
             self.matches,
             self.queries,
+            self.matcher,
             self.raw_members,
             all_messages=self.all_messages,
             top=self.top,
         )
 
+    def merge(self, other: "FindScanner"):
+        for match, counter in other.matches.items():
+            self.matches[match].merge(counter)
+
     def get_results(self, intro: str) -> List[str]:
         res = [intro]
-        matches = [match for match in self.matches]
-        matches.sort(key=lambda match: self.matches[match].score(), reverse=True)
+        today = utc_today()
+        matches = rank(self.matches, lambda counter: counter.score(today=today))
         usage_count = Counter.total(self.matches)
         if self.top:
             res += [
                 self.matches[match].to_string(
-                    matches.index(match),
+                    i,
                     mention(match),
                     total_usage=usage_count,
                 )
-                for match in matches
+                for i, match in enumerate(matches)
             ]
         else:
             res += [
                 self.matches[match].to_string(
-                    matches.index(match),
+                    i,
                     f'"{escape_text(match)}"'
                     if len(match.strip("`")) == len(match)
                     else match,
@@ -90,7 +171,7 @@ class FindScanner(Scanner):
                     transform=lambda id: f" by {mention(id)}",
                     top=len(self.members) != 1,
                 )
-                for match in matches
+                for i, match in enumerate(matches)
             ]
         if self.top or len(matches) > 1:
             res += [
@@ -105,6 +186,7 @@ class FindScanner(Scanner):
         message: MessageLog,
         matches: Dict[str, Counter],
         queries: List[Tuple[str, Optional[str]]],
+        matcher: QueryMatcher,
         raw_members: List[int],
         *,
         all_messages: bool,
@@ -118,17 +200,11 @@ class FindScanner(Scanner):
             or message.author in raw_members
         ):
             impacted = True
-            content = message.content.lower()
-            for query in queries:
-                if query[1] is not None:
-                    count = len(re.findall(query[1], message.content))
-                else:
-                    count = content.count(query[0].lower())
+            created_at = message.created_at
+            for query, count in zip(queries, matcher.counts(message.content)):
                 if top:
                     if count > 0:
-                        matches[message.author].update_use(count, message.created_at)
+                        matches[message.author].update_use(count, created_at)
                 else:
-                    matches[query[0]].update_use(
-                        count, message.created_at, message.author
-                    )
+                    matches[query[0]].update_use(count, created_at, message.author)
         return impacted
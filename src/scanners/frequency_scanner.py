@@ -1,5 +1,6 @@
-from typing import List
-from datetime import datetime
+from typing import List, Optional
+from datetime import timedelta
+import numpy as np
 import discord
 
 
@@ -7,8 +8,9 @@ import discord
 
 from .scanner import Scanner
 from data_types import Frequency
+from data_types.frequency import DAY, HOUR
 from logs import ChannelLogs, MessageLog
-from utils import generate_help
+from utils import generate_help, from_timestamp, snowflake_timestamp
 
 
 class FrequencyScanner(Scanner):
@@ -27,6 +29,7 @@ class FrequencyScanner(Scanner):
             valid_args=["all", "everyone", "graph"],
             help=FrequencyScanner.help(),
             intro_context="Frequency",
+            mergeable=True,
         )
 
     async def init(self, message: discord.Message, *args: str) -> bool:
@@ -36,11 +39,33 @@ class FrequencyScanner(Scanner):
         self.to_graph = "graph" in args
         return True
 
+    def compute_channel(
+        self, channel_logs: ChannelLogs, *, after: Optional[int] = None
+    ) -> int:
+        # whole columns instead of one message at a time
+        first, last = channel_logs.rows(self.start_date, self.stop_date, after=after)
+        store = channel_logs.store
+        ids = store.ids[first:last]
+        counted = store.authored(self.raw_members, all_messages=self.all_messages)[
+            first:last
+        ]
+        self.freq.extend(
+            ids,
+            snowflake_timestamp(ids),
+            store.authors[first:last],
+            np.full(len(ids), channel_logs.id, np.int64),
+            counted,
+        )
+        return int(counted.sum())
+
     def compute_message(self, channel: ChannelLogs, message: MessageLog):
         return FrequencyScanner.analyse_message(
             message, self.freq, self.raw_members, all_messages=self.all_messages
         )
 
+    def merge(self, other: "FrequencyScanner"):
+        self.freq.merge(other.freq)
+
     def get_results(self, intro: str) -> List[str]:
         FrequencyScanner.compute_results(self.freq)
         if self.to_graph:
@@ -60,66 +85,69 @@ class FrequencyScanner(Scanner):
         *,
         all_messages: bool,
     ) -> bool:
-        impacted = False
         # If author is included in the selection (empty list is all)
-        if (
+        impacted = (
             (not message.bot or all_messages)
             and len(raw_members) == 0
             or message.author in raw_members
-        ):
-            impacted = True
-            freq.dates += [message.created_at]
-            if message.author == freq.last_author:
-                freq.streaks[-1] += 1
-            else:
-                if len(freq.streaks) > 0 and (
-                    freq.longest_streak is None
-                    or freq.streaks[-1] > freq.longest_streak
-                ):
-                    freq.longest_streak = freq.streaks[-1]
-                    freq.longest_streak_start = freq.last_streak_start
-                    freq.longest_streak_author = freq.last_streak_author
-                freq.streaks += [1]
-                freq.last_streak_start = message.created_at
-                freq.last_streak_author = message.author
-        freq.last_author = message.author
+        )
+        freq.add(
+            message.id, message.timestamp, message.author, message.channel.id, impacted
+        )
         return impacted
 
     @staticmethod
     def compute_results(freq: Frequency):
-        freq.dates.sort()
-        latest = freq.dates[0]
-        current_day = 0
-        current_day_date = freq.dates[0]
-        current_day_count = 0
-        current_hour_buffer = []
-        for date in freq.dates:
-            # calculate longest break
-            delay = date - latest
-            if delay > freq.longest_break:
-                freq.longest_break = delay
-                freq.longest_break_start = latest
-            latest = date
-            # calculate busiest weekday / hours
-            freq.hours[date.weekday()][date.hour] += 1
-            # calculate busiest day ever
-            start_delta = date - freq.dates[0]
-            if start_delta.days > current_day:
-                if current_day_count > freq.busiest_day_count:
-                    freq.busiest_day_count = current_day_count
-                    freq.busiest_day = current_day_date
-                current_day = start_delta.days
-                current_day_date = date
-                current_day_count = 0
-            else:
-                current_day_count += 1
-            # calculate busiest hour ever
-            while (
-                len(current_hour_buffer) > 0
-                and (date - current_hour_buffer[0]).total_seconds() > 3600
-            ):
-                current_hour_buffer.pop(0)
-            current_hour_buffer += [date]
-            if len(current_hour_buffer) > freq.busiest_hour_count:
-                freq.busiest_hour = current_hour_buffer[0]
-                freq.busiest_hour_count = len(current_hour_buffer)
+        ids, timestamps, authors, channels, counted = freq.columns()
+        order = np.lexsort((ids, channels))
+        channels = channels[order]
+        timestamps = timestamps[order]
+        authors = authors[order]
+        counted = counted[order]
+        # streaks are counted in each channel, any other message breaks them
+        starts = counted.copy()
+        starts[1:] &= (
+            (authors[1:] != authors[:-1])
+            | (channels[1:] != channels[:-1])
+            | ~counted[:-1]
+        )
+        streak_index = np.cumsum(starts)[counted] - 1
+        freq.streaks = np.bincount(streak_index)
+        if len(freq.streaks) > 0:
+            longest = int(np.argmax(freq.streaks))
+            first = np.flatnonzero(starts)[longest]
+            freq.longest_streak = int(freq.streaks[longest])
+            freq.longest_streak_start = from_timestamp(int(timestamps[first]))
+            freq.longest_streak_author = int(authors[first])
+
+        dates = np.sort(timestamps[counted])
+        freq.dates = dates
+        if len(dates) == 0:
+            return
+        # busiest weekday / hours (1970-01-01 was a Thursday)
+        weekdays = (dates // DAY + 3) % 7
+        hours = (dates // HOUR) % 24
+        freq.hours = np.bincount(weekdays * 24 + hours, minlength=7 * 24).reshape(
+            7, 24
+        )
+        # longest break
+        breaks = np.diff(dates)
+        if len(breaks) > 0 and breaks.max() > 0:
+            i = int(np.argmax(breaks))
+            freq.longest_break = timedelta(milliseconds=int(breaks[i]))
+            freq.longest_break_start = from_timestamp(int(dates[i]))
+        # busiest day ever, in 24h periods since the first message
+        days = (dates - dates[0]) // DAY
+        day_counts = np.bincount(days)
+        busiest_day = int(np.argmax(day_counts))
+        freq.busiest_day_count = int(day_counts[busiest_day])
+        freq.busiest_day = from_timestamp(
+            int(dates[np.searchsorted(days, busiest_day)])
+        )
+        # busiest hour ever, in a rolling window ending on each message
+        window_starts = np.searchsorted(dates, dates - HOUR)
+        window_counts = np.arange(len(dates)) - window_starts + 1
+        busiest_hour = int(np.argmax(window_counts))
+        freq.busiest_hour_count = int(window_counts[busiest_hour])
+        freq.busiest_hour = from_timestamp(int(dates[window_starts[busiest_hour]]))
+
@@ -4,68 +4,68 @@ import discord
 
 # Custom libs
 
-from .scanner import Scanner
+from .multi_scanner import MultiScanner
+from .channels_scanner import ChannelsScanner
 from .composition_scanner import CompositionScanner
+from .emojis_scanner import EmojisScanner
 from .frequency_scanner import FrequencyScanner
+from .mentions_scanner import MentionsScanner
+from .messages_scanner import MessagesScanner
 from .presence_scanner import PresenceScanner
-from data_types import Frequency, Composition, Presence
-from logs import ChannelLogs, MessageLog
-from utils import generate_help
+from .reactions_scanner import ReactionsScanner
+from .words_scanner import WordsScanner
+from utils import generate_help, no_duplicate
 
 
-class FullScanner(Scanner):
+class FullScanner(MultiScanner):
+    SCANNERS = {
+        "freq": FrequencyScanner,
+        "compo": CompositionScanner,
+        "pres": PresenceScanner,
+        "words": WordsScanner,
+        "emojis": EmojisScanner,
+        "mentions": MentionsScanner,
+        "msg": MessagesScanner,
+        "chan": ChannelsScanner,
+        "react": ReactionsScanner,
+    }
+    DEFAULT = ["freq", "compo", "pres"]
+
     @staticmethod
     def help() -> str:
-        return generate_help("scan", "Show full statistics")
+        return generate_help(
+            "scan",
+            "Show full statistics",
+            args=[
+                f"{'/'.join(FullScanner.SCANNERS)} - analyses to run in one pass (default: {' '.join(FullScanner.DEFAULT)})",
+                "all/everyone - include bots",
+            ],
+            example="words emojis #mychannel1 @user",
+        )
 
     def __init__(self):
+        self.candidates = {
+            name: scanner() for name, scanner in FullScanner.SCANNERS.items()
+        }
         super().__init__(
-            valid_args=["all", "everyone"],
+            [],
+            has_digit_args=True,
+            valid_args=no_duplicate(
+                list(self.candidates)
+                + ["all", "everyone"]
+                + [
+                    arg
+                    for scanner in self.candidates.values()
+                    for arg in scanner.valid_args
+                ]
+            ),
             help=FullScanner.help(),
             intro_context="Full analysis",
         )
 
     async def init(self, message: discord.Message, *args: str) -> bool:
-        self.freq = Frequency()
-        self.compo = Composition()
-        self.pres = Presence()
-        self.member_specific = len(self.members) > 0
-        self.all_messages = "all" in args or "everyone" in args
-        return True
-
-    def compute_message(self, channel: ChannelLogs, message: MessageLog):
-        FrequencyScanner.analyse_message(
-            message, self.freq, self.raw_members, all_messages=self.all_messages
-        )
-        CompositionScanner.analyse_message(
-            message, self.compo, self.raw_members, all_messages=self.all_messages
-        )
-        PresenceScanner.analyse_message(
-            channel,
-            message,
-            self.pres,
-            self.raw_members,
-            all_messages=self.all_messages,
-        )
-        return (
-            (not message.bot or self.all_messages)
-            and len(self.raw_members) == 0
-            or message.author in self.raw_members
-        )
-
-    def get_results(self, intro: str) -> List[str]:
-        FrequencyScanner.compute_results(self.freq)
-        res = [intro]
-        res += ["__Frequency__:"]
-        res += self.freq.to_string(member_specific=self.member_specific)
-        res += ["__Composition__:"]
-        res += self.compo.to_string(self.msg_count)
-        res += ["__Presence__:"]
-        res += self.pres.to_string(
-            self.msg_count,
-            self.total_msg,
-            show_top_channel=len(self.channels) > 1,
-            member_specific=self.member_specific,
-            chan_count=len(self.channels) if not self.full else None,
-        )
-        return res
+        names = [arg for arg in args if arg in self.candidates]
+        if len(names) == 0:
+            names = FullScanner.DEFAULT
+        self.scanners = [self.candidates[name] for name in no_duplicate(names)]
+        return await super().init(message, *args)
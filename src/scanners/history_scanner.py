@@ -2,6 +2,7 @@ from abc import ABC, abstractmethod
 from typing import List, Tuple, Optional
 import discord
 import re
+import numpy as np
 
 # Custom libs
 
@@ -53,6 +54,27 @@ class HistoryScanner(Scanner, ABC):
             self.queries = []
         return True
 
+    def compute_channel(
+        self, channel_logs: ChannelLogs, *, after: Optional[int] = None
+    ) -> int:
+        # messages must match every query, the index narrows them down
+        found = None
+        for query in self.queries:
+            rows = channel_logs.search(
+                query[0] if query[1] is None else query[1], regex=query[1] is not None
+            )
+            if rows is not None:
+                found = rows if found is None else np.intersect1d(found, rows)
+        if found is None:
+            return super().compute_channel(channel_logs, after=after)
+        first, last = channel_logs.rows(self.start_date, self.stop_date, after=after)
+        return sum(
+            self.compute_message(channel_logs, message_log)
+            for message_log in channel_logs.store.select(
+                found[(found >= first) & (found < last)]
+            )
+        )
+
     def compute_message(self, channel: ChannelLogs, message: MessageLog):
         return HistoryScanner.analyse_message(
             channel,
@@ -8,7 +8,15 @@ import discord
 from logs import ChannelLogs, MessageLog
 from .scanner import Scanner
 from data_types import Counter
-from utils import generate_help, plural, precise, mention, alt_mention
+from utils import (
+    generate_help,
+    plural,
+    precise,
+    mention,
+    alt_mention,
+    rank,
+    utc_today,
+)
 
 
 class MentionedScanner(Scanner):
@@ -28,6 +36,7 @@ class MentionedScanner(Scanner):
             valid_args=["all"],
             help=MentionedScanner.help(),
             intro_context="Mentioned by members",
+            mergeable=True,
         )
 
     async def init(self, message: discord.Message, *args: str) -> bool:
@@ -50,21 +59,24 @@ class MentionedScanner(Scanner):
             message, self.mentions, self.raw_members, all_mentions=self.all_mentions
         )
 
+    def merge(self, other: "MentionedScanner"):
+        for name, counter in other.mentions.items():
+            self.mentions[name].merge(counter)
+
     def get_results(self, intro: str) -> List[str]:
-        names = [name for name in self.mentions]
-        names.sort(key=lambda name: self.mentions[name].score(), reverse=True)
-        names = names[: self.top]
+        today = utc_today()
+        names = rank(self.mentions, lambda counter: counter.score(today=today), self.top)
         usage_count = Counter.total(self.mentions)
         res = [intro]
         res += [
             self.mentions[name].to_string(
-                names.index(name),
+                i,
                 name,
                 total_usage=usage_count,
                 transform=lambda id: f" for {mention(id)}",
                 top=len(self.members) != 1,
             )
-            for name in names
+            for i, name in enumerate(names)
         ]
         res += [
             f"Total: {plural(usage_count,'time')} ({precise(usage_count/self.msg_count)}/msg)"
@@ -16,6 +16,8 @@ from utils import (
     alt_mention,
     role_mention,
     channel_mention,
+    rank,
+    utc_today,
 )
 
 
@@ -39,6 +41,8 @@ class MentionsScanner(Scanner):
             valid_args=["all", "everyone"],
             help=MentionsScanner.help(),
             intro_context="Mention usage",
+            filtered=True,
+            mergeable=True,
         )
 
     async def init(self, message: discord.Message, *args: str) -> bool:
@@ -62,21 +66,24 @@ class MentionsScanner(Scanner):
             all_messages=self.all_messages,
         )
 
+    def merge(self, other: "MentionsScanner"):
+        for name, counter in other.mentions.items():
+            self.mentions[name].merge(counter)
+
     def get_results(self, intro: str) -> List[str]:
-        names = [name for name in self.mentions]
-        names.sort(key=lambda name: self.mentions[name].score(), reverse=True)
-        names = names[: self.top]
+        today = utc_today()
+        names = rank(self.mentions, lambda counter: counter.score(today=today), self.top)
         usage_count = Counter.total(self.mentions)
         res = [intro]
         res += [
             self.mentions[name].to_string(
-                names.index(name),
+                i,
                 name,
                 total_usage=usage_count,
                 transform=lambda id: f" by {mention(id)}",
                 top=len(self.members) != 1,
             )
-            for name in names
+            for i, name in enumerate(names)
         ]
         res += [
             f"Total: {plural(usage_count,'time')} ({precise(usage_count/self.msg_count)}/msg)"
@@ -0,0 +1,93 @@
+from typing import List, Optional
+import inspect
+import discord
+
+
+# Custom libs
+
+from .scanner import Scanner
+from logs import ChannelLogs, MessageLog
+
+
+class MultiScanner(Scanner):
+    """
+    Feeds several scanners in a single pass over the messages
+    """
+
+    def __init__(self, scanners: List[Scanner], **kwargs):
+        super().__init__(**kwargs)
+        self.scanners = scanners
+
+    async def init(self, message: discord.Message, *args: str) -> bool:
+        self.all_messages = "all" in args or "everyone" in args
+        for scanner in self.scanners:
+            scanner.members = self.members
+            scanner.raw_members = self.raw_members
+            scanner.channels = self.channels
+            scanner.full = self.full
+            scanner.start_date = self.start_date
+            scanner.stop_date = self.stop_date
+            scanner.nsfw = self.nsfw
+            scanner.mention_users = self.mention_users
+            scanner.other_args = self.other_args
+            if not await scanner.init(message, *args):
+                return False
+        self.mergeable = all(scanner.mergeable for scanner in self.scanners)
+        self.needs_reactions = any(
+            scanner.needs_reactions for scanner in self.scanners
+        )
+        self.needs_tokens = any(scanner.needs_tokens for scanner in self.scanners)
+        self.needs_index = any(scanner.needs_index for scanner in self.scanners)
+        return True
+
+    def prepare(self, channel_logs: ChannelLogs):
+        for scanner in self.scanners:
+            scanner.prepare(channel_logs)
+
+    def compute_channel(
+        self, channel_logs: ChannelLogs, *, after: Optional[int] = None
+    ) -> int:
+        first, last = channel_logs.rows(self.start_date, self.stop_date, after=after)
+        # evaluate the author filter once per message for all scanners
+        authored = {}
+        for scanner in self.scanners + [self]:
+            if scanner.all_messages not in authored:
+                authored[scanner.all_messages] = channel_logs.store.authored(
+                    self.raw_members, all_messages=scanner.all_messages
+                )[first:last].tolist()
+        counts = [0] * len(self.scanners)
+        for message_log in channel_logs.store.range(first, last):
+            i = message_log.row - first
+            for j, scanner in enumerate(self.scanners):
+                if not scanner.filtered or authored[scanner.all_messages][i]:
+                    counts[j] += scanner.compute_message(channel_logs, message_log)
+        for scanner, count in zip(self.scanners, counts):
+            scanner.msg_count += count
+            scanner.chan_count += 1 if count > 0 else 0
+        return sum(authored[self.all_messages])
+
+    def compute_message(self, channel: ChannelLogs, message: MessageLog) -> bool:
+        for scanner in self.scanners:
+            scanner.compute_message(channel, message)
+        return (
+            (not message.bot or self.all_messages)
+            and len(self.raw_members) == 0
+            or message.author in self.raw_members
+        )
+
+    def merge(self, other: "MultiScanner"):
+        for scanner, partial in zip(self.scanners, other.scanners):
+            scanner.merge(partial)
+            scanner.msg_count += partial.msg_count
+            scanner.chan_count += partial.chan_count
+
+    async def get_results(self, intro: str) -> List[str]:
+        res = [intro]
+        for scanner in self.scanners:
+            scanner.total_msg = self.total_msg
+            header = f"__{scanner.intro_context}__:"
+            if inspect.iscoroutinefunction(scanner.get_results):
+                res += await scanner.get_results(header)
+            else:
+                res += scanner.get_results(header)
+        return res
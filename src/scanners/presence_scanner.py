@@ -20,6 +20,8 @@ class PresenceScanner(Scanner):
             valid_args=["all", "everyone"],
             help=PresenceScanner.help(),
             intro_context="Presence",
+            mergeable=True,
+            needs_reactions=True,
         )
 
     async def init(self, message: discord.Message, *args: str) -> bool:
@@ -37,6 +39,9 @@ class PresenceScanner(Scanner):
             all_messages=self.all_messages,
         )
 
+    def merge(self, other: "PresenceScanner"):
+        self.pres.merge(other.pres)
+
     def get_results(self, intro: str) -> List[str]:
         res = [intro]
         res += self.pres.to_string(
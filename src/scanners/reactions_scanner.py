@@ -8,7 +8,7 @@ import discord
 from logs import ChannelLogs, MessageLog
 from .scanner import Scanner
 from data_types import Counter
-from utils import generate_help, mention, channel_mention
+from utils import generate_help, mention, channel_mention, rank, utc_today
 
 
 class ReactionsScanner(Scanner):
@@ -26,6 +26,8 @@ class ReactionsScanner(Scanner):
             has_digit_args=True,
             help=ReactionsScanner.help(),
             intro_context="Reactions",
+            mergeable=True,
+            needs_reactions=True,
         )
 
     async def init(self, message: discord.Message, *args: str) -> bool:
@@ -45,22 +47,25 @@ class ReactionsScanner(Scanner):
             self.raw_members,
         )
 
+    def merge(self, other: "ReactionsScanner"):
+        for name, counter in other.messages.items():
+            self.messages[name].merge(counter)
+
     def get_results(self, intro: str) -> List[str]:
-        names = [name for name in self.messages]
-        names.sort(key=lambda name: self.messages[name].score(), reverse=True)
-        names = names[: self.top]
+        today = utc_today()
+        names = rank(self.messages, lambda counter: counter.score(today=today), self.top)
         usage_count = Counter.total(self.messages)
         res = [intro]
         res += [
             self.messages[name].to_string(
-                names.index(name),
+                i,
                 mention(name),
                 total_usage=usage_count,
                 counted="reaction",
                 transform=lambda id: f" in {channel_mention(id)}",
                 top=self.channels != 1,
             )
-            for name in names
+            for i, name in enumerate(names)
         ]
         return res
 
@@ -1,7 +1,12 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+import asyncio
 import logging
+import multiprocessing
+import os
+import pickle
 import re
 import discord
 import inspect
@@ -18,7 +23,8 @@ from utils import (
     command_cache,
     FilterLevel,
     SPLIT_TOKEN,
-    utc_now
+    utc_now,
+    emojis,
 )
 from logs import (
     GuildLogs,
@@ -29,6 +35,39 @@ from logs import (
     NO_FILE,
 )
 
+SCAN_WORKERS = int(os.getenv("SCAN_WORKERS", os.cpu_count() or 1))
+PARALLEL_MESSAGES = int(os.getenv("PARALLEL_MESSAGES", 20000))
+
+executor = None
+
+
+def get_executor() -> ProcessPoolExecutor:
+    global executor
+    if executor is None:
+        # forked workers would copy the whole bot (and its cached logs)
+        method = (
+            "forkserver"
+            if "forkserver" in multiprocessing.get_all_start_methods()
+            else "spawn"
+        )
+        executor = ProcessPoolExecutor(
+            SCAN_WORKERS,
+            mp_context=multiprocessing.get_context(method),
+            initializer=init_worker,
+        )
+    return executor
+
+
+def init_worker():
+    emojis.load_emojis()
+
+
+def compute_partial(blank: bytes, channel_logs: ChannelLogs) -> Tuple["Scanner", int]:
+    # runs in a worker process on a fresh copy of the scanner
+    scanner = pickle.loads(blank)
+    count = scanner.compute_channel(channel_logs)
+    return scanner, count
+
 
 class Scanner(ABC):
     VALID_ARGS = [
@@ -51,14 +90,30 @@ class Scanner(ABC):
         help: str,
         intro_context: str,
         all_args: bool = False,
+        filtered: bool = False,
+        mergeable: bool = False,
+        needs_reactions: bool = False,
+        needs_tokens: bool = False,
+        needs_index: bool = False,
     ):
         self.has_digit_args = has_digit_args
         self.valid_args = valid_args
         self.all_args = all_args
         self.help = help
         self.intro_context = intro_context
+        # compute_message ignores messages excluded by the author filter
+        self.filtered = filtered
+        # partial results computed on other channels can be merged
+        self.mergeable = mergeable
+        # reaction users are hydrated before scanning
+        self.needs_reactions = needs_reactions
+        # prepared channel parts sent to the scan workers
+        self.needs_tokens = needs_tokens
+        self.needs_index = needs_index
+        self.all_messages = False
 
         self.other_args = []
+        self.cache_args = []
 
         self.members = []
         self.raw_members = []
@@ -129,6 +184,17 @@ class Scanner(ABC):
                 for arg in self.other_args:
                     args.remove(arg)
 
+                # args changing the results of a channel, for the aggregate cache
+                self.cache_args = (
+                    sorted(
+                        arg
+                        for arg in args[1:]
+                        if arg in self.valid_args
+                        or (arg.isdigit() and self.has_digit_args)
+                    )
+                    + self.other_args
+                )
+
                 self.start_date = None if len(dates) < 1 else min(dates)
                 self.stop_date = None if len(dates) < 2 else max(dates)
 
@@ -201,6 +267,7 @@ class Scanner(ABC):
                         self.stop_date,
                         fast="fast" in args,
                         fresh="fresh" in args,
+                        hydrate=self.needs_reactions,
                     )
                     if total_msg == CANCELLED:
                         await message.channel.send(
@@ -235,26 +302,13 @@ class Scanner(ABC):
                         self.total_msg = 0
                         self.chan_count = 0
                         t0 = datetime.now()
-                        for channel in self.channels:
-                            if channel.id in logs.channels:
-                                channel_logs = logs.channels[channel.id]
-                                count = sum(
-                                    [
-                                        self.compute_message(channel_logs, message_log)
-                                        for message_log in channel_logs.messages
-                                        if (
-                                            self.start_date is None
-                                            or message_log.created_at >= self.start_date
-                                        )
-                                        and (
-                                            self.stop_date is None
-                                            or message_log.created_at <= self.stop_date
-                                        )
-                                    ]
-                                )
-                                self.total_msg += len(channel_logs.messages)
-                                self.msg_count += count
-                                self.chan_count += 1 if count > 0 else 0
+                        await self.compute_channels(
+                            [
+                                logs.channels[channel.id]
+                                for channel in self.channels
+                                if channel.id in logs.channels
+                            ]
+                        )
                         logging.info(f"scan {guild.id} > scanned in {delta(t0):,}ms")
                         if self.msg_count == 0:
                             await message.channel.send(
@@ -335,6 +389,124 @@ class Scanner(ABC):
             if progress is not None:
                 await progress.delete()
 
+    async def compute_channels(self, channels: List[ChannelLogs]):
+        emojis.load_emojis()
+        if not self.mergeable:
+            for channel_logs in channels:
+                self.prepare(channel_logs)
+                self.add_channel(channel_logs, self.compute_channel(channel_logs))
+                await asyncio.sleep(0)
+            return
+        # each channel is scanned on a fresh copy of the scanner so that its
+        # partial results can be cached, large uncached channels in worker
+        # processes and the others on the event loop between other commands
+        blank = pickle.dumps(self)
+        loop = asyncio.get_event_loop()
+        keys = {}
+        futures = {}
+        uncached = []
+        for channel_logs in channels:
+            keys[channel_logs.id] = self.aggregate_key(channel_logs)
+            if command_cache.get_aggregate(keys[channel_logs.id]) is None:
+                uncached += [channel_logs]
+                self.prepare(channel_logs)
+                await asyncio.sleep(0)
+        # channels are pickled for the workers once all of them are prepared
+        for channel_logs in uncached:
+            if SCAN_WORKERS > 0 and len(channel_logs.messages) >= PARALLEL_MESSAGES:
+                futures[channel_logs.id] = loop.run_in_executor(
+                    get_executor(),
+                    compute_partial,
+                    blank,
+                    channel_logs.scan_copy(
+                        reactions=self.needs_reactions,
+                        tokens=self.needs_tokens,
+                        index=self.needs_index,
+                    ),
+                )
+        # merged in channel order to get the same results as a sequential scan
+        for channel_logs in channels:
+            key = keys[channel_logs.id]
+            if channel_logs.id in futures:
+                partial, count = await futures[channel_logs.id]
+            else:
+                partial, count = self.compute_cached(blank, channel_logs, key)
+                await asyncio.sleep(0)
+            if key is not None:
+                command_cache.cache_aggregate(
+                    key, int(channel_logs.store.ids[-1]), pickle.dumps(partial), count
+                )
+            self.merge(partial)
+            self.add_channel(channel_logs, count)
+
+    def compute_cached(
+        self, blank: bytes, channel_logs: ChannelLogs, key: Optional[tuple]
+    ) -> Tuple["Scanner", int]:
+        cached = command_cache.get_aggregate(key)
+        if cached is None:
+            return compute_partial(blank, channel_logs)
+        # only scan the messages received since
+        last_id, state, count = cached
+        partial = pickle.loads(state)
+        suffix = pickle.loads(blank)
+        count += suffix.compute_channel(channel_logs, after=last_id)
+        partial.merge(suffix)
+        return partial, count
+
+    def aggregate_key(self, channel_logs: ChannelLogs) -> Optional[tuple]:
+        channel_logs.store.flush()
+        # dated scans cannot be extended with new messages
+        if (
+            self.start_date is not None
+            or self.stop_date is not None
+            or len(channel_logs.messages) == 0
+        ):
+            return None
+        return (
+            type(self).__name__,
+            channel_logs.guild.id,
+            channel_logs.id,
+            # older messages may be loaded later on
+            int(channel_logs.store.ids[0]),
+            tuple(self.cache_args),
+            tuple(sorted(self.raw_members)),
+            # reactions hydrated since change already scanned messages
+            len(channel_logs.store.unhydrated(*channel_logs.rows()))
+            if self.needs_reactions
+            else None,
+        )
+
+    def prepare(self, channel_logs: ChannelLogs):
+        # in-process work on a channel before it is scanned
+        pass
+
+    def add_channel(self, channel_logs: ChannelLogs, count: int):
+        self.total_msg += len(channel_logs.messages)
+        self.msg_count += count
+        self.chan_count += 1 if count > 0 else 0
+
+    def compute_channel(
+        self, channel_logs: ChannelLogs, *, after: Optional[int] = None
+    ) -> int:
+        return sum(
+            [
+                self.compute_message(channel_logs, message_log)
+                for message_log in channel_logs.range(
+                    self.start_date, self.stop_date, after=after
+                )
+            ]
+        )
+
+    def merge(self, other: "Scanner"):
+        raise NotImplementedError(f"{type(self).__name__} cannot merge results")
+
+    def __getstate__(self) -> dict:
+        # discord objects stay in the main process
+        state = dict(self.__dict__)
+        state["members"] = []
+        state["channels"] = []
+        return state
+
     @abstractmethod
     async def init(self, message: discord.Message, *args: str) -> bool:
         pass
@@ -1,14 +1,13 @@
 from typing import Dict, List
 from collections import defaultdict
 import discord
-import re
 
 # Custom libs
 
 from logs import ChannelLogs, MessageLog
 from .scanner import Scanner
 from data_types import Counter
-from utils import generate_help, plural, precise, mention
+from utils import generate_help, plural, precise, mention, rank, utc_today
 
 
 class WordsScanner(Scanner):
@@ -31,6 +30,9 @@ class WordsScanner(Scanner):
             valid_args=["all", "everyone"],
             help=WordsScanner.help(),
             intro_context="Words ({}+ letters)",
+            filtered=True,
+            mergeable=True,
+            needs_tokens=True,
         )
 
     async def init(self, message: discord.Message, *args: str) -> bool:
@@ -59,21 +61,28 @@ class WordsScanner(Scanner):
             letters_threshold=self.letters,
         )
 
+    def prepare(self, channel_logs: ChannelLogs):
+        channel_logs.tokenize()
+
+    def merge(self, other: "WordsScanner"):
+        for word, counter in other.words.items():
+            self.words[word].merge(counter)
+
     def get_results(self, intro: str) -> List[str]:
-        words = [word for word in self.words]
-        words.sort(key=lambda word: self.words[word].score(), reverse=True)
-        words = words[: self.top]
+        self.words = WordsScanner.fold(self.words)
+        today = utc_today()
+        words = rank(self.words, lambda counter: counter.score(today=today), self.top)
         usage_count = Counter.total(self.words)
         res = [intro.format(self.letters)]
         res += [
             self.words[word].to_string(
-                words.index(word),
+                i,
                 f"`{word}`",
                 total_usage=usage_count,
                 transform=lambda id: f" by {mention(id)}",
                 top=len(self.members) != 1,
             )
-            for word in words
+            for i, word in enumerate(words)
         ]
         res += [
             f"Total: {plural(usage_count,'time')} ({precise(usage_count/self.msg_count)}/msg)"
@@ -82,6 +91,24 @@ class WordsScanner(Scanner):
 
     special_cases = ["'s", "s"]
 
+    @staticmethod
+    def fold(words: Dict[str, Counter]) -> Dict[str, Counter]:
+        """
+        Merges the "'s" and "s" variants into their counted base word
+        """
+        # bases are shorter, so their own target is known first
+        targets = {}
+        for word in sorted(words, key=lambda word: (len(word), word)):
+            targets[word] = word
+            for case in WordsScanner.special_cases:
+                if word.endswith(case) and word[: -len(case)] in words:
+                    targets[word] = targets[word[: -len(case)]]
+                    break
+        folded = defaultdict(Counter)
+        for word in sorted(words):
+            folded[targets[word]].merge(words[word])
+        return folded
+
     @staticmethod
     def analyse_message(
         message: MessageLog,
@@ -99,24 +126,9 @@ class WordsScanner(Scanner):
             or message.author in raw_members
         ):
             impacted = True
-            content = message.content
-            content = re.sub(r"```.+```", "", content, flags=re.DOTALL)
-            content = re.sub(r"`.+`", "", content, flags=re.DOTALL)
-            content = re.sub(r"\w+:\/\/[^ ]+", "", content)
-            for word in re.split("[^\w\-':]", content):
-                m = re.match(
-                    r"(?!^:\w+:$)^[^\w]*((?![\d_])\w[\w\-']*(?![\d_])\w)[^\w]*$", word
-                )
-                if m:
-                    word = m[1].lower()
-                    if len(word) >= letters_threshold:
-                        for case in WordsScanner.special_cases:
-                            if word.endswith(case) and word[: -len(case)] in words:
-                                word = word[: -len(case)]
-                                break
-                            if word + case in words:
-                                words[word] = words[word + case]
-                                del words[word + case]
-                                break
-                        words[word].update_use(1, message.created_at, message.author)
+            # exact counts, plurals are folded with the results
+            created_at = message.created_at
+            for word in message.words:
+                if len(word) >= letters_threshold:
+                    words[word].update_use(1, created_at, message.author)
         return impacted
@@ -0,0 +1,62 @@
+# Compares loading format 3 JSON messages with binary message blocks
+# usage (from src): python -m tools.benchmark_codec [messages] [seed]
+import sys
+import json
+import gzip
+import random
+from types import SimpleNamespace
+from datetime import datetime
+
+import numpy as np
+
+from logs import MessageLog
+from logs.message_log import MessageRecord
+from logs.message_store import MessageStore
+from logs import message_codec
+from utils import delta, snowflake_timestamp
+
+MESSAGES = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+SEED = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+
+WORDS = ["hello", "there", "it's", "12", "<@1234>", "\U0001f44d", "été", "lol"]
+
+rng = random.Random(SEED)
+# messages read their columns through their channel
+channel = SimpleNamespace()
+store = channel.store = MessageStore(channel)
+id = 700000000000000000
+for _ in range(MESSAGES):
+    id += rng.randint(1, 1 << 32)
+    store.append(
+        MessageRecord(
+            id,
+            0 if rng.random() < 0.9 else snowflake_timestamp(id) + 1000,
+            rng.choice(range(100000000000000000, 100000000000000100)),
+            0,
+            rng.getrandbits(3) << 3,
+            " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 15))),
+            [id - 1] if rng.random() < 0.1 else [],
+            [],
+            [],
+            {"\U0001f44d": [id - 2]} if rng.random() < 0.1 else {},
+            {"\U0001f44d": 1},
+        )
+    )
+store.flush()
+print(f"{MESSAGES:,} messages")
+
+messages = [message.dict() for message in store]
+data = gzip.compress(bytes(json.dumps(messages), "utf-8"))
+t0 = datetime.now()
+loaded = MessageStore(None)
+for message in json.loads(gzip.decompress(data)):
+    loaded.append(MessageLog.record(message))
+loaded.flush()
+print(f"json: {len(data):,} bytes, loaded in {delta(t0):,}ms")
+
+data = gzip.compress(message_codec.encode(store, np.arange(len(store))))
+t0 = datetime.now()
+loaded = MessageStore(None)
+for block in message_codec.decode(gzip.decompress(data)):
+    loaded.extend(block)
+print(f"blocks: {len(data):,} bytes, loaded in {delta(t0):,}ms")
@@ -0,0 +1,43 @@
+# Compares the emoji matcher with the former alternation regex
+# usage (from src): python -m tools.benchmark_emojis [messages] [seed]
+import re
+import sys
+import random
+from datetime import datetime
+
+from utils import emojis, delta
+
+MESSAGES = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+SEED = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+
+WORDS = ["hello", "there", "it's", "12", "#3", "a:b", ":smile:", "<:custom:1234>"]
+
+t0 = datetime.now()
+emojis.load_emojis()
+print(f"matcher: loaded {len(emojis.unicode_list):,} emojis in {delta(t0):,}ms")
+
+t0 = datetime.now()
+escaped = [re.escape(unicode) for unicode in emojis.unicode_list]
+regex = re.compile(f"(<a?:\\w+:\\d+>|:\\w+:|{'|'.join(escaped)})")
+print(f"regex: compiled in {delta(t0):,}ms")
+
+rng = random.Random(SEED)
+messages = [
+    " ".join(
+        rng.choice(emojis.unicode_list) if rng.random() < 0.2 else rng.choice(WORDS)
+        for _ in range(rng.randint(1, 20))
+    )
+    for _ in range(MESSAGES)
+]
+
+t0 = datetime.now()
+expected = [regex.findall(message) for message in messages]
+print(f"regex: {MESSAGES:,} messages in {delta(t0):,}ms")
+
+t0 = datetime.now()
+found = [emojis.matcher.findall(message) for message in messages]
+print(f"matcher: {MESSAGES:,} messages in {delta(t0):,}ms")
+
+# the regex stops at the first listed emoji, the matcher at the longest one
+different = sum(1 for a, b in zip(expected, found) if a != b)
+print(f"{different:,} messages with different matches")
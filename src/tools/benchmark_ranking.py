@@ -0,0 +1,40 @@
+# Compares the former full sort with the heap ranking on a large vocabulary
+# usage (from src): python -m tools.benchmark_ranking [words] [top] [seed]
+import sys
+import random
+from datetime import datetime, timedelta
+
+from data_types import Counter
+from utils import delta, rank, utc_today
+
+WORDS = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+TOP = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+SEED = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+
+rng = random.Random(SEED)
+today = utc_today()
+words = {}
+for i in range(WORDS):
+    counter = Counter()
+    for _ in range(rng.randint(1, 3)):
+        counter.update_use(
+            int(rng.paretovariate(1.2)),
+            today - timedelta(days=rng.randint(0, 1000)),
+            rng.randint(0, 50),
+        )
+    words[f"word{i}"] = counter
+print(f"{WORDS:,} words, top {TOP}")
+
+t0 = datetime.now()
+names = [word for word in words]
+names.sort(key=lambda word: words[word].score(), reverse=True)
+names = names[:TOP]
+expected = [(names.index(word), word) for word in names]
+print(f"sort: {delta(t0):,}ms")
+
+t0 = datetime.now()
+names = rank(words, lambda counter: counter.score(today=today), TOP)
+found = list(enumerate(names))
+print(f"rank: {delta(t0):,}ms")
+
+print("same ranking" if expected == found else "different ranking")
@@ -3,6 +3,8 @@ import os.path
 from dotenv import load_dotenv
 from cryptography.fernet import Fernet
 
+from logs.log_file import HEADER
+
 load_dotenv()
 
 LOG_DIR = os.getenv("LOG_DIR", "logs")
@@ -17,6 +19,9 @@ for item in os.listdir(LOG_DIR):
         data = None
         with open(path, mode="rb") as f:
             data = f.read()
+        if data.startswith(HEADER):
+            print(f"{item} is chunked, frames are encrypted on save")
+            continue
         try:
             fernet.decrypt(data)
             print(f"{item} already encrypted")
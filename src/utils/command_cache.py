@@ -1,11 +1,23 @@
-from typing import List
+from typing import List, Optional, Tuple
+from collections import OrderedDict
+import os
 import logging
 import discord
+from dotenv import load_dotenv
 
 from scanners import Scanner
 
+load_dotenv()
+
 command_cache = {}
 
+# per-channel partial results of mergeable scanners
+# key -> (last message id, pickled scanner, message count)
+aggregate_cache = OrderedDict()
+# memory budget of the pickled partial results, 0 to disable
+AGGREGATE_CACHE_MB = float(os.getenv("AGGREGATE_CACHE_MB", 64))
+aggregate_bytes = 0
+
 
 def cache(scanner: Scanner, message: discord.Message, args: List[str]):
     id = message.channel.id
@@ -43,3 +55,35 @@ async def repeat(
     await scannerType().compute(
         client, message, *args, other_mentions=original_mentions
     )
+
+
+def get_aggregate(key: Optional[tuple]) -> Optional[Tuple[int, bytes, int]]:
+    if key not in aggregate_cache:
+        return None
+    aggregate_cache.move_to_end(key)
+    return aggregate_cache[key]
+
+
+def cache_aggregate(key: tuple, last_id: int, state: bytes, count: int):
+    global aggregate_bytes
+    budget = AGGREGATE_CACHE_MB * 1024 * 1024
+    forget_aggregate(key)
+    if len(state) > budget:
+        return
+    aggregate_cache[key] = (last_id, state, count)
+    aggregate_bytes += len(state)
+    while aggregate_bytes > budget:
+        _, (_, evicted, _) = aggregate_cache.popitem(last=False)
+        aggregate_bytes -= len(evicted)
+
+
+def forget_aggregate(key: tuple):
+    global aggregate_bytes
+    if key in aggregate_cache:
+        _, state, _ = aggregate_cache.pop(key)
+        aggregate_bytes -= len(state)
+
+
+def forget_guild(guild_id: int):
+    for key in [key for key in aggregate_cache if key[1] == guild_id]:
+        forget_aggregate(key)
@@ -1,6 +1,8 @@
+from typing import Iterable, Iterator, List, Set, Tuple
 import re
 import json
 import logging
+import threading
 
 from . import get_resource_path
 
@@ -61,28 +63,80 @@ EXTRA_EMOJI = {
     "punch": "1F44A",
 }
 
+
+class EmojiMatcher:
+    """
+    Finds custom emojis and unicode emojis in a text, in order like
+    regex.findall, unicode sequences are matched with the longest one
+    """
+
+    def __init__(self, sequences: Iterable[str]):
+        self.sequences = set(sequences)
+        self.max_length = max((len(sequence) for sequence in self.sequences), default=0)
+        pattern = "<a?:\\w+:\\d+>|:\\w+:"
+        if len(self.sequences) > 0:
+            # runs of characters that can be part of unicode emojis
+            starts = {sequence[0] for sequence in self.sequences}
+            parts = {char for sequence in self.sequences for char in sequence[1:]}
+            pattern += f"|{char_class(starts)}{char_class(parts)}*"
+        self.regex = re.compile(pattern)
+
+    def find(self, content: str) -> Iterator[Tuple[int, str]]:
+        # (start, emoji) of each match
+        for match in self.regex.finditer(content):
+            text = match[0]
+            if text[0] == "<" or text[0] == ":":
+                yield match.start(), text
+                continue
+            i = 0
+            while i < len(text):
+                for j in range(min(len(text), i + self.max_length), i, -1):
+                    if text[i:j] in self.sequences:
+                        yield match.start() + i, text[i:j]
+                        i = j
+                        break
+                else:
+                    i += 1
+
+    def findall(self, content: str) -> List[str]:
+        return [emoji for _, emoji in self.find(content)]
+
+
+def char_class(chars: Set[str]) -> str:
+    return f"[{''.join(re.escape(char) for char in sorted(chars))}]"
+
+
 global_list = {}
 unicode_list = []
-regex = re.compile("(<a?:[\\w\\-\\~]+:\\d+>|:[\\w\\-\\~]+:)")
+unicode_set = set()
+matcher = EmojiMatcher([])
+load_lock = threading.Lock()
 
 
 def load_emojis():
-    global global_list, unicode_list, regex
-    emoji_list = []
-    with open(get_resource_path("emoji.json"), mode="r") as f:
-        emoji_list = json.loads(f.readline().strip())
-    for emoji in EXTRA_EMOJI:
-        emoji_list += [{"short_name": emoji, "unified": EXTRA_EMOJI[emoji]}]
-    unicode_list_escaped = []
-    for emoji in emoji_list:
-        shortname = emoji["short_name"]
-        unified = emoji["unified"]
-        if unified is not None and shortname is not None:
-            unicode_escaped = "".join([f"\\U{c:0>8}" for c in unified.split("-")])
-            unicode = bytes(unicode_escaped, "ascii").decode("unicode-escape")
-            shortcode = shortname.replace("-", "_")
-            global_list[unicode] = f":{shortcode}:"
-            unicode_list += [unicode]
-            unicode_list_escaped += [unicode_escaped]
-    regex = re.compile(f"(<a?:\\w+:\\d+>|:\\w+:|{'|'.join(unicode_list_escaped)})")
-    logging.info(f"loaded {len(unicode_list)} emojis")
+    # loaded once, on first use or by the warm-up after startup
+    global global_list, unicode_list, unicode_set, matcher
+    with load_lock:
+        if len(unicode_list) > 0:
+            return
+        emoji_list = []
+        with open(get_resource_path("emoji.json"), mode="r") as f:
+            emoji_list = json.loads(f.readline().strip())
+        for emoji in EXTRA_EMOJI:
+            emoji_list += [{"short_name": emoji, "unified": EXTRA_EMOJI[emoji]}]
+        names = {}
+        unicodes = []
+        for emoji in emoji_list:
+            shortname = emoji["short_name"]
+            unified = emoji["unified"]
+            if unified is not None and shortname is not None:
+                unicode = "".join(chr(int(c, 16)) for c in unified.split("-"))
+                shortcode = shortname.replace("-", "_")
+                names[unicode] = f":{shortcode}:"
+                unicodes += [unicode]
+        global_list = names
+        unicode_set = set(unicodes)
+        matcher = EmojiMatcher(unicodes)
+        # set last, other threads check it to know the tables are ready
+        unicode_list = unicodes
+        logging.info(f"loaded {len(unicode_list)} emojis")
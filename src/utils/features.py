@@ -0,0 +1,36 @@
+from typing import List, NamedTuple
+import re
+
+from . import emojis
+
+LINK_REGEX = re.compile(r"https?:\/\/")
+SPOILER_REGEX = re.compile(r"\|\|[^|]+\|\|")
+
+
+class Features(NamedTuple):
+    length: int
+    emojis: List[str]
+    emoji_only: bool
+    links: int
+    spoiler: bool
+
+
+def extract(content: str) -> Features:
+    # everything the scanners derive from a message's text, in one pass
+    found = []
+    rest = []
+    end = 0
+    for start, emoji in emojis.matcher.find(content):
+        found += [emoji]
+        rest += [content[end:start]]
+        end = start + len(emoji)
+    rest += [content[end:]]
+    return Features(
+        len(content),
+        found,
+        len(found) > 0
+        and len(content.strip()) > 0
+        and len("".join(rest).strip()) == 0,
+        len(LINK_REGEX.findall(content)),
+        "||" in content and SPOILER_REGEX.search(content) is not None,
+    )
@@ -0,0 +1,44 @@
+from typing import Dict, List
+import re
+
+# removed before splitting words (same order as before)
+CODE_BLOCK_REGEX = re.compile(r"```.+```", re.DOTALL)
+CODE_REGEX = re.compile(r"`.+`", re.DOTALL)
+URL_REGEX = re.compile(r"\w+:\/\/[^ ]+")
+
+# one pass over the runs of word characters, ' - and :
+# a word starts and ends with a letter, :emoji: codes are skipped
+WORD_REGEX = re.compile(
+    r"(?<![\w\-':])(?!:\w+:(?![\w\-':]))[\-':]*((?![\d_])\w[\w\-']*(?![\d_])\w)[\-':]*(?![\w\-':])"
+)
+
+
+def tokenize(content: str) -> List[str]:
+    if "`" in content:
+        content = CODE_BLOCK_REGEX.sub("", content)
+        content = CODE_REGEX.sub("", content)
+    if "://" in content:
+        content = URL_REGEX.sub("", content)
+    return [m[1].lower() for m in WORD_REGEX.finditer(content)]
+
+
+class Vocabulary:
+    """
+    Guild-wide ids of the tokenized words
+    """
+
+    def __init__(self):
+        self.words: List[str] = []
+        self.index: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def ids(self, words: List[str]) -> List[int]:
+        ids = []
+        for word in words:
+            if word not in self.index:
+                self.index[word] = len(self.words)
+                self.words += [word]
+            ids += [self.index[word]]
+        return ids
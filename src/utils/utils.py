@@ -4,6 +4,7 @@ import os
 import logging
 import discord
 import math
+import heapq
 from datetime import datetime, timedelta, timezone
 import re
 import time
@@ -183,8 +184,32 @@ def top_key(
     if len(d) == 0:
         return None
     if key is None:
-        key = lambda k: d[k]
-    return sorted(d, key=key, reverse=reverse)[-1]
+        key = d.__getitem__
+    # last of the sorted keys: the last inserted one among ties
+    keys = reversed(list(d))
+    return min(keys, key=key) if reverse else max(keys, key=key)
+
+
+def rank(
+    d: Dict[Any, Any], score: Callable[[Any], float], top: Optional[int] = None
+) -> List[Any]:
+    # keys by decreasing score of their value (ties keep their order),
+    # same as sorting then slicing to top but in O(n log top)
+    if top is not None and 0 <= top < len(d):
+        return heapq.nlargest(top, d, key=lambda k: score(d[k]))
+    return sorted(d, key=lambda k: score(d[k]), reverse=True)[:top]
+
+
+def merge_counts(counts: Dict[Any, int], other: Dict[Any, int]):
+    """
+    Add other's counts to counts, keys end up sorted so that the result
+    (and top_key ties) does not depend on the merge order
+    """
+    for key, count in other.items():
+        counts[key] = counts.get(key, 0) + count
+    items = sorted(counts.items())
+    counts.clear()
+    counts.update(items)
 
 
 def val_sum(d: Dict[Any, int]) -> int:
@@ -252,7 +277,11 @@ def parse_iso_datetime(str_date: str) -> datetime:
         "^\d{4}(-\d{2}(-\d{2}(T\d{2}(:\d{2}(:\d{2}(:\d{2})?)?)?)?)?)?$", str_date
     ):
         str_date = str_date + "0000-01-01T00:00:00"[len(str_date) :]
-    return dateutil.parser.parse(str_date)
+    date = dateutil.parser.parse(str_date)
+    # compared with the (aware) relative dates and message dates
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return date
 
 
 RELATIVE_REGEX = r"(yesterday|today|\d*hours?|\d+h(ours?)?|\d*days?|\d+d(ays?)?|\d*weeks?|\d+w(eeks?)?|\d*months?|\d+m(onths?)?|\d*years?|\d+y(ears?)?)"
@@ -266,6 +295,36 @@ def utc_today() -> datetime:
     return datetime(today.year, today.month, today.day, tzinfo=timezone.utc)
 
 
+def to_timestamp(date: datetime) -> int:
+    # epoch ms, naive dates are assumed UTC
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return int(date.timestamp() * 1000)
+
+
+def from_timestamp(timestamp: int) -> datetime:
+    return datetime.fromtimestamp(timestamp / 1000, tz=timezone.utc)
+
+
+DISCORD_EPOCH = 1420070400000
+MAX_SNOWFLAKE = (1 << 63) - 1
+
+
+def snowflake_timestamp(id: int) -> int:
+    # epoch ms of a discord id
+    return (id >> 22) + DISCORD_EPOCH
+
+
+def timestamp_snowflake(timestamp: int, *, high: bool = False) -> int:
+    # first (or last) possible id at an epoch ms, within the stored ids range
+    id = ((timestamp - DISCORD_EPOCH) << 22) + ((1 << 22) - 1 if high else 0)
+    return min(max(id, 0), MAX_SNOWFLAKE)
+
+
+def date_snowflake(date: datetime, *, high: bool = False) -> int:
+    return timestamp_snowflake(to_timestamp(date), high=high)
+
+
 def parse_relative_time(src: str) -> datetime:
     if src == "today":
         return utc_today()
@@ -0,0 +1,46 @@
+from unittest.mock import MagicMock
+from datetime import datetime, timedelta, timezone
+import pickle
+
+from src.data_types import Emoji
+from src.scanners import EmojisScanner
+from tests.utils import AsyncTestCase
+
+NOW = datetime.now(timezone.utc)
+
+
+class FakeEmoji:
+    def __init__(self, name: str):
+        self.name = name
+        self.created_at = NOW - timedelta(days=10)
+
+    def __str__(self) -> str:
+        return f"<:{self.name}:1>"
+
+
+class TestEmojisScanner(AsyncTestCase):
+    def scanner(self, emojis: list) -> EmojisScanner:
+        scanner = EmojisScanner()
+        message = MagicMock()
+        message.channel.guild.emojis = emojis
+        self._await(scanner.init(message))
+        scanner.msg_count = 1
+        return scanner
+
+    def test_deleted_emoji(self):
+        kept, deleted = FakeEmoji("kept"), FakeEmoji("deleted")
+        # partial result of a channel, cached while both emojis existed
+        partial = self.scanner([kept, deleted])
+        partial.emojis[str(kept)].usages += 1
+        partial.emojis[str(kept)].update_use(NOW, [1])
+        cached = pickle.loads(pickle.dumps(partial))
+        # merged once the emoji was deleted
+        scanner = self.scanner([kept])
+        scanner.merge(cached)
+        self.assertListEqual([str(kept)], list(scanner.emojis))
+        results = scanner.get_results("")
+        self.assertIn(str(kept), results[1])
+
+    def test_unknown_emoji(self):
+        # never used and without a guild emoji to date it
+        self.assertEqual(0, Emoji().use_days())
@@ -0,0 +1,55 @@
+from unittest import TestCase
+from unittest.mock import MagicMock
+import random
+
+import numpy as np
+
+from src.data_types import Frequency
+from src.logs import ChannelLogs
+from src.scanners import FrequencyScanner, Scanner
+from tests.unit.logs.test_reaction_fetcher import message_dict
+
+
+def channel_logs(n: int) -> ChannelLogs:
+    messages = []
+    for id in range(1, n + 1):
+        message = message_dict(id << 22, {}, {})
+        message["author"] = random.randrange(1, 5)
+        message["bot"] = message["author"] == 4
+        messages += [message]
+    return ChannelLogs(
+        {
+            "format": 3,
+            "id": 7,
+            "name": "chan",
+            "last_message_id": n << 22,
+            "messages": messages,
+        },
+        MagicMock(id=1),
+    )
+
+
+def scanner(raw_members: list, all_messages: bool) -> FrequencyScanner:
+    scanner = FrequencyScanner()
+    scanner.freq = Frequency()
+    scanner.raw_members = raw_members
+    scanner.all_messages = all_messages
+    scanner.start_date = None
+    scanner.stop_date = None
+    return scanner
+
+
+class TestFrequencyScanner(TestCase):
+    def test_columns(self):
+        random.seed(0)
+        logs = channel_logs(50)
+        for raw_members, all_messages in [([], False), ([], True), ([2, 4], False)]:
+            columns = scanner(raw_members, all_messages)
+            rows = scanner(raw_members, all_messages)
+            count = columns.compute_channel(logs, after=10 << 22)
+            # one message at a time
+            self.assertEqual(
+                Scanner.compute_channel(rows, logs, after=10 << 22), count
+            )
+            for expected, column in zip(rows.freq.columns(), columns.freq.columns()):
+                np.testing.assert_array_equal(expected, column)
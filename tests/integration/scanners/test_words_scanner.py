@@ -0,0 +1,39 @@
+from unittest import TestCase
+from unittest.mock import MagicMock
+from collections import defaultdict
+from datetime import datetime, timezone
+import itertools
+
+from src.data_types import Counter
+from src.scanners import WordsScanner
+
+NOW = datetime.now(timezone.utc)
+
+
+def count(messages: list) -> dict:
+    words = defaultdict(Counter)
+    for author, content in messages:
+        WordsScanner.analyse_message(
+            MagicMock(words=content.split(), bot=False, author=author, created_at=NOW),
+            words,
+            [],
+            all_messages=False,
+            letters_threshold=3,
+        )
+    folded = WordsScanner.fold(words)
+    return {word: dict(folded[word].usages) for word in folded}
+
+
+class TestWordsScanner(TestCase):
+    def test_fold(self):
+        self.assertDictEqual(
+            {"cat": {1: 3, 2: 1}, "dog's": {2: 1}, "dogss": {1: 1}, "bus": {1: 1}},
+            count([(1, "cats cat's cat"), (2, "cats dog's"), (1, "dogss bus")]),
+        )
+
+    def test_order_independent(self):
+        messages = [(1, "cats"), (2, "cat's"), (1, "cat"), (2, "catss")]
+        results = [count(list(order)) for order in itertools.permutations(messages)]
+        self.assertDictEqual({"cat": {1: 2, 2: 2}}, results[0])
+        for result in results:
+            self.assertDictEqual(results[0], result)
@@ -0,0 +1,35 @@
+from unittest import TestCase
+from datetime import datetime, timezone
+import pickle
+import random
+
+from src.data_types import Counter
+
+NOW = datetime.now(timezone.utc)
+
+
+def sorted_top(d: dict):
+    # previous top_key: last of the keys sorted by count
+    return sorted(d, key=lambda k: d[k])[-1] if len(d) > 0 else None
+
+
+class TestCounter(TestCase):
+    def test_running_top(self):
+        rng = random.Random(0)
+        for _ in range(200):
+            counter = Counter()
+            for _ in range(rng.randrange(1, 30)):
+                counter.update_use(rng.randrange(3), NOW, rng.randrange(6))
+                self.assertEqual(sorted_top(counter.usages), counter.top())
+                self.assertEqual(sum(counter.usages.values()), counter.all_usages())
+
+    def test_merge(self):
+        a = Counter()
+        b = Counter()
+        a.update_use(2, NOW, 1)
+        b.update_use(2, NOW, 2)
+        b.update_use(1, NOW, 1)
+        a.merge(pickle.loads(pickle.dumps(b)))
+        self.assertEqual(5, a.all_usages())
+        self.assertEqual(1, a.top())
+        self.assertEqual(5, Counter.total({"a": a, "b": Counter()}))
@@ -0,0 +1,188 @@
+from unittest import TestCase
+from datetime import datetime, timedelta, timezone
+import itertools
+import pickle
+import random
+
+from src.data_types import Counter, Emoji, Composition, Presence, Frequency, History
+from src.scanners import FrequencyScanner
+from tests.utils import fake_message
+
+NOW = datetime.now(timezone.utc)
+MEMBERS = [1, 2, 3, 4]
+EMOJIS = [":a:", ":b:", ":c:"]
+
+
+def random_date() -> datetime:
+    return NOW - timedelta(minutes=random.randrange(60 * 24 * 30))
+
+
+def fill_counter(counter: Counter):
+    for _ in range(random.randrange(1, 10)):
+        counter.update_use(random.randrange(3), random_date(), random.choice(MEMBERS))
+
+
+def fill_emoji(emoji: Emoji):
+    for _ in range(random.randrange(1, 10)):
+        emoji.usages += 1
+        emoji.update_use(random_date(), random.sample(MEMBERS, 2))
+
+
+def fill_composition(compo: Composition):
+    for key in compo.__dict__:
+        if key == "emojis":
+            for emoji in random.sample(EMOJIS, 2):
+                compo.emojis[emoji] += random.randrange(1, 3)
+        else:
+            setattr(compo, key, random.randrange(10))
+
+
+def fill_presence(pres: Presence):
+    for key in pres.__dict__:
+        counts = getattr(pres, key)
+        for item in random.sample(EMOJIS if key == "reactions" else MEMBERS, 2):
+            counts[item] += random.randrange(1, 3)
+    # a channel's usage is part of its total
+    for channel, count in pres.channel_usage.items():
+        pres.channel_total[channel] += count
+
+
+def fill_frequency(freq: Frequency, channel: int, ids: iter):
+    for _ in range(random.randrange(1, 20)):
+        freq.add(
+            next(ids),
+            int(random_date().timestamp() * 1000),
+            random.choice(MEMBERS),
+            channel,
+            random.random() < 0.8,
+        )
+
+
+def fill_history(history: History, ids: iter):
+    for _ in range(random.randrange(1, 5)):
+        history.messages += [
+            fake_message(id=next(ids), created_at=random_date().replace(second=0))
+        ]
+
+
+def merge_all(parts: list) -> object:
+    result = parts[0]
+    for part in parts[1:]:
+        result.merge(part)
+    return result
+
+
+class TestMerge(TestCase):
+    def check_merge_order(self, make, to_string, *, pickled: bool = True):
+        for seed in range(20):
+            random.seed(seed)
+            n = random.randrange(2, 5)
+            expected = None
+            for order in itertools.permutations(range(n)):
+                random.seed(seed)
+                parts = make(n)
+                merged = merge_all([parts[i] for i in order])
+                if expected is None:
+                    expected = to_string(merged)
+                self.assertEqual(expected, to_string(merged))
+            # grouping does not matter either
+            random.seed(seed)
+            parts = make(n)
+            right = merge_all([parts[0], merge_all(parts[1:])])
+            self.assertEqual(expected, to_string(right))
+            # nor going through pickle
+            if not pickled:
+                continue
+            random.seed(seed)
+            parts = [pickle.loads(pickle.dumps(part)) for part in make(n)]
+            self.assertEqual(expected, to_string(merge_all(parts)))
+
+    def test_counter(self):
+        def make(n):
+            parts = [Counter() for _ in range(n)]
+            for part in parts:
+                fill_counter(part)
+            return parts
+
+        self.check_merge_order(
+            make,
+            lambda counter: counter.to_string(
+                0, "name", total_usage=100, transform=lambda id: f" by {id}"
+            ),
+        )
+
+    def test_emoji(self):
+        def make(n):
+            parts = [Emoji() for _ in range(n)]
+            for part in parts:
+                fill_emoji(part)
+            return parts
+
+        self.check_merge_order(
+            make,
+            lambda emoji: emoji.to_string(
+                0,
+                ":a:",
+                total_usage=100,
+                total_react=100,
+                show_life=False,
+                show_members=True,
+            ),
+        )
+
+    def test_composition(self):
+        def make(n):
+            parts = [Composition() for _ in range(n)]
+            for part in parts:
+                fill_composition(part)
+            return parts
+
+        self.check_merge_order(make, lambda compo: compo.to_string(100))
+
+    def test_presence(self):
+        def make(n):
+            parts = [Presence() for _ in range(n)]
+            for part in parts:
+                fill_presence(part)
+            return parts
+
+        for member_specific in [True, False]:
+            self.check_merge_order(
+                make,
+                lambda pres: pres.to_string(
+                    100,
+                    1000,
+                    chan_count=None,
+                    show_top_channel=True,
+                    member_specific=member_specific,
+                ),
+            )
+
+    def test_frequency(self):
+        def make(n):
+            ids = itertools.count(1)
+            parts = [Frequency() for _ in range(n)]
+            for i, part in enumerate(parts):
+                fill_frequency(part, i, ids)
+            return parts
+
+        def to_string(freq):
+            FrequencyScanner.compute_results(freq)
+            return freq.to_string(member_specific=False)
+
+        self.check_merge_order(make, to_string)
+
+    def test_history(self):
+        def make(n):
+            ids = itertools.count(1)
+            parts = [History() for _ in range(n)]
+            for part in parts:
+                fill_history(part, ids)
+            return parts
+
+        for type in ["first", "last"]:
+            self.check_merge_order(
+                make,
+                lambda history: history.to_string(type=type),
+                pickled=False,
+            )
@@ -0,0 +1,51 @@
+from unittest import TestCase
+from unittest.mock import MagicMock
+import pickle
+
+from src.logs import ChannelLogs
+from src.utils.tokenizer import Vocabulary
+from tests.unit.logs.test_reaction_fetcher import message_dict
+
+
+class TestScanCopy(TestCase):
+    def setUp(self):
+        self.channel_logs = ChannelLogs(
+            {
+                "format": 3,
+                "id": 1,
+                "name": "chan",
+                "last_message_id": 2,
+                "messages": [
+                    message_dict(1, {"a": [4]}, {"a": 1}),
+                    message_dict(2, {}, {}),
+                ],
+            },
+            MagicMock(id=1, vocabulary=Vocabulary()),
+        )
+        self.channel_logs.tokenize()
+        self.channel_logs.update_index()
+
+    def test_stripped(self):
+        copy = pickle.loads(
+            pickle.dumps(
+                self.channel_logs.scan_copy(reactions=False, tokens=False, index=False)
+            )
+        )
+        self.assertIsNone(copy.index)
+        self.assertIsNone(copy.store.vocabulary)
+        self.assertIs(copy, copy.store.channel)
+        self.assertListEqual([1, 2], [message.id for message in copy.messages])
+        self.assertDictEqual({}, list(copy.messages)[0].reactions)
+        # the original channel keeps everything
+        self.assertIsNotNone(self.channel_logs.index)
+        self.assertDictEqual({"a": [4]}, list(self.channel_logs.messages)[0].reactions)
+
+    def test_kept(self):
+        copy = pickle.loads(
+            pickle.dumps(
+                self.channel_logs.scan_copy(reactions=True, tokens=True, index=True)
+            )
+        )
+        self.assertIsNotNone(copy.index)
+        self.assertEqual(2, len(copy.store.string_tokens))
+        self.assertDictEqual({"a": [4]}, list(copy.messages)[0].reactions)
@@ -0,0 +1,184 @@
+from unittest.mock import MagicMock
+from datetime import datetime, timedelta, timezone
+import asyncio
+import logging
+import time
+import discord
+
+from src.logs import ChannelLogs
+from src.logs.fetch_scheduler import (
+    FetchScheduler,
+    RateLimitHandler,
+    HIGH,
+    NORMAL,
+    RETRY_LOG,
+)
+from tests.utils import AsyncTestCase
+
+NOW = datetime.now(timezone.utc)
+
+
+def fake_discord_message(id: int):
+    return MagicMock(
+        spec=discord.Message,
+        id=id,
+        created_at=NOW - timedelta(minutes=1000 - id),
+        edited_at=None,
+        author=MagicMock(id=1, bot=False, system=False),
+        reference=None,
+        pinned=False,
+        mention_everyone=False,
+        tts=False,
+        content=f"message {id}",
+        raw_mentions=[],
+        raw_role_mentions=[],
+        raw_channel_mentions=[],
+        attachments=[],
+        embeds=[],
+        reactions=[],
+    )
+
+
+class FakeHistory:
+    """
+    Stand-in for discord.TextChannel.history recording concurrent fetches
+    """
+
+    def __init__(self, count: int, stats: dict, latency: float = 0.001):
+        self.messages = [fake_discord_message(id) for id in range(1, count + 1)]
+        self.last_message_id = count
+        self.stats = stats
+        self.latency = latency
+
+    async def history(self, *, limit=100, before=None, after=None, oldest_first=False):
+        self.stats["active"] += 1
+        self.stats["max"] = max(self.stats["max"], self.stats["active"])
+        try:
+            messages = [
+                message
+                for message in self.messages
+                if (before is None or message.id < before.id)
+                and (after is None or after.id is None or message.id > after.id)
+            ]
+            if not oldest_first:
+                messages = messages[::-1]
+            for message in messages[:limit]:
+                await asyncio.sleep(self.latency)
+                yield message
+        finally:
+            self.stats["active"] -= 1
+
+
+def empty_channel_logs(id: int, guild_id: int = 1) -> ChannelLogs:
+    return ChannelLogs(
+        {"format": 3, "id": id, "name": f"chan{id}", "last_message_id": None, "messages": []},
+        MagicMock(id=guild_id),
+    )
+
+
+async def load(channel_logs: ChannelLogs, channel: FakeHistory, fetcher: FetchScheduler):
+    async for count, done in channel_logs.load(channel, None, None, fetcher=fetcher):
+        pass
+    return count
+
+
+class TestFetchScheduler(AsyncTestCase):
+    def test_concurrency_cap(self):
+        async def run():
+            fetcher = FetchScheduler(3)
+            stats = {"active": 0, "max": 0}
+            channels = [FakeHistory(20, stats) for _ in range(10)]
+            logs = [empty_channel_logs(i) for i in range(10)]
+            counts = await asyncio.gather(
+                *[load(log, channel, fetcher) for log, channel in zip(logs, channels)]
+            )
+            return fetcher, stats, counts
+
+        fetcher, stats, counts = self._await(run())
+        self.assertListEqual([20] * 10, counts)
+        self.assertLessEqual(stats["max"], 3)
+        self.assertGreater(stats["max"], 1)
+        self.assertEqual(0, fetcher.active)
+
+    def test_priority_and_fairness(self):
+        async def run():
+            fetcher = FetchScheduler(1)
+            order = []
+
+            async def fetch(name: str, guild_id: int, priority: int):
+                async with fetcher.slot(guild_id, priority):
+                    order.append(name)
+                    await asyncio.sleep(0)
+
+            holder = fetcher.slot(0)
+            await holder.__aenter__()
+            tasks = [
+                asyncio.ensure_future(fetch(name, guild_id, priority))
+                for name, guild_id, priority in [
+                    ("a1", 1, NORMAL),
+                    ("a2", 1, NORMAL),
+                    ("a3", 1, NORMAL),
+                    ("b1", 2, NORMAL),
+                    ("c1", 3, HIGH),
+                ]
+            ]
+            await asyncio.sleep(0)
+            await holder.__aexit__(None, None, None)
+            await asyncio.gather(*tasks)
+            return order
+
+        self.assertListEqual(["c1", "a1", "b1", "a2", "a3"], self._await(run()))
+
+    def test_rate_limit(self):
+        async def run():
+            fetcher = FetchScheduler(8)
+            with self.assertRaises(discord.RateLimited):
+                async with fetcher.slot(1):
+                    raise discord.RateLimited(0.05)
+            limit = fetcher.limit
+            loop = asyncio.get_event_loop()
+            t0 = loop.time()
+            async with fetcher.slot(1):
+                pass
+            return limit, loop.time() - t0
+
+        limit, waited = self._await(run())
+        self.assertEqual(4, limit)
+        self.assertGreaterEqual(waited, 0.04)
+
+    def test_retried_rate_limit(self):
+        fetcher = FetchScheduler(8)
+        handler = RateLimitHandler(fetcher)
+
+        def retried(method: str, retry_after: float):
+            handler.handle(
+                logging.makeLogRecord(
+                    {
+                        "levelno": logging.WARNING,
+                        "msg": RETRY_LOG,
+                        "args": (method, "https://discord.com/api/v10/x", retry_after),
+                    }
+                )
+            )
+
+        retried("POST", 1.0)
+        self.assertEqual(8, fetcher.limit)
+        retried("GET", 1.0)
+        self.assertEqual(4, fetcher.limit)
+        self.assertGreater(fetcher.resume_at, time.monotonic() + 0.5)
+        # same burst
+        retried("GET", 2.0)
+        self.assertEqual(4, fetcher.limit)
+        self.assertEqual(2, fetcher.rate_limits)
+
+    def test_latency(self):
+        fetcher = FetchScheduler(8, target_latency=1.0)
+        fetcher.active = 1
+        fetcher.release(latency=3.0)
+        self.assertLess(fetcher.limit, 8)
+        slow = fetcher.limit
+        for _ in range(50):
+            fetcher.active = 1
+            fetcher.release(latency=0.1)
+        self.assertGreater(fetcher.limit, slow)
+        self.assertLessEqual(fetcher.limit, 8)
@@ -0,0 +1,109 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+import json
+import os
+import tempfile
+import time
+
+from src.logs import GuildLogs
+from src.logs.guild_logs import open_log
+from src.logs.log_file import encode_frame, HEADER, HEADER_STRUCT, FILE_VERSION
+from tests.unit.logs.test_reaction_fetcher import FakeHydration, message_dict
+from tests.utils import AsyncTestCase
+
+
+class NoHistory:
+    def __init__(self, id: int, last_message_id: int):
+        self.id = id
+        self.name = f"chan{id}"
+        self.nsfw = False
+        self.last_message_id = last_message_id
+
+    async def history(self, **kwargs):
+        return
+        yield
+
+    def get_partial_message(self, id: int):
+        return MagicMock(id=id)
+
+
+class TestFastLoad(AsyncTestCase):
+    def setUp(self):
+        super().setUp()
+        self.dir = tempfile.TemporaryDirectory()
+        self.log_dir = patch("src.logs.guild_logs.LOG_DIR", self.dir.name)
+        self.log_dir.start()
+        self.channel = NoHistory(100, 2)
+        self.guild = MagicMock(id=7, text_channels=[self.channel])
+        # saved by a command that did not need the reaction users
+        channels = {
+            "100": {
+                "format": 3,
+                "id": 100,
+                "name": "chan100",
+                "last_message_id": 2,
+                "first_message_id": None,
+                "messages": [
+                    message_dict(1, {"a": []}, {"a": 2}),
+                    message_dict(2, {}, {}),
+                ],
+            }
+        }
+        path = os.path.join(self.dir.name, "7.logz")
+        with open(path, "wb") as f:
+            f.write(encode_frame(json.dumps(channels).encode(), None))
+        os.utime(path, (time.time() - 3600, time.time() - 3600))
+
+    def tearDown(self):
+        self.log_dir.stop()
+        self.dir.cleanup()
+        super().tearDown()
+
+    def load(self, **kwargs) -> GuildLogs:
+        logs = GuildLogs(self.guild)
+        progress = MagicMock(edit=AsyncMock())
+        self._await(
+            logs.load(progress, [self.channel], None, None, fresh=False, **kwargs)
+        )
+        return logs
+
+    @patch("src.logs.guild_logs.fernet", None)
+    def test_hydrated(self):
+        with patch(
+            "src.logs.guild_logs.ReactionFetcher",
+            lambda: FakeHydration({(1, "a"): [5, 6]}),
+        ):
+            # %react fast (or %repeat) after a command without reactions
+            logs = self.load(fast=True, hydrate=True)
+        channel_logs = logs.channels[100]
+        self.assertTrue(channel_logs.is_hydrated())
+        self.assertDictEqual({"a": [5, 6]}, list(channel_logs.messages)[0].reactions)
+        logs.unlock()
+
+    @patch("src.logs.guild_logs.fernet", None)
+    def test_not_hydrated(self):
+        logs = self.load(fast=True, hydrate=False)
+        self.assertFalse(logs.channels[100].is_hydrated())
+        self.assertFalse(logs.locked)
+
+
+class TestOpenLog(AsyncTestCase):
+    def test_corrupt_header(self):
+        files = []
+
+        def tracked_open(*args, **kwargs):
+            files.append(open(*args, **kwargs))
+            return files[-1]
+
+        async def read(path: str):
+            async with open_log(path):
+                pass
+
+        with tempfile.TemporaryDirectory() as dir:
+            path = os.path.join(dir, "7.logz")
+            with open(path, "wb") as f:
+                f.write(HEADER_STRUCT.pack(HEADER, FILE_VERSION + 1, 0))
+            with patch("src.logs.log_file.open", tracked_open, create=True):
+                with self.assertRaises(IOError):
+                    self._await(read(path))
+        self.assertEqual(1, len(files))
+        self.assertTrue(files[0].closed)
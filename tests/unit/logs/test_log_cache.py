@@ -0,0 +1,57 @@
+from unittest import TestCase
+import os
+import tempfile
+
+from src.logs import log_cache
+
+
+def entry(path: str, nbytes: int) -> log_cache.CachedLogs:
+    return log_cache.CachedLogs(
+        log_cache.file_version(path), {}, [], None, False, 0, 0, 0, nbytes
+    )
+
+
+class TestLogCache(TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.paths = []
+        for i in range(3):
+            self.paths += [os.path.join(self.dir.name, f"{i}.logz")]
+            with open(self.paths[i], "wb") as f:
+                f.write(b"log")
+        log_cache.entries.clear()
+        self.budget = log_cache.LOG_CACHE_MB
+        log_cache.LOG_CACHE_MB = 1
+
+    def tearDown(self):
+        log_cache.LOG_CACHE_MB = self.budget
+        log_cache.entries.clear()
+        self.dir.cleanup()
+
+    def test_checkout(self):
+        self.assertIsNone(log_cache.checkout(0, self.paths[0]))
+        cached = entry(self.paths[0], 100)
+        log_cache.checkin(0, cached)
+        self.assertIs(cached, log_cache.checkout(0, self.paths[0]))
+        # checked out by one command at a time
+        self.assertIsNone(log_cache.checkout(0, self.paths[0]))
+
+    def test_stale(self):
+        log_cache.checkin(0, entry(self.paths[0], 100))
+        with open(self.paths[0], "ab") as f:
+            f.write(b"delta")
+        stale = log_cache.stats["stale"]
+        self.assertIsNone(log_cache.checkout(0, self.paths[0]))
+        self.assertEqual(stale + 1, log_cache.stats["stale"])
+
+    def test_eviction(self):
+        size = 400 * 1024
+        log_cache.checkin(0, entry(self.paths[0], size))
+        log_cache.checkin(1, entry(self.paths[1], size))
+        self.assertIsNotNone(log_cache.checkout(0, self.paths[0]))
+        log_cache.checkin(0, entry(self.paths[0], size))
+        # least recently used first
+        log_cache.checkin(2, entry(self.paths[2], size))
+        self.assertListEqual([0, 2], list(log_cache.entries))
+        log_cache.checkin(1, entry(self.paths[1], 2 * 1024 * 1024))
+        self.assertNotIn(1, log_cache.entries)
@@ -0,0 +1,83 @@
+from unittest import TestCase
+import random
+import numpy as np
+
+from src.logs.message_codec import encode, decode, encode_varints, decode_varints
+from src.logs.message_log import MessageRecord
+from src.logs.message_store import MessageStore
+from src.utils import snowflake_timestamp
+
+EMOJIS = ["\U0001f44d", "<:custom:1234>", "\U0001f468‍\U0001f469‍\U0001f467", "é"]
+
+
+def random_record(rng: random.Random, id: int) -> MessageRecord:
+    reactions = {
+        emoji: [rng.getrandbits(63) for _ in range(rng.randint(0, 2))]
+        for emoji in rng.sample(EMOJIS, rng.randint(0, 3))
+    }
+    return MessageRecord(
+        id,
+        rng.choice([0, snowflake_timestamp(id) + rng.randint(0, 10 ** 6)]),
+        rng.getrandbits(63),
+        rng.choice([0, id - 1]),
+        rng.getrandbits(7),
+        rng.choice(["", "hi", "l'été \ud83d", "\U0001f44d" * rng.randint(1, 3)]),
+        [rng.getrandbits(63) for _ in range(rng.randint(0, 3))],
+        [rng.getrandbits(20) for _ in range(rng.randint(0, 1))],
+        [rng.getrandbits(63) for _ in range(rng.randint(0, 2))],
+        reactions,
+        {emoji: max(1, len(reactions[emoji])) for emoji in reactions},
+    )
+
+
+def columns(store: MessageStore) -> list:
+    return [
+        (message.id, message.author, message.flags, message.content)
+        + (
+            store.edited[message.row],
+            store.references[message.row],
+            store.mentions.get(message.row),
+            store.role_mentions.get(message.row),
+            store.channel_mentions.get(message.row),
+            store.reactions(message.row),
+            store.counts(message.row),
+        )
+        for message in store
+    ]
+
+
+class TestMessageCodec(TestCase):
+    def setUp(self):
+        rng = random.Random(0)
+        self.store = MessageStore(None)
+        ids = sorted(rng.sample(range(1 << 40, 1 << 62), 300))
+        for id in ids:
+            self.store.append(random_record(rng, id))
+        self.store.flush()
+
+    def test_varints(self):
+        values = np.array([0, 1, 127, 128, 300, 1 << 62, -1, -(1 << 63)], np.int64)
+        self.assertListEqual(
+            values.tolist(), decode_varints(encode_varints(values)).tolist()
+        )
+        self.assertEqual(b"\xac\x02", encode_varints(np.array([300])))
+
+    def test_round_trip(self):
+        store = MessageStore(None)
+        for block in decode(encode(self.store, np.arange(len(self.store)))):
+            store.extend(block)
+        self.assertListEqual(columns(self.store), columns(store))
+
+    def test_append(self):
+        # base block and appended deltas are concatenated, duplicates dropped
+        rows = np.arange(len(self.store))
+        data = b"".join(
+            encode(self.store, part) for part in [rows[:200], rows[150:], rows[:0]]
+        )
+        store = MessageStore(None)
+        for block in decode(data):
+            store.extend(block)
+        self.assertListEqual(columns(self.store), columns(store))
+        # the string index is kept, strings are interned once
+        self.assertEqual(len(set(store.strings)), len(store.strings))
+        self.assertEqual(len(store.strings), len(store.string_index))
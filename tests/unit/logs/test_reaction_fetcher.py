@@ -0,0 +1,194 @@
+from unittest.mock import MagicMock
+from datetime import datetime, timedelta, timezone
+import asyncio
+import discord
+
+from src.logs import ChannelLogs
+from src.logs.reaction_fetcher import ReactionFetcher
+from tests.utils import AsyncTestCase
+
+NOW = datetime.now(timezone.utc)
+
+
+def fake_reaction(emoji: str, users: list, stats: dict):
+    async def fetch_users():
+        stats["active"] += 1
+        stats["max"] = max(stats["max"], stats["active"])
+        stats["calls"] += 1
+        try:
+            for id in users:
+                await asyncio.sleep(0.001)
+                yield MagicMock(id=id)
+        finally:
+            stats["active"] -= 1
+
+    return MagicMock(emoji=emoji, count=len(users), users=fetch_users)
+
+
+class TestReactionFetcher(AsyncTestCase):
+    def setUp(self):
+        super().setUp()
+        self.stats = {"active": 0, "max": 0, "calls": 0}
+
+    def test_concurrent(self):
+        messages = [
+            MagicMock(
+                id=id,
+                reactions=[
+                    fake_reaction("a", [1, 2], self.stats),
+                    fake_reaction("b", [id], self.stats),
+                ],
+            )
+            for id in range(10)
+        ]
+        fetcher = ReactionFetcher(3)
+        reactions = self._await(fetcher.fetch(messages, lambda id: None))
+        self.assertEqual(20, self.stats["calls"])
+        self.assertLessEqual(self.stats["max"], 3)
+        self.assertGreater(self.stats["max"], 1)
+        self.assertDictEqual({"a": [1, 2], "b": [4]}, reactions[4])
+        self.assertListEqual(["a", "b"], list(reactions[4]))
+        self.assertEqual(20, fetcher.fetched)
+
+    def test_unchanged(self):
+        known = {1: {"a": [7, 8], "b": [9]}}
+        messages = [
+            MagicMock(
+                id=1,
+                reactions=[
+                    fake_reaction("a", [1, 2], self.stats),
+                    fake_reaction("b", [3, 4], self.stats),
+                ],
+            )
+        ]
+        fetcher = ReactionFetcher()
+        reactions = self._await(fetcher.fetch(messages, known.get))
+        # same count, kept from the known reactions
+        self.assertDictEqual({"a": [7, 8], "b": [3, 4]}, reactions[1])
+        self.assertEqual(1, self.stats["calls"])
+        self.assertEqual(1, fetcher.reused)
+
+    def test_deleted(self):
+        async def not_found():
+            raise discord.NotFound(MagicMock(status=404), "Unknown Message")
+            yield
+
+        message = MagicMock(
+            id=1,
+            reactions=[
+                fake_reaction("a", [1], self.stats),
+                MagicMock(emoji="b", count=1, users=not_found),
+            ],
+        )
+        fetcher = ReactionFetcher()
+        reactions = self._await(fetcher.fetch([message], lambda id: None))
+        # the other reactions of the page are kept
+        self.assertDictEqual({"a": [1]}, reactions[1])
+
+
+class FakeHydration(ReactionFetcher):
+    def __init__(self, users: dict):
+        super().__init__()
+        self.users = users
+        self.asked = []
+
+    async def gather(self, todo):
+        for users, key, reaction in todo:
+            self.asked += [(reaction.message.id, reaction.emoji)]
+            users[key] = self.users[(reaction.message.id, reaction.emoji)]
+
+
+def message_dict(id: int, reactions: dict, counts: dict) -> dict:
+    return {
+        "id": id,
+        "created_at": (NOW - timedelta(minutes=100 - id)).isoformat(),
+        "edited_at": None,
+        "author": 1,
+        "pinned": False,
+        "mention_everyone": False,
+        "tts": False,
+        "bot": False,
+        "content": "",
+        "mentions": [],
+        "reference": None,
+        "role_mentions": [],
+        "channel_mentions": [],
+        "image": False,
+        "attachment": False,
+        "embed": False,
+        "reactions": reactions,
+        "reaction_counts": counts,
+    }
+
+
+class TestLazyReactions(AsyncTestCase):
+    def test_hydrate(self):
+        channel_logs = ChannelLogs(
+            {
+                "format": 3,
+                "id": 1,
+                "name": "chan",
+                "last_message_id": 3,
+                "messages": [
+                    message_dict(1, {"a": [], "b": [4]}, {"a": 2, "b": 1}),
+                    message_dict(2, {}, {}),
+                    message_dict(3, {"b": []}, {"b": 1}),
+                ],
+            },
+            MagicMock(id=1),
+        )
+        channel = MagicMock()
+        channel.get_partial_message = lambda id: MagicMock(id=id)
+        channel_logs.preload(channel)
+        self.assertFalse(channel_logs.is_hydrated())
+        self.assertDictEqual({"a": 2, "b": 1}, list(channel_logs.range())[0].reaction_counts)
+        fetcher = FakeHydration({(1, "a"): [5, 6], (3, "b"): [7]})
+
+        async def hydrate():
+            return [
+                count
+                async for count in channel_logs.hydrate(None, None, reactions=fetcher)
+            ]
+
+        self.assertListEqual([2], self._await(hydrate()))
+        self.assertListEqual([(1, "a"), (3, "b")], fetcher.asked)
+        self.assertTrue(channel_logs.is_hydrated())
+        self.assertTrue(channel_logs.rewrite)
+        messages = list(channel_logs.range())
+        self.assertDictEqual({"a": [5, 6], "b": [4]}, messages[0].reactions)
+        self.assertDictEqual({}, messages[1].reactions)
+        self.assertDictEqual({"b": [7]}, messages[2].reactions)
+        # already hydrated reactions are not fetched again
+        self.assertListEqual([], self._await(hydrate()))
+
+    def test_hydrate_deleted(self):
+        channel_logs = ChannelLogs(
+            {
+                "format": 3,
+                "id": 1,
+                "name": "chan",
+                "last_message_id": 2,
+                "messages": [
+                    message_dict(1, {"a": []}, {"a": 1}),
+                    message_dict(2, {"a": []}, {"a": 2}),
+                ],
+            },
+            MagicMock(id=1),
+        )
+        channel = MagicMock()
+        channel.get_partial_message = lambda id: MagicMock(id=id)
+        channel_logs.preload(channel)
+        # message 1 was deleted since
+        fetcher = FakeHydration({(1, "a"): None, (2, "a"): [5, 6]})
+
+        async def hydrate():
+            return [
+                count
+                async for count in channel_logs.hydrate(None, None, reactions=fetcher)
+            ]
+
+        self.assertListEqual([2], self._await(hydrate()))
+        self.assertTrue(channel_logs.is_hydrated())
+        messages = list(channel_logs.range())
+        self.assertDictEqual({"a": 0}, messages[0].reaction_counts)
+        self.assertDictEqual({"a": [5, 6]}, messages[1].reactions)
@@ -0,0 +1,67 @@
+from unittest import TestCase
+import random
+import re
+import numpy as np
+
+from src.logs.text_index import TextIndex, required_literals
+
+WORDS = ["love", "you", "too", "lover", "glove", "Yo", "l'amour", "été", "x_y", "42"]
+
+
+def random_text(rng: random.Random) -> str:
+    return "".join(
+        rng.choice(WORDS) + rng.choice([" ", "  ", ", ", "-", "!", ""])
+        for _ in range(rng.randint(0, 6))
+    )
+
+
+def build(ids: list, texts: list) -> TextIndex:
+    index = TextIndex()
+    index.update(np.array(ids, np.int64), np.arange(len(texts)), texts)
+    return index
+
+
+class TestTextIndex(TestCase):
+    def setUp(self):
+        rng = random.Random(0)
+        self.texts = [random_text(rng) for _ in range(300)]
+        self.queries = ["love", "ove", "you too", "e you", "O", "u, l", "été", "x_", "-"]
+
+    def check(self, index: TextIndex, texts: list):
+        for query in self.queries:
+            rows = index.search(query)
+            expected = [i for i, text in enumerate(texts) if query.lower() in text.lower()]
+            if rows is None:
+                continue
+            self.assertTrue(set(expected) <= set(rows.tolist()), query)
+
+    def test_search(self):
+        index = build(list(range(len(self.texts))), self.texts)
+        self.check(index, self.texts)
+        self.assertListEqual(
+            [i for i, text in enumerate(self.texts) if "glove" in text.lower()],
+            index.search("glove").tolist(),
+        )
+        self.assertIsNone(index.search("-"))
+
+    def test_update(self):
+        # older messages are inserted before the indexed ones
+        index = build(list(range(100, 300)), self.texts[100:])
+        index.update(np.arange(300, dtype=np.int64), np.arange(300), self.texts)
+        self.check(index, self.texts)
+        self.assertTrue(index.is_synced(np.arange(300)))
+
+    def test_dump(self):
+        index = TextIndex.load(build(list(range(300)), self.texts).dump())
+        self.check(index, self.texts)
+
+    def test_regex(self):
+        self.assertListEqual(["love", " you"], required_literals(r"love.* you"))
+        self.assertIsNone(required_literals(r"(?i)love"))
+        self.assertIsNone(required_literals(r"(love"))
+        index = build(list(range(len(self.texts))), self.texts)
+        for pattern in [r"love\w* you", r"l'amour|too", r"^Yo"]:
+            rows = index.search_regex(pattern)
+            expected = [i for i, text in enumerate(self.texts) if re.search(pattern, text)]
+            if rows is not None:
+                self.assertTrue(set(expected) <= set(rows.tolist()), pattern)
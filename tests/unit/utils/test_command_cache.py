@@ -0,0 +1,37 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from src.utils import command_cache
+
+
+class TestAggregateCache(TestCase):
+    def setUp(self):
+        command_cache.aggregate_cache.clear()
+        command_cache.aggregate_bytes = 0
+
+    def tearDown(self):
+        self.setUp()
+
+    @patch("src.utils.command_cache.AGGREGATE_CACHE_MB", 10 / 1024 / 1024)
+    def test_budget(self):
+        command_cache.cache_aggregate(("a", 1, 1), 10, b"1234", 4)
+        command_cache.cache_aggregate(("a", 1, 2), 10, b"1234", 4)
+        command_cache.get_aggregate(("a", 1, 1))
+        command_cache.cache_aggregate(("a", 2, 1), 10, b"1234", 4)
+        # least recently used evicted
+        self.assertIsNone(command_cache.get_aggregate(("a", 1, 2)))
+        self.assertEqual((10, b"1234", 4), command_cache.get_aggregate(("a", 1, 1)))
+        self.assertEqual(8, command_cache.aggregate_bytes)
+        # replaced, not counted twice
+        command_cache.cache_aggregate(("a", 1, 1), 12, b"123456", 6)
+        self.assertEqual(10, command_cache.aggregate_bytes)
+        # larger than the whole budget
+        command_cache.cache_aggregate(("b", 1, 1), 10, b"12345678901", 4)
+        self.assertIsNone(command_cache.get_aggregate(("b", 1, 1)))
+
+    def test_forget_guild(self):
+        command_cache.cache_aggregate(("a", 1, 1), 10, b"1234", 4)
+        command_cache.cache_aggregate(("a", 2, 1), 10, b"12", 4)
+        command_cache.forget_guild(1)
+        self.assertListEqual([("a", 2, 1)], list(command_cache.aggregate_cache))
+        self.assertEqual(2, command_cache.aggregate_bytes)
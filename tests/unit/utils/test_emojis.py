@@ -0,0 +1,32 @@
+from unittest import TestCase
+
+from src.utils.emojis import EmojiMatcher
+
+FAMILY = "\U0001f468‍\U0001f469‍\U0001f467"
+KEYCAP = "1️⃣"
+
+
+class TestEmojiMatcher(TestCase):
+    def setUp(self):
+        self.matcher = EmojiMatcher(
+            ["\U0001f468", FAMILY, FAMILY + "‍\U0001f466", KEYCAP, "\U0001f44d"]
+        )
+
+    def test_findall(self):
+        self.assertListEqual(
+            [":smile:", "<a:party:123>", "\U0001f44d", KEYCAP, "\U0001f468"],
+            self.matcher.findall(
+                "hi :smile: a:b <a:party:123>\U0001f44d 12 " + KEYCAP + "\U0001f468"
+            ),
+        )
+
+    def test_longest(self):
+        self.assertListEqual(
+            [FAMILY + "‍\U0001f466", FAMILY, "\U0001f468"],
+            self.matcher.findall(
+                FAMILY + "‍\U0001f466" + FAMILY + "‍\U0001f468"
+            ),
+        )
+
+    def test_empty(self):
+        self.assertListEqual([":a:"], EmojiMatcher([]).findall(":a: \U0001f44d"))
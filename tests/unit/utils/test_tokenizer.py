@@ -0,0 +1,25 @@
+from unittest import TestCase
+
+from src.utils.tokenizer import tokenize, Vocabulary
+
+
+class TestTokenizer(TestCase):
+    def test_words(self):
+        self.assertListEqual(
+            ["hello", "it's", "well-known", "a1b", "x_y"],
+            tokenize("Hello, it's a well-known 'a1b' 42 x_y b2"),
+        )
+
+    def test_skipped(self):
+        self.assertListEqual([], tokenize(":smile: https://example.com/path"))
+        self.assertListEqual(["before", "after"], tokenize("before `code` after"))
+        self.assertListEqual(
+            ["before", "after"], tokenize("before ```\nsome code\n``` after")
+        )
+        self.assertListEqual([], tokenize("a:b ab1 _ab"))
+
+    def test_vocabulary(self):
+        vocabulary = Vocabulary()
+        self.assertListEqual([0, 1, 0], vocabulary.ids(["a", "b", "a"]))
+        self.assertListEqual([1, 2], vocabulary.ids(["b", "c"]))
+        self.assertListEqual(["a", "b", "c"], vocabulary.words)